@@ -0,0 +1,192 @@
+"""
+Async views of the most requested task endpoints, for ASGI servers.
+
+    GET   /api/async/tasks/
+    GET   /api/async/tasks/my/
+    GET   /api/async/tasks/{id}/
+    PATCH /api/async/tasks/{id}/completed/
+
+They take the same parameters and return the same responses as the
+endpoints of TaskViewSet. The token is checked in the event loop and the
+queries run in a pool of ASYNC_DB_THREADS threads.
+"""
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from rest_framework.exceptions import (AuthenticationFailed,
+                                       MethodNotAllowed, NotAuthenticated)
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+from tasks.models import ArchivedTask, Task
+from .authentication import StatelessJWTAuthentication
+from .conditional import make_etag, not_modified, set_validators
+from .connections import close_unusable_connections
+from .filters import filter_my_tasks, filter_tasks
+from .pagination import TaskCursorPagination
+from .renderers import FastJSONRenderer
+from .serializers import TaskSerializer, get_task_fields
+from .timing import phase
+from .views import (cached_list, complete_task, get_archived_task,
+                    include_archived, paginate_rows)
+
+authentication = StatelessJWTAuthentication()
+renderer = FastJSONRenderer()
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_DB_THREADS, thread_name_prefix='async-db')
+
+
+def database(func):
+    """
+    Return an async function running func in the database thread pool.
+
+    The threads of the pool serve no requests of their own, so the
+    connections are checked before and after func as a request does.
+    """
+    def run(*args, **kwargs):
+        close_old_connections()
+        close_unusable_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False, executor=executor)
+
+
+async def authenticate(request):
+    """Return the user of the JWT sent with the request."""
+    header = authentication.get_header(request)
+    if header is None:
+        raise NotAuthenticated()
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        raise NotAuthenticated()
+    token = authentication.get_validated_token(raw_token)
+    # The user is made of the token, only the revocation is looked up in
+    # the cache, which may be a network one.
+    return await database(authentication.get_user)(token)
+
+
+def api_view(method):
+    """
+    Make an async view an API endpoint for authenticated users.
+
+    The view gets a DRF request and returns a DRF response, which is
+    rendered as JSON. API errors are answered as DRF views do.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            request = Request(request)
+            request.accepted_renderer = renderer
+            request.accepted_media_type = renderer.media_type
+            try:
+                if request.method != method:
+                    raise MethodNotAllowed(request.method)
+                with phase('auth'):
+                    request.user = await authenticate(request)
+                response = await view(request, *args, **kwargs)
+            except Exception as exc:
+                response = exception_handler(exc, {})
+                if response is None:
+                    raise
+                if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+                    response['WWW-Authenticate'] = (
+                        authentication.authenticate_header(request))
+            if isinstance(response, Response):
+                response.accepted_renderer = renderer
+                response.accepted_media_type = renderer.media_type
+                response.renderer_context = {'request': request}
+                response.render()
+            return response
+        # csrf_exempt() of Django 3.2 would turn the view into a sync one.
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+def paginate(request, tasks, fields, archived=None):
+    """Return a page of tasks as TaskViewSet paginates it."""
+    if request.query_params.get('pagination') == 'cursor':
+        paginator = TaskCursorPagination()
+    else:
+        paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+    return paginate_rows(
+        request, tasks, paginator, fields=fields, archived=archived)
+
+
+def list_tasks(request, scope, tasks, archived, filter_list):
+    """
+    Return a page of the tasks, and of the archived tasks when the client
+    asks for them, both filtered by filter_list.
+    """
+    fields = get_task_fields(request)
+    tasks = filter_list(request, tasks)
+    if include_archived(request):
+        archived = filter_list(request, archived)
+    else:
+        archived = None
+    return cached_list(
+        request, scope, lambda: paginate(request, tasks, fields, archived))
+
+
+def get_task_list(request):
+    return list_tasks(
+        request, 'all', Task.objects.all(), ArchivedTask.objects.all(),
+        filter_tasks)
+
+
+def get_my_tasks(request):
+    return list_tasks(
+        request, f'user:{request.user.id}',
+        Task.objects.filter(user_id=request.user.id),
+        ArchivedTask.objects.filter(user_id=request.user.id),
+        filter_my_tasks)
+
+
+def get_task(request, pk):
+    fields = get_task_fields(request)
+    try:
+        task = get_object_or_404(
+            Task.objects.only(*fields, 'updated'), pk=pk)
+    except Http404:
+        task = get_archived_task(request, pk, fields)
+    etag = make_etag(task.pk, task.updated.isoformat(), renderer.format,
+                     ','.join(fields))
+    response = not_modified(request, etag, task.updated)
+    if response is None:
+        serializer = TaskSerializer(task, fields=fields)
+        response = set_validators(
+            Response(serializer.data), etag, task.updated)
+    return response
+
+
+@api_view('GET')
+async def task_list(request):
+    """Get a list of all tasks."""
+    return await database(get_task_list)(request)
+
+
+@api_view('GET')
+async def my_tasks(request):
+    """Get a list of all user tasks."""
+    return await database(get_my_tasks)(request)
+
+
+@api_view('GET')
+async def task_detail(request, pk):
+    """Get a task."""
+    return await database(get_task)(request, pk)
+
+
+@api_view('PATCH')
+async def task_completed(request, pk):
+    """Change the status of a specific user task to completed."""
+    return await database(complete_task)(request, pk)
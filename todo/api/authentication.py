@@ -0,0 +1,174 @@
+import copy
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt import models
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from tasks.models import User
+
+from .timing import phase
+
+
+class UserCache:
+    """
+    A small in-process cache of full users, bounded in size and age.
+
+    The least recently used user is dropped when the cache is full. A user
+    is dropped when they are saved, see api.signals; the age bounds how long
+    other processes may serve a changed user.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = OrderedDict()
+
+    def get(self, user_id, load):
+        """Return a copy of the cached user, call load() when missing."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._users.get(user_id)
+            if cached is not None and cached[0] > now:
+                self._users.move_to_end(user_id)
+                return copy.copy(cached[1])
+        user = load()
+        with self._lock:
+            self._users[user_id] = (
+                now + settings.AUTH_USER_CACHE_TIMEOUT, user)
+            self._users.move_to_end(user_id)
+            while len(self._users) > settings.AUTH_USER_CACHE_SIZE:
+                self._users.popitem(last=False)
+        return copy.copy(user)
+
+    def delete(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache()
+
+
+class TokenRevocations:
+    """Revocation of the tokens of a user, kept on the user row."""
+
+    prefix = 'auth:revoked'
+
+    @property
+    def cache(self):
+        return caches[settings.TASKS_CACHE_ALIAS]
+
+    def _key(self, user_id):
+        return f'{self.prefix}:{user_id}'
+
+    def get_before(self, user_id):
+        """Return the time until which tokens of the user are refused."""
+        key = self._key(user_id)
+        before = self.cache.get(key)
+        if before is None:
+            # The cache only saves the query, a lost entry is read again.
+            user = User.objects.filter(pk=user_id).values_list(
+                'is_active', 'tokens_valid_after').first()
+            before = self.get_user_before(*user) if user else math.inf
+            self.cache.set(
+                key, before, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        return before
+
+    def get_user_before(self, is_active, tokens_valid_after):
+        if not is_active:
+            return math.inf
+        if tokens_valid_after is None:
+            return 0
+        return int(tokens_valid_after.timestamp())
+
+    def revoke(self, user):
+        """Refuse the tokens of the user issued until now."""
+        user.tokens_valid_after = timezone.now()
+        User.objects.filter(pk=user.pk).update(
+            tokens_valid_after=user.tokens_valid_after)
+        self.forget(user.pk)
+
+    def forget(self, user_id):
+        """Read the revocation of the user from the database again."""
+        key = self._key(user_id)
+        # Once more after commit, so a request reading the user before the
+        # commit does not cache what it read.
+        self.cache.delete(key)
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: self.cache.delete(key))
+
+    def is_revoked(self, token):
+        before = self.get_before(token[api_settings.USER_ID_CLAIM])
+        issued = token['exp'] - (
+            api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+        # Tokens know their time to the second, so the tokens issued in
+        # the second of the revocation are refused as well.
+        return issued <= before
+
+
+token_revocations = TokenRevocations()
+
+
+class TokenUser(models.TokenUser):
+    """A user made of the claims of the token, without a query."""
+
+    @cached_property
+    def user(self):
+        """The full User, for the rare code that needs more than the id."""
+        return CachedJWTAuthentication().get_user(self.token)
+
+
+def check_revocation(validated_token):
+    if token_revocations.is_revoked(validated_token):
+        raise AuthenticationFailed(_('Token is revoked'), code='token_revoked')
+
+
+class TimedJWTAuthentication(JWTAuthentication):
+    """JWT authentication timed as the auth phase, see api.timing."""
+
+    def authenticate(self, request):
+        with phase('auth'):
+            return super().authenticate(request)
+
+
+class StatelessJWTAuthentication(TimedJWTAuthentication):
+    """
+    JWT authentication without loading the user.
+
+    request.user is a TokenUser that knows only the id of the user, which
+    is enough for the task endpoints.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        check_revocation(validated_token)
+        return TokenUser(validated_token)
+
+
+class CachedJWTAuthentication(TimedJWTAuthentication):
+    """JWT authentication loading the user from the in-process cache."""
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        check_revocation(validated_token)
+        return user_cache.get(
+            validated_token[api_settings.USER_ID_CLAIM],
+            lambda: self.load_user(validated_token))
+
+    def load_user(self, validated_token):
+        return super().get_user(validated_token)
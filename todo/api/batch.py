@@ -0,0 +1,152 @@
+"""
+Many API requests in one HTTP request.
+
+    POST /api/batch/
+    [
+        {"method": "GET", "url": "/api/tasks/5/"},
+        {"method": "PATCH", "url": "/api/tasks/5/completed/"},
+        {"method": "PATCH", "url": "/api/tasks/6/", "body": {"title": "New"}}
+    ]
+
+The sub-requests are served in order and the response is the list of
+their responses. They reuse the authentication of the batch and skip the
+middleware. With ?atomic=1 they run in one transaction, rolled back when
+one of them fails. Streaming responses get a 400 entry.
+"""
+import io
+import json
+from urllib.parse import urlsplit
+
+from asgiref.sync import iscoroutinefunction
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.http import Http404
+from django.urls import Resolver404, resolve
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import serializers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+# Headers of the batch not passed on to its sub-requests.
+BATCH_HEADERS = (
+    'CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_IF_NONE_MATCH',
+    'HTTP_IF_MODIFIED_SINCE', 'HTTP_IF_MATCH', 'HTTP_IF_UNMODIFIED_SINCE')
+
+
+class SubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(
+        choices=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'])
+    url = serializers.CharField()
+    body = serializers.JSONField(required=False)
+    headers = serializers.DictField(
+        child=serializers.CharField(), required=False)
+
+    def validate_url(self, value):
+        url = urlsplit(value)
+        try:
+            match = resolve(url.path)
+        except Resolver404:
+            raise serializers.ValidationError('Not found.')
+        # The async views run in an event loop of their own.
+        if ('api' not in match.app_names
+                or getattr(match.func, 'cls', None) is BatchView
+                or iscoroutinefunction(match.func)):
+            raise serializers.ValidationError(
+                'Not an endpoint of the batch.')
+        return value
+
+
+def make_request(batch, method, url, body=None, headers=None):
+    """Return a request of the batch for the view of url."""
+    url = urlsplit(url)
+    content = b'' if body is None else json.dumps(body).encode()
+    environ = {
+        key: value for key, value in batch.META.items()
+        if key not in BATCH_HEADERS}
+    environ.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(content)),
+        'HTTP_ACCEPT': 'application/json',
+        'wsgi.input': io.BytesIO(content),
+    })
+    for name, value in (headers or {}).items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    request = WSGIRequest(environ)
+    request.user = batch.user
+    # Read by rest_framework.request.Request, the token is not checked
+    # again for every sub-request.
+    request._force_auth_user = batch.user
+    request._force_auth_token = batch.auth
+    return request
+
+
+def serve(request):
+    """Serve a request of the batch, return its response as data."""
+    request.resolver_match = match = resolve(request.path_info)
+    try:
+        response = match.func(request, *match.args, **match.kwargs)
+    except Http404:
+        return {'status': status.HTTP_404_NOT_FOUND, 'headers': {},
+                'body': {'detail': 'Not found.'}}
+    if response.streaming:
+        # Buffering the stream would hold all of it in memory.
+        response.close()
+        return {'status': status.HTTP_400_BAD_REQUEST, 'headers': {},
+                'body': {'detail': 'Streaming responses are not served '
+                                   'in a batch.'}}
+    if isinstance(response, Response):
+        # The data is rendered with the batch instead of on its own.
+        body = response.data
+    else:
+        body = response.content.decode() or None
+    headers = {
+        name: value for name, value in response.items()
+        if name not in ('Content-Type', 'Content-Length', 'Vary', 'Allow')}
+    return {'status': response.status_code, 'headers': headers,
+            'body': body}
+
+
+class BatchView(APIView):
+    """Serve a list of API requests, see the module docstring."""
+
+    batch_max_size = 50
+
+    @swagger_auto_schema(
+            operation_summary="Batch of requests",
+            operation_description=(
+                "Serve a list of API requests in order and return the list "
+                "of their responses. With ?atomic=1 they run in one "
+                "transaction, rolled back when one of them fails."),
+            request_body=SubRequestSerializer(many=True),
+    )
+    def post(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise serializers.ValidationError(
+                {'non_field_errors': ['Expected a list of items.']})
+        if len(items) > self.batch_max_size:
+            raise serializers.ValidationError({'non_field_errors': [
+                f'Ensure this list has no more than {self.batch_max_size} '
+                f'items.'
+            ]})
+        serializer = SubRequestSerializer(data=items, many=True)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        requests = [
+            make_request(request, **item)
+            for item in serializer.validated_data]
+        if request.query_params.get('atomic') not in ('1', 'true'):
+            return Response([serve(item) for item in requests])
+        responses = []
+        with transaction.atomic():
+            for item in requests:
+                responses.append(serve(item))
+                if responses[-1]['status'] >= 400:
+                    transaction.set_rollback(True)
+                    return Response(
+                        responses, status=status.HTTP_400_BAD_REQUEST)
+        return Response(responses)
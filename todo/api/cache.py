@@ -0,0 +1,104 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from . import metrics
+
+
+class TaskListCache:
+    """
+    Cache of serialized task list pages.
+
+    Entries are grouped in scopes, 'all' and 'user:<id>', invalidated at
+    once by bumping the version of the scope that is part of their keys.
+    """
+
+    prefix = 'tasks:list'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[settings.TASKS_CACHE_ALIAS]
+
+    @property
+    def enabled(self):
+        return bool(settings.TASKS_CACHE_TIMEOUT)
+
+    def _version_key(self, scope):
+        return f'{self.prefix}:{scope}:version'
+
+    def _new_version(self):
+        # A lost version key must not bring back old entries, so a new
+        # version starts from the clock instead of from one.
+        return time.time_ns()
+
+    def get_version(self, scope):
+        key = self._version_key(scope)
+        version = self.cache.get(key)
+        if version is None:
+            self.cache.add(key, self._new_version(), timeout=None)
+            version = self.cache.get(key)
+        return version
+
+    def bump(self, scope):
+        key = self._version_key(scope)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, self._new_version(), timeout=None)
+
+    def make_key(self, scope, request):
+        url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        return f'{self.prefix}:{scope}:{self.get_version(scope)}:{url}'
+
+    def get(self, scope, request):
+        """Return the cached data for the request or None."""
+        if not self.enabled:
+            return None
+        data = self.cache.get(self.make_key(scope, request))
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                metrics.task_list_cache_misses.inc()
+            else:
+                self.hits += 1
+                metrics.task_list_cache_hits.inc()
+        return data
+
+    def set(self, scope, request, data, timeout=None):
+        """Cache the data for TASKS_CACHE_TIMEOUT or a shorter timeout."""
+        if self.enabled:
+            if timeout is None or timeout > settings.TASKS_CACHE_TIMEOUT:
+                timeout = settings.TASKS_CACHE_TIMEOUT
+            self.cache.set(
+                self.make_key(scope, request), data, timeout=timeout)
+
+    def invalidate(self, user_ids):
+        """Invalidate the lists with tasks of the given users."""
+        scopes = ['all', *(f'user:{user_id}' for user_id in set(user_ids))]
+
+        def bump_scopes():
+            for scope in scopes:
+                self.bump(scope)
+
+        # Bump right away and once more after commit, so a list cached from
+        # a concurrent request before the commit does not outlive it.
+        bump_scopes()
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(bump_scopes)
+
+    def stats(self):
+        """Return the hit and miss counters of this process."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+task_list_cache = TaskListCache()
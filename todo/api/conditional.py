@@ -0,0 +1,52 @@
+import hashlib
+import json
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def make_etag(*parts):
+    """Return a quoted entity tag for the given values."""
+    value = ':'.join(str(part) for part in parts)
+    return quote_etag(hashlib.md5(value.encode()).hexdigest())
+
+
+def timestamp(value):
+    """Return a datetime as seconds since the epoch, as HTTP dates use."""
+    return timegm(value.utctimetuple())
+
+
+def list_etag(request, version):
+    """Return the entity tag of a list at a version of its cache scope."""
+    return make_etag(
+        request.get_full_path(), request.accepted_renderer.format, version)
+
+
+def content_etag(request, data):
+    """Return the entity tag of a list from its data."""
+    return make_etag(
+        request.get_full_path(), request.accepted_renderer.format,
+        json.dumps(data, cls=JSONEncoder))
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Return a 304 response if the client has a current copy, else None.
+
+    last_modified is a datetime.
+    """
+    response = get_conditional_response(
+        request, etag=etag,
+        last_modified=last_modified and timestamp(last_modified))
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(timestamp(last_modified))
+    return response
@@ -0,0 +1,41 @@
+"""
+Health checks of the database connections kept between requests.
+
+A kept connection idle for more than DATABASE_HEALTH_CHECK_IDLE seconds is
+checked when a request starts and closed if it no longer answers.
+"""
+import time
+
+from django.conf import settings
+from django.db import connections
+
+
+def mark_used(execute, sql, params, many, context):
+    """An execute wrapper recording when its connection last answered."""
+    result = execute(sql, params, many, context)
+    context['connection'].last_used = time.monotonic()
+    return result
+
+
+def install_use_tracker(sender=None, connection=None, **kwargs):
+    """Track the queries of a connection, a connection_created receiver."""
+    if mark_used not in connection.execute_wrappers:
+        connection.execute_wrappers.append(mark_used)
+
+
+def close_unusable_connections():
+    """Close the kept idle connections that no longer answer."""
+    now = time.monotonic()
+    for connection in connections.all():
+        # A connection in a transaction cannot be replaced, and one that is
+        # not open is checked by being opened.
+        if (connection.connection is None
+                or connection.in_atomic_block
+                or not connection.settings_dict.get('CONN_HEALTH_CHECKS')
+                or now - getattr(connection, 'last_used', 0)
+                < settings.DATABASE_HEALTH_CHECK_IDLE):
+            continue
+        if connection.is_usable():
+            connection.last_used = now
+        else:
+            connection.close()
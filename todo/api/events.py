@@ -0,0 +1,380 @@
+"""
+Server-Sent Events of the changes of the tasks of a user, for ASGI servers.
+
+    POST /api/events/tickets/
+    GET /api/events/?ticket=<ticket>
+
+The stream is authenticated by the JWT in the Authorization header, or by
+a single use ticket, as EventSource cannot send headers. The first event,
+sync, carries the change token of /api/tasks/changes/; a sync event
+without a token means events were dropped.
+"""
+import asyncio
+import json
+import secrets
+import threading
+import time
+from collections import defaultdict, deque
+from functools import lru_cache
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy as _
+from drf_yasg import openapi
+from drf_yasg.utils import no_body, swagger_auto_schema
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.views import APIView
+from rest_framework_simplejwt.settings import api_settings
+
+from tasks.models import Task
+from .async_views import database
+from .authentication import StatelessJWTAuthentication, token_revocations
+from .serializers import TaskSerializer
+from .views import get_change_token
+
+EVENTS_PATH = '/api/events/'
+
+authentication = StatelessJWTAuthentication()
+
+
+class Subscription:
+    """The events of a channel waiting to be sent to one stream."""
+
+    def __init__(self, channel, size):
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.events = deque(maxlen=size)
+        self.dropped = False
+        self.ready = asyncio.Event()
+
+    def put(self, event):
+        """Add an event, from any thread."""
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        if len(self.events) == self.events.maxlen:
+            self.dropped = True
+        self.events.append(event)
+        self.ready.set()
+
+    def drop(self):
+        """Tell the stream that events were lost, from any thread."""
+        self.loop.call_soon_threadsafe(self._put, None)
+
+    async def wait(self, timeout):
+        """Wait for events at most timeout seconds."""
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def read(self):
+        """Return the waiting events and forget them."""
+        events = list(self.events)
+        self.events.clear()
+        self.ready.clear()
+        if self.dropped or None in events:
+            self.dropped = False
+            events = [event for event in events if event is not None]
+            events.insert(0, format_event('sync', {}))
+        return events
+
+
+class LocalBroker:
+    """Fan-out of the events to the subscriptions of this process."""
+
+    # Events longer than this are sent without the task, None for any.
+    max_event_size = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+
+    def subscribe(self, channel, size):
+        """Return a subscription to the channel, in the event loop."""
+        subscription = Subscription(channel, size)
+        with self._lock:
+            self.subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self.subscriptions.get(subscription.channel, ())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscriptions.pop(subscription.channel, None)
+
+    def has_subscribers(self, channel):
+        """Whether an event of the channel would reach a subscription."""
+        return channel in self.subscriptions
+
+    def publish(self, channel, event):
+        """Send an event to the subscriptions of the channel."""
+        with self._lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+
+
+class PostgresBroker(LocalBroker):
+    """
+    Fan-out of the events to the subscriptions of every process, through
+    LISTEN and NOTIFY of PostgreSQL.
+    """
+
+    pg_channel = 'task_events'
+    # The limit of a NOTIFY payload is 8000 bytes.
+    max_event_size = 7000
+
+    def __init__(self):
+        super().__init__()
+        self.listener = None
+
+    def has_subscribers(self, channel):
+        # The subscriptions of the other processes are not known.
+        return True
+
+    def subscribe(self, channel, size):
+        if self.listener is None:
+            self.listen(asyncio.get_running_loop())
+        return super().subscribe(channel, size)
+
+    def listen(self, loop):
+        import psycopg2
+
+        database = connections['default']
+        listener = psycopg2.connect(**database.get_connection_params())
+        listener.set_isolation_level(
+            psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with listener.cursor() as cursor:
+            cursor.execute(f'LISTEN {self.pg_channel}')
+        loop.add_reader(listener, self.receive, loop)
+        self.listener = listener
+
+    def receive(self, loop):
+        listener = self.listener
+        try:
+            listener.poll()
+        except Exception:
+            loop.remove_reader(listener)
+            listener.close()
+            self.listener = None
+            with self._lock:
+                subscriptions = [
+                    subscription
+                    for channel in self.subscriptions.values()
+                    for subscription in channel]
+            for subscription in subscriptions:
+                subscription.drop()
+            return
+        while listener.notifies:
+            channel, event = json.loads(listener.notifies.pop(0).payload)
+            super().publish(channel, event)
+
+    def publish(self, channel, event):
+        with connections['default'].cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, %s)',
+                [self.pg_channel, json.dumps([channel, event])])
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """The broker of EVENTS_BROKER, one per process."""
+    return import_string(settings.EVENTS_BROKER)()
+
+
+def format_event(name, data):
+    """Return an event as it is sent in the stream."""
+    data = json.dumps(data, cls=JSONEncoder, separators=(',', ':'))
+    return f'event: {name}\ndata: {data}\n\n'
+
+
+def get_event_name(task, action):
+    if action == 'create':
+        return 'created'
+    if action == 'delete':
+        return 'deleted'
+    if task.status == Task.Status.COMPLETED:
+        return 'completed'
+    return 'updated'
+
+
+def publish_task_events(tasks, action):
+    """
+    Publish the events of tasks written by action, 'create', 'update' or
+    'delete', once they are committed.
+
+    An update leaving a task completed is published as completed.
+    """
+    broker = get_broker()
+    events = []
+    for task in tasks:
+        channel = f'user:{task.user_id_id}'
+        if not broker.has_subscribers(channel):
+            continue
+        name = get_event_name(task, action)
+        if action == 'delete':
+            event = format_event(name, {'id': task.pk})
+        else:
+            event = format_event(name, TaskSerializer(task).data)
+        if (broker.max_event_size is not None
+                and len(event.encode()) > broker.max_event_size):
+            event = format_event(name, {'id': task.pk})
+        events.append((channel, event))
+
+    def publish():
+        for channel, event in events:
+            broker.publish(channel, event)
+
+    if events:
+        transaction.on_commit(publish)
+
+
+def ticket_key(ticket):
+    return f'events:ticket:{ticket}'
+
+
+class EventTicketView(APIView):
+    """Issue a ticket opening one event stream."""
+
+    authentication_classes = (StatelessJWTAuthentication,)
+
+    @swagger_auto_schema(
+            operation_summary="Event stream ticket",
+            operation_description=(
+                "Get a ticket opening one stream of /api/events/, for "
+                "clients that cannot send the Authorization header."),
+            request_body=no_body,
+            responses={201: openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={'ticket': openapi.Schema(
+                    type=openapi.TYPE_STRING)})},
+    )
+    def post(self, request):
+        ticket = secrets.token_urlsafe(32)
+        claims = {
+            api_settings.USER_ID_CLAIM: request.user.id,
+            'exp': request.auth['exp'],
+        }
+        caches[settings.TASKS_CACHE_ALIAS].set(
+            ticket_key(ticket), claims,
+            timeout=settings.EVENTS_TICKET_SECONDS)
+        return Response({'ticket': ticket}, status=status.HTTP_201_CREATED)
+
+
+def use_ticket(ticket):
+    """Return the claims of the token a ticket was issued for, once."""
+    cache = caches[settings.TASKS_CACHE_ALIAS]
+    key = ticket_key(ticket)
+    claims = cache.get(key)
+    # The first stream marking the ticket as used gets it.
+    if claims is None or not cache.add(
+            f'{key}:used', True, timeout=settings.EVENTS_TICKET_SECONDS):
+        raise AuthenticationFailed(_('Ticket is invalid or used'))
+    cache.delete(key)
+    return claims
+
+
+def get_claims(scope):
+    """Return the user id and expiry of the token of the request."""
+    header = dict(scope['headers']).get(b'authorization')
+    if header is None:
+        ticket = parse_qs(scope['query_string'].decode()).get('ticket')
+        if not ticket:
+            raise AuthenticationFailed()
+        claims = use_ticket(ticket[0])
+    else:
+        raw_token = authentication.get_raw_token(header)
+        if raw_token is None:
+            raise AuthenticationFailed()
+        token = authentication.get_validated_token(raw_token)
+        claims = {
+            api_settings.USER_ID_CLAIM: token[api_settings.USER_ID_CLAIM],
+            'exp': token['exp'],
+        }
+    if not is_valid(claims):
+        raise AuthenticationFailed(_('Token is revoked'))
+    return claims
+
+
+def is_valid(claims):
+    """Whether the token is neither expired nor revoked."""
+    return (claims['exp'] > time.time()
+            and not token_revocations.is_revoked(claims))
+
+
+async def respond(send, status, detail):
+    await send({
+        'type': 'http.response.start', 'status': status,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': json.dumps({'detail': detail}).encode(),
+    })
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def stream_events(scope, receive, send):
+    """The ASGI application of the event stream."""
+    if scope['method'] != 'GET':
+        return await respond(send, 405, 'Method not allowed.')
+    try:
+        claims = await database(get_claims)(scope)
+    except AuthenticationFailed as exc:
+        return await respond(send, 401, str(exc.detail))
+    user_id = claims[api_settings.USER_ID_CLAIM]
+    broker = get_broker()
+    subscription = broker.subscribe(
+        f'user:{user_id}', settings.EVENTS_QUEUE_SIZE)
+    disconnected = asyncio.ensure_future(wait_disconnect(receive))
+    loop = asyncio.get_running_loop()
+    heartbeat = settings.EVENTS_HEARTBEAT_SECONDS
+    try:
+        # Read after subscribing, so the changes between both are sent by
+        # the changes since the token or by the stream.
+        token = str(await database(get_change_token)(user_id))
+        await send({
+            'type': 'http.response.start', 'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                # Proxies like nginx must not buffer the stream.
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        body = format_event('sync', {'token': token})
+        check = loop.time() + heartbeat
+        while True:
+            await send({
+                'type': 'http.response.body', 'body': body.encode(),
+                'more_body': True,
+            })
+            waiting = asyncio.ensure_future(subscription.wait(heartbeat))
+            await asyncio.wait(
+                {disconnected, waiting},
+                return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                waiting.cancel()
+                break
+            if loop.time() >= check:
+                # A revoked or expired token closes the stream.
+                check = loop.time() + heartbeat
+                if not await database(is_valid)(claims):
+                    await send({'type': 'http.response.body'})
+                    break
+            body = ''.join(subscription.read()) or ': ping\n\n'
+    finally:
+        disconnected.cancel()
+        broker.unsubscribe(subscription)
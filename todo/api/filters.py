@@ -0,0 +1,69 @@
+from django_filters import rest_framework as filters
+from django_filters.utils import translate_validation
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import SearchFilter
+
+from tasks.models import Task
+from tasks.search import search_tasks
+
+
+class TaskFilter(filters.FilterSet):
+    """Filtering of tasks by the status label."""
+
+    status = filters.TypedChoiceFilter(
+        choices=[(label, label) for label in Task.Status.labels],
+        coerce=Task.Status.from_label)
+
+    class Meta:
+        model = Task
+        fields = ('status',)
+
+
+def filter_status_contains(queryset, value):
+    """Filter tasks by a part of the status label, ignoring the case."""
+    if value:
+        value = value.lower()
+        queryset = queryset.filter(status__in=[
+            task_status for task_status in Task.Status
+            if value in task_status.label.lower()
+        ])
+    return queryset
+
+
+class TaskSearchFilter(SearchFilter):
+    """Ranked full-text search of tasks, see tasks.search."""
+
+    search_description = (
+        'Words to find in the title or description, best matches first.')
+    # Shorter queries cannot use the indexes.
+    min_length = 3
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        if len(query) < self.min_length:
+            raise ValidationError({self.search_param: [
+                f'Ensure this value has at least {self.min_length} '
+                f'characters.'
+            ]})
+        return search_tasks(queryset, query)
+
+
+def filter_tasks(request, tasks, view=None):
+    """
+    Filter tasks as the list of all tasks does, by status and search.
+
+    Works for the archived tasks too, which the filter backends refuse.
+    """
+    filterset = TaskFilter(
+        request.query_params, queryset=tasks, request=request)
+    if not filterset.is_valid():
+        raise translate_validation(filterset.errors)
+    return TaskSearchFilter().filter_queryset(request, filterset.qs, view)
+
+
+def filter_my_tasks(request, tasks, view=None):
+    """Filter the tasks of the user as /tasks/my/ does."""
+    tasks = filter_status_contains(tasks, request.query_params.get('status'))
+    return TaskSearchFilter().filter_queryset(request, tasks, view)
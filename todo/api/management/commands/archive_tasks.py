@@ -0,0 +1,55 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from tasks.archive import archive_tasks
+
+
+class Command(BaseCommand):
+    help = (
+        'Move the completed tasks not changed for a while to the archive, '
+        'which the lists return with ?include_archived=1.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=90,
+            help='Archive the tasks completed more than this many days ago.')
+        parser.add_argument(
+            '--before',
+            help='Archive the tasks completed before this date and time, '
+                 'ISO 8601, instead of --days.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of tasks moved in one transaction.')
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Seconds to wait between batches, to spare the database.')
+
+    def get_cutoff(self, options):
+        if options['before'] is None:
+            return timezone.now() - timedelta(days=options['days'])
+        cutoff = parse_datetime(options['before'])
+        if cutoff is None:
+            raise CommandError(
+                f'--before {options["before"]} is not a date and time.')
+        if timezone.is_naive(cutoff):
+            cutoff = timezone.make_aware(cutoff)
+        return cutoff
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        cutoff = self.get_cutoff(options)
+        archived = 0
+        for tasks in archive_tasks(cutoff, options['batch_size']):
+            archived += len(tasks)
+            if options['verbosity'] >= 2:
+                self.stdout.write(f'{archived} tasks archived')
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {archived} tasks completed before '
+            f'{cutoff.isoformat()} in {time.monotonic() - start:.1f}s.'))
@@ -0,0 +1,220 @@
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from api.serializers import TaskSerializer
+from tasks.models import Task, User
+from tasks.signals import tasks_changed
+
+
+def quote_copy_text(value):
+    """Quote a text for COPY in CSV format, None unquoted as NULL."""
+    if value is None:
+        return ''
+    # A quoted empty string is an empty string, not NULL.
+    return '"{}"'.format(value.replace('"', '""'))
+
+
+class Command(BaseCommand):
+    help = (
+        'Import tasks from an NDJSON or CSV file. Every row has a title, '
+        'optional description and status, and the username of the author.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='File to import, "-" to read standard input.')
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'),
+            help='Format of the rows, by default taken from the extension.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of rows inserted in one transaction.')
+        parser.add_argument(
+            '--username',
+            help='Author of the rows that have no username.')
+        parser.add_argument(
+            '--checkpoint',
+            help='File to save the progress to and to resume from.')
+        parser.add_argument(
+            '--no-copy', action='store_false', dest='copy',
+            help='Do not use COPY on PostgreSQL.')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise CommandError('Only PostgreSQL and SQLite are supported.')
+        self.verbosity = options['verbosity']
+        self.batch_size = options['batch_size']
+        self.default_username = options['username']
+        self.use_copy = options['copy'] and connection.vendor == 'postgresql'
+        self.users = {}
+        # One serializer validates all rows, as ListSerializer does with
+        # its child, instead of building the fields again for every row.
+        self.serializer = TaskSerializer()
+        checkpoint = options['checkpoint']
+        skip = self.read_checkpoint(checkpoint)
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'ndjson')
+        if path == '-':
+            self.import_file(sys.stdin, file_format, skip, checkpoint)
+        else:
+            with open(path, encoding='utf-8', newline='') as file:
+                self.import_file(file, file_format, skip, checkpoint)
+
+    def read_checkpoint(self, checkpoint):
+        """Return the number of rows imported by the previous runs."""
+        if not checkpoint or not os.path.exists(checkpoint):
+            return 0
+        with open(checkpoint, encoding='utf-8') as file:
+            return json.load(file)['rows']
+
+    def write_checkpoint(self, checkpoint, rows):
+        if not checkpoint:
+            return
+        with open(f'{checkpoint}.tmp', 'w', encoding='utf-8') as file:
+            json.dump({'rows': rows}, file)
+        os.replace(f'{checkpoint}.tmp', checkpoint)
+
+    def read_rows(self, file, file_format):
+        """Yield the rows of the file as dicts."""
+        if file_format == 'csv':
+            for row in csv.DictReader(file):
+                # Empty cells mean the value is not given.
+                yield {key: value for key, value in row.items() if value}
+            return
+        for line in file:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+
+    def import_file(self, file, file_format, skip, checkpoint):
+        start = time.monotonic()
+        self.imported = self.skipped = 0
+        number = 0
+        batch = []
+        for number, row in enumerate(self.read_rows(file, file_format), 1):
+            if number <= skip:
+                continue
+            batch.append((number, row))
+            if len(batch) == self.batch_size:
+                self.import_batch(batch)
+                self.write_checkpoint(checkpoint, number)
+                self.report_progress(start)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+        self.write_checkpoint(checkpoint, max(number, skip))
+        seconds = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {self.imported} tasks, skipped {self.skipped} rows '
+            f'in {seconds:.1f}s ({self.imported / (seconds or 1):.0f} '
+            f'rows/s).'))
+
+    def report_progress(self, start):
+        if self.verbosity >= 2:
+            seconds = time.monotonic() - start
+            self.stdout.write(
+                f'{self.imported} tasks imported, '
+                f'{self.imported / (seconds or 1):.0f} rows/s')
+
+    def resolve_users(self, usernames):
+        """Load the users that are not in the cache yet."""
+        missing = set(usernames) - set(self.users)
+        if missing:
+            self.users.update(
+                User.objects.filter(username__in=missing)
+                .values_list('username', 'id'))
+            # Remember the unknown names too, to look them up only once.
+            self.users.update(
+                (username, None) for username in missing - set(self.users))
+
+    def import_batch(self, batch):
+        rows = []
+        for number, row in batch:
+            if not isinstance(row, dict):
+                self.skip_row(number, 'Not an object.')
+                continue
+            row.setdefault('username', self.default_username)
+            username = row['username']
+            if username is not None and not isinstance(username, str):
+                self.skip_row(number, {'username': ['Not a valid string.']})
+                continue
+            rows.append((number, row))
+        self.resolve_users(row['username'] for _, row in rows)
+        tasks = []
+        for number, row in rows:
+            user_id = self.users.get(row['username'])
+            if user_id is None:
+                self.skip_row(number, {'username': ['User not found.']})
+                continue
+            try:
+                attrs = self.serializer.run_validation(row)
+            except ValidationError as error:
+                self.skip_row(number, error.detail)
+                continue
+            tasks.append(Task(user_id_id=user_id, **attrs))
+        if not tasks:
+            return
+        with transaction.atomic():
+            tasks = self.insert(tasks)
+            tasks_changed.send(sender=Task, tasks=tasks, action='create')
+        self.imported += len(tasks)
+
+    def skip_row(self, number, errors):
+        self.skipped += 1
+        self.stderr.write(f'Row {number} skipped: {errors}')
+
+    def insert(self, tasks):
+        """Insert the tasks and return them with their ids."""
+        if self.use_copy:
+            return self.copy(tasks)
+        Task.objects.bulk_create(tasks)
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # SQLite holds the write lock of the database until the commit,
+            # so the last ids of the table are the ones just inserted.
+            pks = Task.objects.order_by('-pk').values_list(
+                'pk', flat=True)[:len(tasks)]
+            for task, pk in zip(tasks, sorted(pks)):
+                task.pk = pk
+        return tasks
+
+    def copy(self, tasks):
+        """Insert the tasks with PostgreSQL COPY through a staging table."""
+        now = timezone.now()
+        buffer = io.StringIO(self.copy_rows(tasks))
+        columns = 'title, description, status, user_id_id'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE import_tasks '
+                '(title varchar(200), description text, status smallint, '
+                'user_id_id bigint) ON COMMIT DROP')
+            cursor.copy_expert(
+                f'COPY import_tasks ({columns}) FROM STDIN WITH (FORMAT csv)',
+                buffer)
+            cursor.execute(
+                f'INSERT INTO tasks_task ({columns}, created, updated) '
+                f'SELECT {columns}, %s, %s FROM import_tasks '
+                f'RETURNING id, user_id_id, status', [now, now])
+            return [
+                Task(pk=pk, user_id_id=user_id, status=status)
+                for pk, user_id, status in cursor.fetchall()
+            ]
+
+    def copy_rows(self, tasks):
+        """Return the rows of the tasks for COPY in CSV format."""
+        return ''.join(
+            f'{quote_copy_text(task.title)},'
+            f'{quote_copy_text(task.description)},'
+            f'{task.status},{task.user_id_id}\n'
+            for task in tasks)
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.models import User
+from tasks.stats import count_tasks
+
+
+class Command(BaseCommand):
+    help = (
+        'Count the tasks of the users again and save the counts returned '
+        'by /api/tasks/stats/.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames', nargs='*',
+            help='Users to count the tasks of, by default all users.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of users counted in one transaction.')
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        users = User.objects.order_by('pk')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+        counted = last_pk = 0
+        while True:
+            user_ids = list(
+                users.filter(pk__gt=last_pk).values_list('pk', flat=True)
+                [:options['batch_size']])
+            if not user_ids:
+                break
+            count_tasks(user_ids)
+            counted += len(user_ids)
+            last_pk = user_ids[-1]
+            if options['verbosity'] >= 2:
+                self.stdout.write(f'{counted} users counted')
+        self.stdout.write(self.style.SUCCESS(
+            f'Counted the tasks of {counted} users in '
+            f'{time.monotonic() - start:.1f}s.'))
@@ -0,0 +1,64 @@
+"""
+Metrics of the requests in the Prometheus text format, at /api/metrics/.
+
+They are filled by api.timing.TimingMiddleware. With PROMETHEUS_MULTIPROC_DIR
+set, as gunicorn.conf.py does, the workers write their metrics to files in
+that directory and a scrape of any worker sees the metrics of all of them.
+Durations are in seconds and sizes in bytes, as Prometheus names them.
+"""
+import os
+
+from prometheus_client import (CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+registry = CollectorRegistry()
+
+requests_total = Counter(
+    'todo_requests', 'Requests by view, method and status.',
+    ('view', 'method', 'status'), registry=registry)
+request_duration = Histogram(
+    'todo_request_duration_seconds', 'Duration of the requests.',
+    ('view',), buckets=DURATION_BUCKETS, registry=registry)
+response_size = Histogram(
+    'todo_response_size_bytes', 'Size of the responses, but streamed ones.',
+    ('view',), buckets=SIZE_BUCKETS, registry=registry)
+phase_duration = Histogram(
+    'todo_request_phase_seconds',
+    'Duration of the phases of the sampled requests.',
+    ('view', 'phase'), buckets=DURATION_BUCKETS, registry=registry)
+request_queries = Histogram(
+    'todo_request_queries', 'Queries of the sampled requests.',
+    ('view',), buckets=QUERY_BUCKETS, registry=registry)
+task_list_cache_hits = Counter(
+    'todo_task_list_cache_hits', 'Task lists read from the cache.',
+    registry=registry)
+task_list_cache_misses = Counter(
+    'todo_task_list_cache_misses', 'Task lists not in the cache.',
+    registry=registry)
+
+
+def observe_request(view, method, status, duration, size=None):
+    requests_total.labels(view, method, status).inc()
+    request_duration.labels(view).observe(duration)
+    if size is not None:
+        response_size.labels(view).observe(size)
+
+
+def observe_phases(view, durations, queries):
+    for name, duration in durations.items():
+        phase_duration.labels(view, name).observe(duration)
+    request_queries.labels(view).observe(queries)
+
+
+def render():
+    """Return the metrics of every worker, or of this process."""
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return generate_latest(registry)
+    workers = CollectorRegistry()
+    multiprocess.MultiProcessCollector(workers)
+    return generate_latest(workers)
@@ -0,0 +1,37 @@
+from collections import OrderedDict
+
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+from tasks.pagination import estimate_count
+
+
+class TaskCursorPagination(CursorPagination):
+    """
+    Keyset pagination for tasks.
+
+    Pages are taken by the position in the default task ordering, so the
+    cost of a page does not depend on how deep it is. No exact count is
+    made; pass ?count=estimate to get the planner's estimate instead.
+    """
+
+    ordering = ('-created', '-id')
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.estimated_count = None
+        if request.query_params.get(self.count_query_param) == 'estimate':
+            self.estimated_count = estimate_count(queryset)
+            self.include_count = True
+        else:
+            self.include_count = False
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        page = OrderedDict()
+        if self.include_count:
+            page['count'] = self.estimated_count
+        page['next'] = self.get_next_link()
+        page['previous'] = self.get_previous_link()
+        page['results'] = data
+        return Response(page)
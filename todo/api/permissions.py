@@ -11,4 +11,4 @@ class IsAuthorOrReadOnly(BasePermission):
 
     def has_object_permission(self, request, view, obj):
         return (request.method in SAFE_METHODS
-                or obj.user_id == request.user)
+                or obj.user_id_id == request.user.id)
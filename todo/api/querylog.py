@@ -0,0 +1,247 @@
+"""
+Log of slow and repeated queries, for development and staging.
+
+On when QUERY_LOG is set. Queries slower than QUERY_LOG_SLOW_MS, and
+queries of the same shape made QUERY_LOG_REPEATED times or more by one
+request, an N+1, are logged with the line that made them. A report per
+endpoint is logged when the process exits.
+
+In tests, assert_no_repeated_queries() fails a block making an N+1:
+
+    with assert_no_repeated_queries():
+        self.client.get('/api/tasks/')
+"""
+import atexit
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+current_queries = ContextVar('current_queries', default=None)
+
+# Values written in the SQL, and lists of parameters of any length.
+VALUES_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+PARAMETERS_RE = re.compile(r'%s(?:, %s)+')
+
+# Frames of these files run queries without deciding to make them.
+IGNORED_FILES = (
+    __file__, '/django/db/', '/asgiref/', '/contextlib.py',
+    '/api/connections.py', '/api/timing.py')
+# Files of libraries, and the project files which only serve requests.
+LIBRARY_FILES = ('/site-packages/', '/lib/python')
+SERVING_FILES = ('manage.py', 'wsgi.py', 'asgi.py')
+
+_lock = threading.Lock()
+_report = {}
+
+
+def get_shape(sql):
+    """The SQL of a query with its values left out."""
+    return PARAMETERS_RE.sub('%s, ...', VALUES_RE.sub('?', sql))
+
+
+def get_origin():
+    """
+    The line of the project that made the current query, or the innermost
+    line of a library when the project did not make it, as in djoser.
+    """
+    base = Path(settings.BASE_DIR)
+    origin = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        line = f'{frame.f_lineno} in {frame.f_code.co_name}'
+        if any(part in filename for part in IGNORED_FILES):
+            pass
+        elif any(part in filename for part in LIBRARY_FILES):
+            if origin is None:
+                origin = f'{filename.split("/site-packages/")[-1]}:{line}'
+        elif (filename.startswith(str(base))
+                and Path(filename).name not in SERVING_FILES):
+            return f'{Path(filename).relative_to(base)}:{line}'
+        frame = frame.f_back
+    return origin or 'unknown'
+
+
+def get_endpoint(request):
+    """The method and view of a request, with the action of a viewset."""
+    if request is None:
+        return '-'
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return f'{request.method} unmatched'
+    endpoint = f'{request.method} {match.view_name}'
+    action = getattr(match.func, 'actions', {}).get(request.method.lower())
+    return f'{endpoint} ({action})' if action else endpoint
+
+
+class RequestQueries:
+    """The queries of a request, or of a block of a test."""
+
+    def __init__(self, request=None):
+        self.request = request
+        self.count = 0
+        self.duration = 0
+        self.slow = 0
+        self.shapes = Counter()
+        self.origins = {}
+
+    @property
+    def endpoint(self):
+        # The view is known once the URL is resolved.
+        return get_endpoint(self.request)
+
+    def add(self, sql, duration):
+        shape = get_shape(sql)
+        self.count += 1
+        self.duration += duration
+        self.shapes[shape] += 1
+        if shape not in self.origins:
+            self.origins[shape] = get_origin()
+
+    def repeated(self, threshold=None):
+        """Return the shapes made threshold times or more, with counts."""
+        threshold = threshold or settings.QUERY_LOG_REPEATED
+        return [
+            (shape, count, self.origins[shape])
+            for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+
+def log_query(execute, sql, params, many, context):
+    """An execute wrapper adding a query to the queries of its request."""
+    queries = current_queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        queries.add(sql, duration)
+        if duration * 1000 >= settings.QUERY_LOG_SLOW_MS:
+            queries.slow += 1
+            logger.warning(
+                'Slow query, %.1f ms, %s, %s: %s %r',
+                duration * 1000, queries.endpoint,
+                queries.origins[get_shape(sql)], sql, params)
+
+
+def install_query_log(sender=None, connection=None, **kwargs):
+    """Record the queries of a connection, a connection_created receiver."""
+    if log_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(log_query)
+
+
+@contextmanager
+def record_queries(queries):
+    """Record the queries of the block, of every thread, in queries."""
+    connection_created.connect(install_query_log)
+    for connection in connections.all():
+        install_query_log(connection=connection)
+    token = current_queries.set(queries)
+    try:
+        yield queries
+    finally:
+        current_queries.reset(token)
+
+
+def format_repeated(repeated, endpoint):
+    return '\n'.join(
+        [f'Repeated queries, an N+1, {endpoint}:'] + [
+            f'  {count} times, {origin}: {shape}'
+            for shape, count, origin in repeated
+        ])
+
+
+@contextmanager
+def assert_no_repeated_queries(threshold=None):
+    """Fail when the block makes the same query threshold times or more."""
+    with record_queries(RequestQueries()) as queries:
+        yield queries
+    repeated = queries.repeated(threshold)
+    if repeated:
+        raise AssertionError(format_repeated(repeated, 'in the block'))
+
+
+def add_to_report(queries, repeated):
+    with _lock:
+        stats = _report.setdefault(queries.endpoint, Counter())
+        stats['requests'] += 1
+        stats['queries'] += queries.count
+        stats['max_queries'] = max(stats['max_queries'], queries.count)
+        stats['duration'] += queries.duration
+        stats['slow'] += queries.slow
+        stats['repeated'] += bool(repeated)
+
+
+def format_report():
+    """Return the report of the queries by endpoint, busiest first."""
+    lines = [
+        f'{"endpoint":<48} {"requests":>8} {"queries":>8} {"max":>5} '
+        f'{"db ms":>8} {"slow":>5} {"N+1":>5}']
+    with _lock:
+        report = sorted(
+            _report.items(), key=lambda item: -item[1]['duration'])
+        for endpoint, stats in report:
+            requests = stats['requests']
+            lines.append(
+                f'{endpoint:<48} {requests:>8} '
+                f'{stats["queries"] / requests:>8.1f} '
+                f'{stats["max_queries"]:>5} '
+                f'{stats["duration"] * 1000 / requests:>8.2f} '
+                f'{stats["slow"]:>5} {stats["repeated"]:>5}')
+    return '\n'.join(lines)
+
+
+def log_report():
+    if _report:
+        logger.info('Queries by endpoint, per request:\n%s', format_report())
+
+
+class QueryLogMiddleware:
+    """Log slow and repeated queries, see the module docstring."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        atexit.unregister(log_report)
+        atexit.register(log_report)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with record_queries(RequestQueries(request)) as queries:
+            response = self.get_response(request)
+        self.finish(queries)
+        return response
+
+    async def __acall__(self, request):
+        with record_queries(RequestQueries(request)) as queries:
+            response = await self.get_response(request)
+        self.finish(queries)
+        return response
+
+    def finish(self, queries):
+        repeated = queries.repeated()
+        if repeated:
+            logger.warning(format_repeated(repeated, queries.endpoint))
+        add_to_report(queries, repeated)
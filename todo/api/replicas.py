@@ -0,0 +1,190 @@
+"""
+Reads of the safe requests from read replicas of the database.
+
+ReplicaRouter sends the reads of a GET, HEAD or OPTIONS request to one of
+DATABASE_REPLICAS in time, everything else to the primary. A user is
+pinned to the primary for DATABASE_REPLICA_PIN_SECONDS after a request
+that may have written, to see their own writes.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.functional import LazyObject, empty
+from rest_framework.permissions import SAFE_METHODS
+
+# How far behind the primary a PostgreSQL replica is, in seconds, given
+# the current WAL position of the primary. A replica that replayed it is
+# not behind, however old its last transaction is.
+POSTGRESQL_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_replay_lsn() >= %s::pg_lsn THEN 0
+    ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+END
+"""
+
+PIN_COOKIE = 'replica_pin'
+
+current_reads = ContextVar('current_reads', default=None)
+# Last lag of every replica and when it was checked.
+lags = {}
+
+
+def measure_lag(connection):
+    """Return the lag of a replica in seconds, infinite without answer."""
+    # SQLite has no replication, its copies are never behind.
+    if connection.vendor != 'postgresql':
+        return 0.0
+    try:
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute('SELECT pg_current_wal_lsn()')
+            position = cursor.fetchone()[0]
+        with connection.cursor() as cursor:
+            cursor.execute(POSTGRESQL_LAG_SQL, [position])
+            lag = cursor.fetchone()[0]
+    except DatabaseError:
+        return float('inf')
+    # No transaction replayed yet.
+    return float('inf') if lag is None else float(lag)
+
+
+def get_lag(alias):
+    """Return the lag of a replica, checked again when it is old."""
+    now = time.monotonic()
+    checked, lag = lags.get(alias, (None, None))
+    if (checked is None
+            or now - checked >= settings.DATABASE_REPLICA_LAG_CHECK_SECONDS):
+        lag = measure_lag(connections[alias])
+        lags[alias] = (now, lag)
+    return lag
+
+
+def pin_key(user_id):
+    return f'replicas:pinned:{user_id}'
+
+
+def pin(response, user_id):
+    """Read the data of the user from the primary for a while."""
+    cache.set(
+        pin_key(user_id), True,
+        timeout=settings.DATABASE_REPLICA_PIN_SECONDS)
+    # Also in a cookie, which the next request carries to any worker.
+    response.set_signed_cookie(
+        PIN_COOKIE, str(user_id), salt=PIN_COOKIE,
+        max_age=settings.DATABASE_REPLICA_PIN_SECONDS, httponly=True,
+        samesite='Lax')
+
+
+def is_pinned(request, user_id):
+    if cache.get(pin_key(user_id)):
+        return True
+    pinned = request.get_signed_cookie(
+        PIN_COOKIE, None, salt=PIN_COOKIE,
+        max_age=settings.DATABASE_REPLICA_PIN_SECONDS)
+    return pinned == str(user_id)
+
+
+def get_user_id(request):
+    """Return the id of the user, None if anonymous, empty if unknown."""
+    user = getattr(request, 'user', None)
+    # The lazy user of a session is loaded by a query, which must not be
+    # routed by loading it.
+    if user is None or isinstance(user, LazyObject) and user._wrapped is empty:
+        return empty
+    return user.id if user.is_authenticated else None
+
+
+class Reads:
+    """Where the reads of a request go, decided once the user is known."""
+
+    def __init__(self, request):
+        self.request = request
+        self.safe = request.method in SAFE_METHODS
+        self.user_id = empty
+        self.database = DEFAULT_DB_ALIAS
+
+    def get_database(self):
+        if (not self.safe
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        user_id = get_user_id(self.request)
+        if user_id is empty:
+            return DEFAULT_DB_ALIAS
+        if user_id != self.user_id:
+            self.user_id = user_id
+            self.database = self.choose_database()
+        return self.database
+
+    def choose_database(self):
+        if self.user_id is not None and is_pinned(
+                self.request, self.user_id):
+            return DEFAULT_DB_ALIAS
+        replicas = [
+            alias for alias in settings.DATABASE_REPLICAS
+            if get_lag(alias) <= settings.DATABASE_REPLICA_MAX_LAG]
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+
+def get_read_database():
+    """Return the database the reads of the current request go to."""
+    reads = current_reads.get()
+    return DEFAULT_DB_ALIAS if reads is None else reads.get_database()
+
+
+class ReplicaRouter:
+    """Route the reads of safe requests to replicas."""
+
+    def db_for_read(self, model, **hints):
+        return get_read_database()
+
+    def db_for_write(self, model, **hints):
+        # Also for the instances read from a replica.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        return {obj1._state.db, obj2._state.db} <= databases
+
+
+class ReplicaMiddleware:
+    """Route the reads of the request, pin its user after a write."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = current_reads.set(Reads(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            current_reads.reset(token)
+        self.finish(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = current_reads.set(Reads(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_reads.reset(token)
+        self.finish(request, response)
+        return response
+
+    def finish(self, request, response):
+        if request.method not in SAFE_METHODS:
+            user_id = get_user_id(request)
+            if user_id not in (None, empty):
+                pin(response, user_id)
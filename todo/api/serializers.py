@@ -1,7 +1,12 @@
+from functools import lru_cache
+from operator import itemgetter
+
 from djoser.serializers import UserSerializer
+from drf_yasg import openapi
 from rest_framework import serializers
 
 from tasks.models import Task, User
+from .timing import phase
 
 
 class CustomUserSerializer(UserSerializer):
@@ -12,10 +17,97 @@ class CustomUserSerializer(UserSerializer):
         fields = ('id', 'username', 'first_name', 'last_name')
 
 
+class StatusField(serializers.ChoiceField):
+    """Task status, stored as a small integer and exposed by its label."""
+
+    class Meta:
+        swagger_schema_fields = {'type': openapi.TYPE_STRING}
+
+    def __init__(self, **kwargs):
+        super().__init__(choices=Task.Status.labels, **kwargs)
+
+    def to_internal_value(self, data):
+        return Task.Status.from_label(super().to_internal_value(data))
+
+    def to_representation(self, value):
+        if value in self.choices:
+            # Already a label, e.g. the choices rendered by the API schema.
+            return value
+        return Task.Status(value).label
+
+
+class TaskListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with phase('serialize'):
+            return super().data
+
+
 class TaskSerializer(serializers.ModelSerializer):
-    """Serialization for tasks."""
+    """Serialization for tasks, of all fields or of the given ones."""
+
+    status = StatusField(required=False)
 
     class Meta:
         model = Task
         fields = ('id', 'title', 'description', 'status', 'user_id')
         read_only_fields = ('user_id',)
+        list_serializer_class = TaskListSerializer
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                del self.fields[name]
+
+    @property
+    def data(self):
+        with phase('serialize'):
+            return super().data
+
+
+def get_task_fields(request):
+    """
+    Return the fields of TaskSerializer listed by ?fields= of the request,
+    in the order of the serializer. All fields when there are none.
+    """
+    fields = TaskSerializer.Meta.fields
+    value = request.query_params.get('fields')
+    names = {name.strip() for name in (value or '').split(',')} - {''}
+    if not names:
+        return fields
+    unknown = names - set(fields)
+    if unknown:
+        raise serializers.ValidationError({'fields': [
+            f'Unknown fields: {", ".join(sorted(unknown))}. Expected some '
+            f'of {", ".join(fields)}.'
+        ]})
+    return tuple(field for field in fields if field in names)
+
+
+# How get_task_row_encoder() writes the value of a field, the columns that
+# are not here are written as they are read.
+ROW_CONVERTERS = {'status': dict(Task.Status.choices).__getitem__}
+
+
+@lru_cache(maxsize=None)
+def get_task_row_encoder(fields=TaskSerializer.Meta.fields):
+    """Return a function writing a values() row as TaskSerializer does."""
+    fields = tuple(fields)
+    get_values = itemgetter(*fields)
+    if len(fields) == 1:
+        # itemgetter of one item returns the value, not a tuple.
+        get_value = get_values
+
+        def get_values(row):
+            return (get_value(row),)
+    converters = [
+        (field, ROW_CONVERTERS[field])
+        for field in fields if field in ROW_CONVERTERS]
+
+    def encode(row):
+        data = dict(zip(fields, get_values(row)))
+        for field, convert in converters:
+            data[field] = convert(data[field])
+        return data
+    return encode
@@ -0,0 +1,79 @@
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from tasks.models import Task, User
+from tasks.signals import is_bulk_delete, tasks_archived, tasks_changed
+from .authentication import token_revocations, user_cache
+from .cache import task_list_cache
+from .connections import close_unusable_connections, install_use_tracker
+from .events import publish_task_events
+
+
+@receiver(request_started)
+def check_connections(sender, **kwargs):
+    """Replace the kept database connections that no longer answer."""
+    close_unusable_connections()
+
+
+connection_created.connect(install_use_tracker)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_list(sender, instance, **kwargs):
+    """Drop the cached lists that contain the changed task."""
+    if is_bulk_delete():
+        return
+    task_list_cache.invalidate([instance.user_id_id])
+
+
+@receiver(tasks_changed, sender=Task)
+@receiver(tasks_archived, sender=Task)
+def invalidate_task_lists(sender, tasks, **kwargs):
+    """Drop the cached lists that contain tasks changed in bulk."""
+    task_list_cache.invalidate(task.user_id_id for task in tasks)
+
+
+@receiver(post_save, sender=Task)
+def publish_task_save(sender, instance, created, **kwargs):
+    """Push the saved task to the event streams of its owner."""
+    publish_task_events([instance], 'create' if created else 'update')
+
+
+@receiver(post_delete, sender=Task)
+def publish_task_delete(sender, instance, **kwargs):
+    if is_bulk_delete():
+        return
+    publish_task_events([instance], 'delete')
+
+
+@receiver(tasks_changed, sender=Task)
+def publish_tasks_change(sender, tasks, action, **kwargs):
+    """Push the tasks written in bulk to the event streams."""
+    publish_task_events(tasks, action)
+
+
+@receiver(tasks_archived, sender=Task)
+def publish_tasks_archive(sender, tasks, **kwargs):
+    publish_task_events(tasks, 'delete')
+
+
+@receiver(post_save, sender=User)
+def revoke_user_tokens(sender, instance, created, **kwargs):
+    """Refuse the tokens of a deactivated user or older than the password."""
+    user_cache.delete(instance.pk)
+    # _password is set until the end of save() when the password changed.
+    # The tokens of a deactivated user stay refused after activation.
+    if not created and (
+            not instance.is_active or instance._password is not None):
+        token_revocations.revoke(instance)
+    else:
+        token_revocations.forget(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    user_cache.delete(instance.pk)
+    token_revocations.forget(instance.pk)
@@ -0,0 +1,129 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import AsyncClient, TransactionTestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from tasks.models import Task, User
+from todo.asgi import application
+
+
+class AsyncViewsTest(TransactionTestCase):
+    # The async views query the database from threads of their own, which
+    # do not see the data of a test run in a transaction. They may read
+    # from the replicas, mirrors of the test database.
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        self.user2 = User.objects.create_user(
+            username='auth2', first_name='auth2', password='321qazxsw'
+        )
+        self.task = Task.objects.create(title='Title test task', user_id=self.user)
+        self.task2 = Task.objects.create(
+            title='Title test task2', status=Task.Status.COMPLETED, user_id=self.user)
+        self.task3 = Task.objects.create(title='Title test task3', user_id=self.user2)
+        self.token = RefreshToken.for_user(self.user).access_token
+        self.sync_client = APIClient()
+        self.sync_client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def request(self, method, url, **headers):
+        """Send an async request with the token of the user."""
+        # AsyncClient of Django 3.2 takes the names of the headers as they
+        # are sent, not the META keys.
+        headers.setdefault('authorization', f'Bearer {self.token}')
+        return getattr(AsyncClient(), method)(url, **headers)
+
+    async def test_same_responses_as_sync_views(self):
+        """Async endpoints return the same data as the endpoints of TaskViewSet."""
+        urls = ('tasks/', 'tasks/?status=New', 'tasks/?page=2',
+                'tasks/?pagination=cursor', 'tasks/my/', 'tasks/my/?status=comp',
+                f'tasks/{self.task.id}/', 'tasks/?fields=id,title',
+                'tasks/my/?fields=status', f'tasks/{self.task.id}/?fields=title',
+                'tasks/?fields=unknown', 'tasks/?include_archived=1',
+                'tasks/my/?include_archived=1',
+                f'tasks/{self.task.id}/?include_archived=1')
+        for url in urls:
+            with self.subTest(url=url):
+                response = await self.request('get', f'/api/async/{url}')
+                expected = await sync_to_async(self.sync_client.get)(f'/api/{url}')
+                self.assertEqual(response.status_code, expected.status_code)
+                data, expected = response.json(), expected.json()
+                # Links of the pages point to the endpoint of the request.
+                for key in ('next', 'previous'):
+                    if key in expected:
+                        self.assertEqual(
+                            data.pop(key) is None, expected.pop(key) is None)
+                self.assertEqual(data, expected)
+
+    async def test_my_tasks(self):
+        """GET request /api/async/tasks/my/ returns only the user tasks."""
+        response = await self.request('get', '/api/async/tasks/my/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {task['id'] for task in response.json()['results']},
+            {self.task.id, self.task2.id})
+
+    async def test_task_not_modified(self):
+        """GET request /api/async/tasks/{id}/ with the current ETag returns 304."""
+        url = f'/api/async/tasks/{self.task.id}/'
+        etag = (await self.request('get', url))['ETag']
+        response = await self.request(
+            'get', url, **{'if-none-match': etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = await self.request('get', '/api/async/tasks/0/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_completed(self):
+        """PATCH request /api/async/tasks/{id}/completed/ completes the user task once."""
+        url = f'/api/async/tasks/{self.task.id}/completed/'
+        response = await self.request('patch', url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['status'], 'Completed')
+        task = await sync_to_async(Task.objects.get)(pk=self.task.id)
+        self.assertEqual(task.status, Task.Status.COMPLETED)
+        response = await self.request('patch', url)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        response = await self.request(
+            'patch', f'/api/async/tasks/{self.task3.id}/completed/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_unauthorized(self):
+        """Requests without a valid token return 401."""
+        for headers in ({}, {'authorization': 'Bearer wrong'}):
+            with self.subTest(headers=headers):
+                response = await AsyncClient().get('/api/async/tasks/', **headers)
+                self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+                self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+
+    async def test_method_not_allowed(self):
+        """Methods other than the one of the endpoint return 405."""
+        response = await self.request('post', '/api/async/tasks/')
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        response = await self.request(
+            'get', f'/api/async/tasks/{self.task.id}/completed/')
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_export_over_asgi(self):
+        """The export streams through the ASGI application of the project."""
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            sent.append(message)
+
+        await application({
+            'type': 'http', 'method': 'GET', 'path': '/api/tasks/export/',
+            'query_string': b'type=csv', 'server': ('testserver', 80),
+            'headers': [(b'authorization', f'Bearer {self.token}'.encode())],
+        }, receive, send)
+        self.assertEqual(sent[0]['status'], status.HTTP_200_OK)
+        lines = b''.join(message.get('body', b'') for message in sent[1:])
+        self.assertEqual(len(lines.splitlines()), 3)
+        self.assertFalse(sent[-1].get('more_body'))
@@ -0,0 +1,101 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.authentication import UserCache, user_cache
+from tasks.models import Task, User
+
+
+class AuthenticationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        cls.task = Task.objects.create(title='Title test task', user_id=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.authorized_client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.authorized_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_task_endpoints_do_not_load_user(self):
+        """Task endpoints take the user from the token without a query."""
+        url = f'/api/tasks/{self.task.id}/'
+        # The revocation of the tokens of the user is read once.
+        self.authorized_client.get(url)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authorized_client.get(url).status_code, status.HTTP_200_OK)
+        response = self.authorized_client.post('/api/tasks/', {'title': 'Test Task'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Task.objects.get(pk=response.json()['id']).user_id, self.user)
+
+    def test_user_is_cached(self):
+        """Other endpoints load the user once and see the changes of the user."""
+        self.authorized_client.get('/api/auth/users/me/')
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get('/api/auth/users/me/')
+        self.assertEqual(response.json()['first_name'], 'auth')
+        self.authorized_client.patch('/api/auth/users/me/', {'first_name': 'Changed'})
+        response = self.authorized_client.get('/api/auth/users/me/')
+        self.assertEqual(response.json()['first_name'], 'Changed')
+
+    def test_inactive_user_is_refused(self):
+        """Tokens of a deactivated user are refused, also after activation."""
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+        for url in ('/api/tasks/', '/api/auth/users/me/'):
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        user.is_active = True
+        user.save()
+        response = self.authorized_client.get('/api/tasks/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocation_outlives_cache(self):
+        """Revoked tokens stay refused when the cache loses the revocation."""
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+        self.assertEqual(self.authorized_client.get('/api/tasks/').status_code, status.HTTP_401_UNAUTHORIZED)
+        cache.clear()
+        self.assertEqual(self.authorized_client.get('/api/tasks/').status_code, status.HTTP_401_UNAUTHORIZED)
+        User.objects.filter(pk=user.pk).update(is_active=True)
+        cache.clear()
+        self.assertEqual(self.authorized_client.get('/api/tasks/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_revokes_tokens(self):
+        """Tokens issued before the password was changed are refused."""
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new_password321')
+        user.save()
+        response = self.authorized_client.get('/api/tasks/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        # Tokens are timed to the second, so take a token of the next one.
+        token = RefreshToken.for_user(user).access_token
+        token['exp'] += 1
+        response = self.client.get('/api/tasks/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deleted_user_is_refused(self):
+        """Tokens of a deleted user are refused."""
+        user = User.objects.create_user(username='deleted', first_name='deleted')
+        token = RefreshToken.for_user(user).access_token
+        user.delete()
+        response = self.client.get('/api/tasks/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_USER_CACHE_SIZE=2)
+    def test_user_cache_is_bounded(self):
+        """The least recently used user is dropped from a full cache."""
+        users = UserCache()
+        for user_id in (1, 2, 1, 3):
+            users.get(user_id, lambda: User(pk=user_id))
+        self.assertEqual(list(users._users), [1, 3])
@@ -0,0 +1,146 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.authentication import TimedJWTAuthentication
+from tasks.models import Task, User
+
+BATCH_URL = '/api/batch/'
+
+
+class BatchViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        cls.user2 = User.objects.create_user(
+            username='auth2', first_name='auth2', password='321qazxsw'
+        )
+        cls.task = Task.objects.create(title='Title test task', user_id=cls.user)
+        cls.task2 = Task.objects.create(title='Title test task2', user_id=cls.user)
+        cls.task3 = Task.objects.create(title='Title test task3', user_id=cls.user2)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.authorized_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def batch(self, items, **params):
+        url = BATCH_URL + ('?atomic=1' if params.get('atomic') else '')
+        return self.authorized_client.post(url, items, format='json')
+
+    def test_batch(self):
+        """Sub-requests are served in order, authenticated once."""
+        authenticate = TimedJWTAuthentication.authenticate
+        with mock.patch.object(
+                TimedJWTAuthentication, 'authenticate', autospec=True,
+                side_effect=authenticate) as authenticated:
+            response = self.batch([
+                {'method': 'GET', 'url': f'/api/tasks/{self.task.id}/'},
+                {'method': 'PATCH', 'url': f'/api/tasks/{self.task.id}/completed/'},
+                {'method': 'PATCH', 'url': f'/api/tasks/{self.task2.id}/',
+                 'body': {'title': 'Batch title'}},
+                {'method': 'GET', 'url': '/api/tasks/my/?status=Completed&fields=id'},
+                {'method': 'GET', 'url': '/api/tasks/0/'},
+            ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(authenticated.call_count, 1)
+        responses = response.json()
+        self.assertEqual(
+            [item['status'] for item in responses], [200, 200, 200, 200, 404])
+        self.assertEqual(responses[0]['body']['status'], 'New')
+        self.assertIn('ETag', responses[0]['headers'])
+        self.assertEqual(responses[1]['body']['status'], 'Completed')
+        self.assertEqual(responses[2]['body']['title'], 'Batch title')
+        self.assertEqual(
+            responses[3]['body']['results'], [{'id': self.task.id}])
+        self.task2.refresh_from_db()
+        self.assertEqual(self.task2.title, 'Batch title')
+
+    def test_headers(self):
+        """Sub-requests send their own headers, not the ones of the batch."""
+        etag = self.authorized_client.get(
+            f'/api/tasks/{self.task.id}/')['ETag']
+        response = self.batch([
+            {'method': 'GET', 'url': f'/api/tasks/{self.task.id}/',
+             'headers': {'If-None-Match': etag}},
+            {'method': 'GET', 'url': '/api/auth/users/me/'},
+        ])
+        first, second = response.json()
+        self.assertEqual(first['status'], 304)
+        self.assertIsNone(first['body'])
+        self.assertEqual(second['body']['username'], 'auth')
+
+    def test_failures(self):
+        """A failed sub-request does not stop the others."""
+        response = self.batch([
+            {'method': 'DELETE', 'url': f'/api/tasks/{self.task3.id}/'},
+            {'method': 'DELETE', 'url': f'/api/tasks/{self.task.id}/'},
+            {'method': 'GET', 'url': '/api/tasks/0/'},
+        ])
+        self.assertEqual(
+            [item['status'] for item in response.json()], [403, 204, 404])
+        self.assertFalse(Task.objects.filter(pk=self.task.pk).exists())
+
+    def test_atomic(self):
+        """With ?atomic=1 a failed sub-request rolls back the batch."""
+        response = self.batch([
+            {'method': 'DELETE', 'url': f'/api/tasks/{self.task.id}/'},
+            {'method': 'PATCH', 'url': f'/api/tasks/{self.task2.id}/',
+             'body': {'status': 'Unknown'}},
+            {'method': 'DELETE', 'url': f'/api/tasks/{self.task2.id}/'},
+        ], atomic=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [item['status'] for item in response.json()], [204, 400])
+        self.assertEqual(Task.objects.filter(user_id=self.user).count(), 2)
+        response = self.batch([
+            {'method': 'DELETE', 'url': f'/api/tasks/{self.task.id}/'},
+        ], atomic=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Task.objects.filter(user_id=self.user).count(), 1)
+
+    def test_invalid(self):
+        """Invalid sub-requests are reported and none is served."""
+        response = self.batch([
+            {'method': 'DELETE', 'url': f'/api/tasks/{self.task.id}/'},
+            {'method': 'GET', 'url': '/admin/'},
+            {'method': 'GET', 'url': '/api/unknown/'},
+            {'method': 'GET', 'url': BATCH_URL},
+            {'method': 'GET', 'url': '/api/async/tasks/'},
+            {'method': 'TRACE', 'url': '/api/tasks/'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertEqual(list(errors[1]), ['url'])
+        self.assertEqual(errors[2], {'url': ['Not found.']})
+        self.assertEqual(list(errors[3]), ['url'])
+        self.assertEqual(list(errors[4]), ['url'])
+        self.assertEqual(list(errors[5]), ['method'])
+        self.assertTrue(Task.objects.filter(pk=self.task.pk).exists())
+        self.assertEqual(self.batch({}).status_code, 400)
+        items = [{'method': 'GET', 'url': '/api/tasks/'}] * 51
+        self.assertEqual(self.batch(items).status_code, 400)
+
+    def test_streaming(self):
+        """Streaming responses are not buffered into the batch."""
+        response = self.batch([
+            {'method': 'GET', 'url': '/api/tasks/export/'},
+            {'method': 'GET', 'url': f'/api/tasks/{self.task.id}/'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        export, detail = response.json()
+        self.assertEqual(export['status'], 400)
+        self.assertEqual(detail['status'], 200)
+
+    def test_unauthorized(self):
+        """The batch is for authenticated users."""
+        response = APIClient().post(BATCH_URL, [], format='json')
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,93 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.cache import task_list_cache
+from tasks.models import Task, User
+
+
+class TaskListCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        cls.user2 = User.objects.create_user(
+            username='auth2', first_name='auth2', password='321qazxsw'
+        )
+        cls.task = Task.objects.create(title='Title test task', user_id=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.authorized_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.authorized_client2 = APIClient()
+        refresh2 = RefreshToken.for_user(self.user2)
+        self.authorized_client2.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh2.access_token}')
+
+    def test_repeated_request_is_cached(self):
+        """Second GET request /api/tasks/, /api/tasks/my/ is served from the cache."""
+        for url in ('/api/tasks/', '/api/tasks/my/', '/api/tasks/my/?status=New'):
+            with self.subTest(url=url):
+                stats = task_list_cache.stats()
+                first = self.authorized_client.get(url)
+                second = self.authorized_client.get(url)
+                self.assertEqual(first['X-Cache'], 'MISS')
+                self.assertEqual(second['X-Cache'], 'HIT')
+                self.assertEqual(first.json(), second.json())
+                self.assertEqual(task_list_cache.stats(), {
+                    'hits': stats['hits'] + 1, 'misses': stats['misses'] + 1})
+
+    def test_cache_is_per_user(self):
+        """Request /api/tasks/my/ of other user is not served from the cache."""
+        self.authorized_client.get('/api/tasks/my/')
+        response = self.authorized_client2.get('/api/tasks/my/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.json()['results']), 0)
+
+    def test_write_invalidates_lists(self):
+        """Changes of tasks drop the cached lists of the author."""
+        writes = {
+            'create': lambda: self.authorized_client.post(
+                '/api/tasks/', {'title': 'Test Task'}),
+            'update': lambda: self.authorized_client.patch(
+                f'/api/tasks/{self.task.id}/', {'title': 'Test Task'}),
+            'completed': lambda: self.authorized_client.patch(
+                f'/api/tasks/{self.task.id}/completed/'),
+            'bulk create': lambda: self.authorized_client.post(
+                '/api/tasks/bulk/', [{'title': 'Test Task'}], format='json'),
+            'bulk update': lambda: self.authorized_client.patch(
+                '/api/tasks/bulk/', [{'id': self.task.id, 'title': 'Bulk'}],
+                format='json'),
+            'delete': lambda: self.authorized_client.delete(
+                f'/api/tasks/{self.task.id}/'),
+        }
+        for name, write in writes.items():
+            with self.subTest(write=name):
+                self.authorized_client.get('/api/tasks/')
+                self.authorized_client.get('/api/tasks/my/')
+                self.assertLess(write().status_code, 300)
+                for url in ('/api/tasks/', '/api/tasks/my/'):
+                    response = self.authorized_client.get(url)
+                    self.assertEqual(response['X-Cache'], 'MISS')
+                    self.assertEqual(
+                        response.json()['count'],
+                        Task.objects.filter(user_id=self.user).count())
+
+    def test_write_of_other_user_keeps_my_list(self):
+        """Changes of other user drop /api/tasks/ but keep /api/tasks/my/."""
+        self.authorized_client.get('/api/tasks/')
+        self.authorized_client.get('/api/tasks/my/')
+        self.authorized_client2.post('/api/tasks/', {'title': 'Test Task'})
+        self.assertEqual(self.authorized_client.get('/api/tasks/')['X-Cache'], 'MISS')
+        self.assertEqual(self.authorized_client.get('/api/tasks/my/')['X-Cache'], 'HIT')
+
+    @override_settings(TASKS_CACHE_TIMEOUT=0)
+    def test_cache_disabled(self):
+        """With TASKS_CACHE_TIMEOUT=0 lists are not cached."""
+        self.authorized_client.get('/api/tasks/')
+        response = self.authorized_client.get('/api/tasks/')
+        self.assertEqual(response['X-Cache'], 'MISS')
@@ -0,0 +1,248 @@
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from api.management.commands.import_tasks import Command
+from tasks.archive import archivable_tasks, archive_tasks
+from tasks.models import ArchivedTask, Task, TaskChange, TaskStats, User
+from tasks.stats import count_tasks, get_stats
+
+
+class ImportTasksTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        cls.user2 = User.objects.create_user(
+            username='auth2', first_name='auth2', password='321qazxsw'
+        )
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_file(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def import_tasks(self, *args, **options):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('import_tasks', *args, stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_ndjson(self):
+        """NDJSON rows are imported for the users found by username."""
+        rows = [
+            {'title': 'Task1', 'username': 'auth'},
+            {'title': 'Task2', 'description': 'Text', 'status': 'Completed', 'username': 'auth2'},
+        ]
+        path = self.write_file(
+            'tasks.ndjson', '\n'.join(json.dumps(row) for row in rows))
+        stdout, _ = self.import_tasks(path)
+        self.assertIn('Imported 2 tasks', stdout)
+        task = Task.objects.get(title='Task2')
+        self.assertEqual(task.user_id, self.user2)
+        self.assertEqual(task.status, Task.Status.COMPLETED)
+        self.assertEqual(task.description, 'Text')
+        self.assertEqual(
+            set(TaskChange.objects.values_list('task_id', flat=True)),
+            set(Task.objects.values_list('id', flat=True)))
+
+    def test_import_csv(self):
+        """CSV rows are imported, empty cells take the default values."""
+        path = self.write_file(
+            'tasks.csv',
+            'title,description,status,username\n'
+            'Task1,,,auth\n'
+            '"Task, 2",Text,In Progress,auth\n')
+        self.import_tasks(path, batch_size=1)
+        self.assertEqual(Task.objects.get(title='Task1').status, Task.Status.NEW)
+        self.assertEqual(
+            Task.objects.get(title='Task, 2').status, Task.Status.PROGRESS)
+
+    def test_invalid_rows_are_skipped(self):
+        """Invalid rows and rows of unknown users are reported and skipped."""
+        path = self.write_file('tasks.ndjson', '\n'.join([
+            json.dumps({'title': 'Task1', 'username': 'auth'}),
+            json.dumps({'description': 'No title', 'username': 'auth'}),
+            json.dumps({'title': 'Task3', 'username': 'unknown'}),
+            json.dumps({'title': 'Task4', 'status': 'Done', 'username': 'auth'}),
+            'not json',
+        ]))
+        stdout, stderr = self.import_tasks(path)
+        self.assertIn('Imported 1 tasks, skipped 4 rows', stdout)
+        for number in (2, 3, 4, 5):
+            with self.subTest(row=number):
+                self.assertIn(f'Row {number} skipped', stderr)
+        self.assertEqual(list(Task.objects.values_list('title', flat=True)), ['Task1'])
+
+    def test_invalid_username(self):
+        """Rows with a username that is not a string are skipped."""
+        path = self.write_file('tasks.ndjson', '\n'.join([
+            json.dumps({'title': 'Task1', 'username': ['auth']}),
+            json.dumps({'title': 'Task2', 'username': {'name': 'auth'}}),
+            json.dumps({'title': 'Task3', 'username': 'auth'}),
+        ]))
+        stdout, stderr = self.import_tasks(path)
+        self.assertIn('Imported 1 tasks, skipped 2 rows', stdout)
+        self.assertIn('Row 1 skipped', stderr)
+        self.assertIn('Row 2 skipped', stderr)
+
+    def test_copy_rows(self):
+        """COPY rows keep empty descriptions apart from missing ones."""
+        tasks = [
+            Task(title='Task "1"', description=None, status=1, user_id_id=1),
+            Task(title='Task2', description='', status=2, user_id_id=1),
+        ]
+        self.assertEqual(
+            Command().copy_rows(tasks),
+            '"Task ""1""",,1,1\n"Task2","",2,1\n')
+
+    def test_default_username(self):
+        """Rows without username get the author from --username."""
+        path = self.write_file('tasks.ndjson', json.dumps({'title': 'Task1'}))
+        self.import_tasks(path, username='auth2')
+        self.assertEqual(Task.objects.get().user_id, self.user2)
+
+    def test_resume_from_checkpoint(self):
+        """With a checkpoint the import goes on from the first new row."""
+        checkpoint = os.path.join(self.directory.name, 'checkpoint.json')
+        rows = [json.dumps({'title': f'Task{number}', 'username': 'auth'})
+                for number in range(5)]
+        path = self.write_file('tasks.ndjson', '\n'.join(rows[:3]))
+        self.import_tasks(path, checkpoint=checkpoint, batch_size=2)
+        path = self.write_file('tasks.ndjson', '\n'.join(rows))
+        stdout, _ = self.import_tasks(path, checkpoint=checkpoint, batch_size=2)
+        self.assertIn('Imported 2 tasks', stdout)
+        self.assertEqual(
+            sorted(Task.objects.values_list('title', flat=True)),
+            [f'Task{number}' for number in range(5)])
+
+
+class RebuildTaskStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        cls.user2 = User.objects.create_user(
+            username='auth2', first_name='auth2', password='321qazxsw'
+        )
+        Task.objects.bulk_create([
+            Task(title='Task1', user_id=cls.user),
+            Task(title='Task2', status=Task.Status.COMPLETED, user_id=cls.user),
+        ])
+
+    def test_rebuild(self):
+        """The counts of all users are counted again from their tasks."""
+        TaskStats.objects.create(user=self.user2, new=5)
+        stdout = io.StringIO()
+        call_command('rebuild_task_stats', batch_size=1, stdout=stdout)
+        self.assertIn('Counted the tasks of 2 users', stdout.getvalue())
+        self.assertEqual(
+            TaskStats.objects.get(user=self.user).get_counts(),
+            {'New': 1, 'In Progress': 0, 'Completed': 1})
+        self.assertEqual(TaskStats.objects.get(user=self.user2).new, 0)
+
+    def test_rebuild_users(self):
+        """Only the counts of the given users are counted again."""
+        call_command('rebuild_task_stats', 'auth2', stdout=io.StringIO())
+        self.assertEqual(
+            list(TaskStats.objects.values_list('user', flat=True)), [self.user2.pk])
+
+    def test_concurrent_count(self):
+        """Counts inserted by a concurrent count are counted again."""
+        bulk_create = TaskStats.objects.bulk_create
+
+        def insert_first(objs, **kwargs):
+            TaskStats.objects.create(user=self.user, new=5)
+            return bulk_create(objs, **kwargs)
+
+        with mock.patch.object(TaskStats.objects, 'bulk_create', insert_first):
+            count_tasks([self.user.pk])
+        self.assertEqual(
+            TaskStats.objects.get(user=self.user).get_counts(),
+            {'New': 1, 'In Progress': 0, 'Completed': 1})
+
+    def test_imported_tasks_are_counted(self):
+        """Tasks imported by import_tasks change the counts."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tasks.ndjson')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(json.dumps({'title': 'Task3', 'username': 'auth2'}))
+            call_command('import_tasks', path, stdout=io.StringIO())
+        self.assertEqual(TaskStats.objects.get(user=self.user2).new, 1)
+
+
+class ArchiveTasksTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        cls.old = timezone.now() - timedelta(days=100)
+        for number in range(3):
+            Task.objects.create(
+                title=f'Old task{number}', status=Task.Status.COMPLETED,
+                user_id=cls.user)
+        Task.objects.create(title='Old new task', user_id=cls.user)
+        Task.objects.update(updated=cls.old)
+        cls.task = Task.objects.create(
+            title='Task', status=Task.Status.COMPLETED, user_id=cls.user)
+
+    def test_archive(self):
+        """Only the completed tasks not changed for --days are archived."""
+        stats = get_stats(self.user.pk).get_counts()
+        stdout = io.StringIO()
+        call_command('archive_tasks', batch_size=2, stdout=stdout)
+        self.assertIn('Archived 3 tasks', stdout.getvalue())
+        self.assertEqual(
+            sorted(ArchivedTask.objects.values_list('title', flat=True)),
+            ['Old task0', 'Old task1', 'Old task2'])
+        self.assertEqual(
+            sorted(Task.objects.values_list('title', flat=True)),
+            ['Old new task', 'Task'])
+        archived = ArchivedTask.objects.get(title='Old task0')
+        # Clients in sync drop the archived tasks from their lists.
+        self.assertEqual(
+            set(TaskChange.objects.filter(deleted=True).values_list('task_id', flat=True)),
+            set(ArchivedTask.objects.values_list('pk', flat=True)))
+        self.assertEqual(archived.updated, self.old)
+        self.assertEqual(archived.user_id, self.user)
+        self.assertEqual(get_stats(self.user.pk).get_counts(), stats)
+        count_tasks([self.user.pk])
+        self.assertEqual(get_stats(self.user.pk).get_counts(), stats)
+
+    def test_resume(self):
+        """A run goes on with the tasks an interrupted run left."""
+        next(archive_tasks(self.old + timedelta(days=1), batch_size=2))
+        self.assertEqual(ArchivedTask.objects.count(), 2)
+        call_command('archive_tasks', stdout=io.StringIO())
+        self.assertEqual(ArchivedTask.objects.count(), 3)
+        self.assertFalse(archivable_tasks(timezone.now()).exclude(
+            pk=self.task.pk).exists())
+
+    def test_before(self):
+        """--before takes a date and time instead of --days."""
+        call_command(
+            'archive_tasks', before=timezone.now().isoformat(),
+            stdout=io.StringIO())
+        self.assertEqual(ArchivedTask.objects.count(), 4)
+        with self.assertRaises(CommandError):
+            call_command('archive_tasks', before='yesterday')
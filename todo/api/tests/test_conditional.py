@@ -0,0 +1,95 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from tasks.models import Task, User
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        cls.task = Task.objects.create(title='Title test task', user_id=cls.user)
+        cls.task2 = Task.objects.create(title='Title test task2', user_id=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.authorized_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_unchanged_returns_not_modified(self):
+        """GET request with the current ETag returns status 304 without body."""
+        urls = ('/api/tasks/', '/api/tasks/my/', '/api/tasks/?status=New',
+                f'/api/tasks/{ConditionalGetTests.task.id}/')
+        for url in urls:
+            with self.subTest(url=url):
+                etag = self.authorized_client.get(url)['ETag']
+                response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(response.content, b'')
+                self.assertEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_page(self):
+        """Lists with different query strings have different ETags."""
+        first = self.authorized_client.get('/api/tasks/')['ETag']
+        second = self.authorized_client.get('/api/tasks/?status=New')['ETag']
+        self.assertNotEqual(first, second)
+
+    def test_changes_return_new_list(self):
+        """After a task is created, changed or deleted the list is returned again."""
+        writes = {
+            'create': lambda: self.authorized_client.post(
+                '/api/tasks/', {'title': 'Test Task'}),
+            'update': lambda: self.authorized_client.patch(
+                f'/api/tasks/{self.task.id}/', {'title': 'Changed'}),
+            'bulk update': lambda: self.authorized_client.patch(
+                '/api/tasks/bulk/', [{'id': self.task.id, 'status': 'Completed'}],
+                format='json'),
+            'delete': lambda: self.authorized_client.delete(
+                f'/api/tasks/{self.task2.id}/'),
+        }
+        for name, write in writes.items():
+            with self.subTest(write=name):
+                etags = {
+                    url: self.authorized_client.get(url)['ETag']
+                    for url in ('/api/tasks/', '/api/tasks/my/')
+                }
+                self.assertLess(write().status_code, 300)
+                for url, etag in etags.items():
+                    response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    self.assertNotEqual(response['ETag'], etag)
+
+    def test_cursor_page_does_not_count(self):
+        """The ETag of a cursor page is not read from the whole list."""
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get('/api/tasks/my/?pagination=cursor')
+        for query in queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
+
+    def test_task_if_modified_since(self):
+        """GET request /api/tasks/{id}/ honors If-Modified-Since."""
+        url = f'/api/tasks/{ConditionalGetTests.task.id}/'
+        last_modified = self.authorized_client.get(url)['Last-Modified']
+        response = self.authorized_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.authorized_client.get(
+            url, HTTP_IF_MODIFIED_SINCE='Mon, 01 Jan 2024 00:00:00 GMT')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_changed_task_returns_new_etag(self):
+        """After a task is completed GET request /api/tasks/{id}/ returns it again."""
+        url = f'/api/tasks/{ConditionalGetTests.task.id}/'
+        etag = self.authorized_client.get(url)['ETag']
+        self.authorized_client.patch(f'{url}completed/')
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['status'], 'Completed')
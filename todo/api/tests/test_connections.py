@@ -0,0 +1,52 @@
+from unittest import mock
+
+from django.db import connections
+from django.test import SimpleTestCase
+
+from api.connections import close_unusable_connections
+
+
+class CloseUnusableConnectionsTests(SimpleTestCase):
+    databases = {'default'}
+
+    def setUp(self):
+        self.connection = connections.create_connection('default')
+        self.connection.settings_dict = {
+            **self.connection.settings_dict, 'CONN_HEALTH_CHECKS': True}
+        self.connection.ensure_connection()
+        self.addCleanup(self.connection.close)
+        patcher = mock.patch(
+            'api.connections.connections', all=lambda: [self.connection])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unusable_closed(self):
+        """A kept connection that no longer answers is closed."""
+        with mock.patch.object(self.connection, 'close') as close:
+            with mock.patch.object(self.connection, 'is_usable',
+                                   return_value=False):
+                close_unusable_connections()
+        close.assert_called_once_with()
+
+    def test_usable_kept(self):
+        with mock.patch.object(self.connection, 'close') as close:
+            close_unusable_connections()
+        close.assert_not_called()
+
+    def test_not_checked(self):
+        """Without health checks or in a transaction nothing is checked."""
+        with mock.patch.object(self.connection, 'is_usable') as is_usable:
+            self.connection.settings_dict['CONN_HEALTH_CHECKS'] = False
+            close_unusable_connections()
+            self.connection.settings_dict['CONN_HEALTH_CHECKS'] = True
+            with mock.patch.object(self.connection, 'in_atomic_block', True):
+                close_unusable_connections()
+        is_usable.assert_not_called()
+
+    def test_recently_used(self):
+        """A connection that answered a query lately is not checked again."""
+        with self.connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        with mock.patch.object(self.connection, 'is_usable') as is_usable:
+            close_unusable_connections()
+        is_usable.assert_not_called()
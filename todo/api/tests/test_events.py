@@ -0,0 +1,260 @@
+import asyncio
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import (SimpleTestCase, TestCase, TransactionTestCase,
+                         override_settings)
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.events import LocalBroker, format_event, get_broker
+from tasks.models import Task, TaskChange, User
+from todo.asgi import application
+
+
+def parse_events(body):
+    """Return the events of a stream as (name, data) pairs."""
+    events = []
+    for block in body.split('\n\n'):
+        lines = dict(
+            line.split(': ', 1) for line in block.splitlines()
+            if not line.startswith(':'))
+        if lines:
+            events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+class LocalBrokerTests(SimpleTestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.broker = LocalBroker()
+
+    def subscribe(self, channel, size=10):
+        async def subscribe():
+            return self.broker.subscribe(channel, size)
+        return self.loop.run_until_complete(subscribe())
+
+    def read(self, subscription):
+        # Run the callbacks of the events put from other threads.
+        self.loop.run_until_complete(asyncio.sleep(0))
+        return subscription.read()
+
+    def test_fan_out(self):
+        """Events reach every subscription of their channel."""
+        first, second = self.subscribe('user:1'), self.subscribe('user:1')
+        other = self.subscribe('user:2')
+        thread = threading.Thread(
+            target=self.broker.publish, args=('user:1', 'event'))
+        thread.start()
+        thread.join()
+        self.assertEqual(self.read(first), ['event'])
+        self.assertEqual(self.read(second), ['event'])
+        self.assertEqual(self.read(other), [])
+        self.broker.unsubscribe(first)
+        self.broker.unsubscribe(second)
+        self.assertFalse(self.broker.has_subscribers('user:1'))
+        self.assertTrue(self.broker.has_subscribers('user:2'))
+
+    def test_bounded(self):
+        """A subscription keeps the newest events and tells it dropped some."""
+        subscription = self.subscribe('user:1', size=3)
+        for number in range(5):
+            self.broker.publish('user:1', str(number))
+        self.assertEqual(
+            self.read(subscription), [format_event('sync', {}), '2', '3', '4'])
+        self.broker.publish('user:1', '5')
+        self.assertEqual(self.read(subscription), ['5'])
+
+    def test_wait(self):
+        """Waiting ends with an event or after the timeout."""
+        subscription = self.subscribe('user:1')
+        self.loop.run_until_complete(subscription.wait(0.01))
+        self.broker.publish('user:1', 'event')
+        self.loop.run_until_complete(subscription.wait(10))
+        self.assertEqual(subscription.read(), ['event'])
+
+
+class TaskEventsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        cls.user2 = User.objects.create_user(
+            username='auth2', first_name='auth2', password='321qazxsw'
+        )
+        cls.task = Task.objects.create(title='Title test task', user_id=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.authorized_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+        async def subscribe():
+            return get_broker().subscribe(f'user:{self.user.id}', 10)
+        self.subscription = self.loop.run_until_complete(subscribe())
+        self.addCleanup(get_broker().unsubscribe, self.subscription)
+
+    def get_events(self):
+        self.loop.run_until_complete(asyncio.sleep(0))
+        return parse_events(''.join(self.subscription.read()))
+
+    def test_events(self):
+        """Writes of the tasks of the user are published once committed."""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.authorized_client.post(
+                '/api/tasks/', {'title': 'New task'})
+        task_id = response.json()['id']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authorized_client.patch(
+                f'/api/tasks/{task_id}/', {'title': 'Changed task'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authorized_client.patch(f'/api/tasks/{task_id}/completed/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authorized_client.delete(f'/api/tasks/{task_id}/')
+        events = self.get_events()
+        self.assertEqual(
+            [name for name, _ in events],
+            ['created', 'updated', 'completed', 'deleted'])
+        self.assertEqual(events[0][1], {
+            'id': task_id, 'title': 'New task', 'description': None,
+            'status': 'New', 'user_id': self.user.id})
+        self.assertEqual(events[2][1]['status'], 'Completed')
+        self.assertEqual(events[3][1], {'id': task_id})
+
+    def test_bulk_events(self):
+        """Tasks written in bulk are published too."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authorized_client.post(
+                '/api/tasks/bulk/', [{'title': 'Task1'}, {'title': 'Task2'}],
+                format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authorized_client.delete(
+                '/api/tasks/bulk/', [self.task.id], format='json')
+        self.assertEqual(
+            [name for name, _ in self.get_events()],
+            ['created', 'created', 'deleted'])
+
+    def test_other_users(self):
+        """Only the owner of a task gets its events."""
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(title='Task', user_id=self.user2)
+        self.assertEqual(self.get_events(), [])
+
+    def test_rolled_back(self):
+        """Writes rolled back are not published."""
+        with self.captureOnCommitCallbacks():
+            Task.objects.create(title='Task', user_id=self.user)
+        self.assertEqual(self.get_events(), [])
+
+
+class EventStreamTests(TransactionTestCase):
+    # The stream reads the database from a thread of its own, which does
+    # not see the data of a test run in a transaction.
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.messages = asyncio.Queue()
+        self.sent = []
+
+    async def receive(self):
+        return await self.messages.get()
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    def request(self, method='GET', query_string=b'', headers=()):
+        scope = {
+            'type': 'http', 'method': method, 'path': '/api/events/',
+            'query_string': query_string, 'headers': list(headers),
+        }
+        return asyncio.ensure_future(
+            application(scope, self.receive, self.send))
+
+    def get_body(self):
+        return ''.join(
+            message.get('body', b'').decode() for message in self.sent)
+
+    async def wait_for_events(self, count):
+        for _ in range(100):
+            if len(parse_events(self.get_body())) >= count:
+                return
+            await asyncio.sleep(0.01)
+        self.fail(f'No {count} events in {self.get_body()!r}')
+
+    @override_settings(TASKS_CHANGES_SETTLE_SECONDS=0)
+    async def test_stream(self):
+        """The stream sends the changes of the tasks of the user."""
+        await sync_to_async(TaskChange.objects.create)(
+            task_id=1, user_id=self.user.id)
+        stream = self.request(
+            headers=[(b'authorization', f'Bearer {self.token}'.encode())])
+        await self.messages.put({'type': 'http.request', 'body': b''})
+        await self.wait_for_events(1)
+        self.assertEqual(self.sent[0]['status'], 200)
+        self.assertIn(
+            (b'content-type', b'text/event-stream'), self.sent[0]['headers'])
+        token = await sync_to_async(TaskChange.objects.get)()
+        task = await sync_to_async(Task.objects.create)(
+            title='Task', user_id=self.user)
+        await self.wait_for_events(2)
+        await self.messages.put({'type': 'http.disconnect'})
+        await asyncio.wait_for(stream, 1)
+        self.assertEqual(parse_events(self.get_body()), [
+            ('sync', {'token': str(token.id)}),
+            ('created', {'id': task.id, 'title': 'Task', 'description': None,
+                         'status': 'New', 'user_id': self.user.id}),
+        ])
+        self.assertFalse(get_broker().has_subscribers(f'user:{self.user.id}'))
+
+    async def test_ticket(self):
+        """EventSource opens the stream with a ticket, once."""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = await sync_to_async(client.post)('/api/events/tickets/')
+        self.assertEqual(response.status_code, 201)
+        query_string = f'ticket={response.json()["ticket"]}'.encode()
+        stream = self.request(query_string=query_string)
+        await self.wait_for_events(1)
+        await self.messages.put({'type': 'http.disconnect'})
+        await asyncio.wait_for(stream, 1)
+        self.assertEqual(
+            parse_events(self.get_body()), [('sync', {'token': '0'})])
+        self.sent.clear()
+        await self.request(query_string=query_string)
+        self.assertEqual(self.sent[0]['status'], 401)
+
+    @override_settings(EVENTS_HEARTBEAT_SECONDS=0.01)
+    async def test_revoked(self):
+        """The stream of a deactivated user is closed."""
+        stream = self.request(
+            headers=[(b'authorization', f'Bearer {self.token}'.encode())])
+        await self.wait_for_events(1)
+        self.user.is_active = False
+        await sync_to_async(self.user.save)()
+        await asyncio.wait_for(stream, 1)
+        self.assertEqual(self.sent[-1], {'type': 'http.response.body'})
+        self.assertFalse(get_broker().has_subscribers(f'user:{self.user.id}'))
+
+    async def test_unauthorized(self):
+        await self.request()
+        self.assertEqual(self.sent[0]['status'], 401)
+        # Tokens are not taken from the query string, which servers log.
+        for query_string in (b'ticket=invalid', f'token={self.token}'.encode()):
+            self.sent.clear()
+            await self.request(query_string=query_string)
+            self.assertEqual(self.sent[0]['status'], 401)
+        self.sent.clear()
+        await self.request('POST')
+        self.assertEqual(self.sent[0]['status'], 405)
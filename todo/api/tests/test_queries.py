@@ -0,0 +1,137 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.authentication import token_revocations, user_cache
+from tasks.models import Task, User
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Number of queries made by every endpoint of api/urls.py.
+
+    When an endpoint makes a different number of queries, the test fails:
+    lower the budget when the endpoint makes less of them, look for an
+    N+1 or a lost optimization when it makes more. Lists are requested
+    with an empty cache, the budgets count the queries of a cache miss.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        cls.user2 = User.objects.create_user(
+            username='auth2', first_name='auth2', password='321qazxsw'
+        )
+        cls.task = Task.objects.create(title='Title test task', user_id=cls.user)
+        cls.task2 = Task.objects.create(title='Title test task2', user_id=cls.user)
+        cls.task3 = Task.objects.create(title='Title test task3', user_id=cls.user2)
+        cls.token = RefreshToken.for_user(cls.user).access_token
+
+    def setUp(self):
+        self.authorized_client = APIClient()
+        self.authorized_client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def assertBudgets(self, send, budgets):
+        """Send every request in a transaction rolled back after it."""
+        for method, url, data, budget in budgets:
+            with self.subTest(method=method, url=url):
+                with transaction.atomic():
+                    cache.clear()
+                    user_cache.clear()
+                    # Read once a AUTH_USER_CACHE_TIMEOUT, not per request.
+                    token_revocations.get_before(self.user.id)
+                    with self.assertNumQueries(budget):
+                        response = send(method, url, data)
+                        if response.streaming:
+                            b''.join(response.streaming_content)
+                    self.assertLess(response.status_code, 500)
+                    transaction.set_rollback(True)
+
+    def test_task_endpoints(self):
+        """Endpoints of TaskViewSet stay within their query budgets."""
+        task, task2, task3 = self.task.id, self.task2.id, self.task3.id
+        budgets = [
+            ('get', '/api/', None, 1),
+            ('get', '/api/tasks/', None, 2),
+            ('get', '/api/tasks/?status=New', None, 2),
+            ('get', '/api/tasks/?pagination=cursor', None, 1),
+            ('post', '/api/tasks/', {'title': 'New'}, 3),
+            ('get', f'/api/tasks/{task}/', None, 1),
+            ('put', f'/api/tasks/{task}/', {'title': 'Put'}, 4),
+            ('patch', f'/api/tasks/{task}/', {'title': 'Patch'}, 4),
+            ('delete', f'/api/tasks/{task}/', None, 5),
+            ('get', '/api/tasks/my/', None, 2),
+            ('get', '/api/tasks/stats/', None, 1),
+            ('get', '/api/tasks/changes/', None, 2),
+            ('get', '/api/tasks/changes/?since=1', None, 2),
+            ('get', '/api/tasks/export/', None, 1),
+            ('patch', f'/api/tasks/{task}/completed/', None, 6),
+            ('patch', f'/api/tasks/{task3}/completed/', None, 1),
+            ('post', '/api/tasks/bulk/', [{'title': 'A'}, {'title': 'B'}], 8),
+            ('patch', '/api/tasks/bulk/',
+             [{'id': task, 'title': 'A'}, {'id': task2, 'title': 'B'}], 6),
+            ('delete', '/api/tasks/bulk/', [task, task2], 8),
+        ]
+        self.assertBudgets(
+            lambda method, url, data: getattr(self.authorized_client, method)(
+                url, data, format='json'),
+            budgets)
+
+    def test_auth_endpoints(self):
+        """Endpoints of users and tokens stay within their query budgets."""
+        refresh = str(RefreshToken.for_user(self.user))
+        budgets = [
+            ('get', '/api/auth/users/me/', None, 1),
+            ('patch', '/api/auth/users/me/', {'first_name': 'Name'}, 2),
+            ('post', '/api/auth/jwt/create/',
+             {'username': 'auth', 'password': 'qazxsw321'}, 1),
+            ('post', '/api/auth/jwt/refresh/', {'refresh': refresh}, 0),
+            ('post', '/api/auth/jwt/verify/', {'token': str(self.token)}, 0),
+        ]
+        self.assertBudgets(
+            lambda method, url, data: getattr(self.authorized_client, method)(
+                url, data, format='json'),
+            budgets)
+
+    @override_settings(REQUEST_TIMING=True)
+    def test_other_endpoints(self):
+        """The other endpoints stay within their query budgets."""
+        budgets = [
+            ('post', '/api/events/tickets/', None, 0),
+            ('post', '/api/batch/', [
+                {'method': 'GET', 'url': f'/api/tasks/{self.task.id}/'},
+                {'method': 'PATCH', 'url': f'/api/tasks/{self.task.id}/',
+                 'body': {'title': 'Batch'}},
+            ], 6),
+            ('get', '/api/metrics/', None, 0),
+        ]
+        self.assertBudgets(
+            lambda method, url, data: getattr(self.authorized_client, method)(
+                url, data, format='json'),
+            budgets)
+
+    def test_async_endpoints(self):
+        """Async endpoints stay within their query budgets."""
+        budgets = [
+            ('get', '/api/async/tasks/', None, 2),
+            ('get', '/api/async/tasks/my/', None, 2),
+            ('get', f'/api/async/tasks/{self.task.id}/', None, 1),
+            ('patch', f'/api/async/tasks/{self.task.id}/completed/', None, 6),
+        ]
+
+        def send(method, url, data):
+            return async_to_sync(getattr(AsyncClient(), method))(
+                url, authorization=f'Bearer {self.token}')
+
+        # Run the queries in the thread of the test, which has its
+        # transaction and counts the queries.
+        with mock.patch('api.async_views.database', sync_to_async):
+            self.assertBudgets(send, budgets)
@@ -0,0 +1,89 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from tasks.models import Task, User
+
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (TABLE )?\w+$')
+
+
+def explain(sql):
+    """Return the lines of the query plan for sql."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN {sql}')
+            return [row[0] for row in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def is_sequential_scan(line):
+    if connection.vendor == 'postgresql':
+        return 'Seq Scan' in line
+    return bool(SQLITE_FULL_SCAN.match(line.strip()))
+
+
+class QueryPlanTests(TestCase):
+    """The hot task endpoints are served by indexes, not table scans."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        cls.user2 = User.objects.create_user(
+            username='auth2', first_name='auth2', password='321qazxsw'
+        )
+        for task_num in range(20):
+            Task.objects.create(
+                title=f'Title test task{str(task_num)}',
+                status=tuple(Task.Status)[task_num % 3],
+                user_id=(cls.user, cls.user2)[task_num % 2]
+            )
+        cls.task = Task.objects.filter(user_id=cls.user).first()
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.authorized_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        if connection.vendor == 'postgresql':
+            # Tiny test tables are cheaper to scan, make the planner show
+            # which index it would pick on a big one.
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+    def tearDown(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = on')
+
+    def test_endpoints_do_not_scan_tables(self):
+        """Queries of task endpoints do not fall back to a sequential scan."""
+        urls = (
+            '/api/tasks/',
+            '/api/tasks/?status=New',
+            '/api/tasks/?pagination=cursor',
+            '/api/tasks/my/',
+            '/api/tasks/my/?status=progress',
+            '/api/tasks/my/?pagination=cursor',
+            f'/api/tasks/{QueryPlanTests.task.id}/',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.authorized_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                for query in queries.captured_queries:
+                    if not query['sql'].startswith('SELECT'):
+                        continue
+                    plan = explain(query['sql'])
+                    self.assertFalse(
+                        any(is_sequential_scan(line) for line in plan),
+                        f'Sequential scan for {query["sql"]}: {plan}')
@@ -0,0 +1,93 @@
+from django.core.cache import cache
+from django.test import TestCase, modify_settings, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api import querylog
+from api.querylog import assert_no_repeated_queries, get_shape
+from tasks.models import Task, User
+
+QUERY_LOG_MIDDLEWARE = {'prepend': 'api.querylog.QueryLogMiddleware'}
+
+
+class QueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        cls.tasks = [
+            Task.objects.create(
+                title=f'Title test task {number}', user_id=cls.user)
+            for number in range(12)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.authorized_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_shape(self):
+        """Queries differing by their values only have the same shape."""
+        self.assertEqual(
+            get_shape('SELECT * FROM "tasks_task" WHERE "id" IN (%s, %s) '
+                      "AND \"title\" = 'it''s' LIMIT 21"),
+            get_shape('SELECT * FROM "tasks_task" WHERE "id" IN (%s, %s, %s) '
+                      "AND \"title\" = 'other' LIMIT 10"))
+
+    def test_lazy_loads(self):
+        """Loading the user of every task is an N+1, with its line."""
+        with self.assertRaises(AssertionError) as context:
+            with assert_no_repeated_queries():
+                for task in Task.objects.all():
+                    task.user_id.username
+        message = str(context.exception)
+        self.assertIn('12 times, api/tests/test_querylog.py:', message)
+        self.assertIn('FROM "tasks_user"', message)
+
+    def test_task_endpoints(self):
+        """Endpoints of TaskViewSet make no N+1."""
+        tasks = [task.id for task in self.tasks[:6]]
+        requests = [
+            ('get', '/api/tasks/', None),
+            ('get', '/api/tasks/?pagination=cursor', None),
+            ('get', '/api/tasks/my/', None),
+            ('get', f'/api/tasks/{tasks[0]}/', None),
+            ('get', '/api/tasks/stats/', None),
+            ('get', '/api/tasks/changes/?since=1', None),
+            ('get', '/api/tasks/export/', None),
+            ('patch', f'/api/tasks/{tasks[0]}/completed/', None),
+            ('patch', '/api/tasks/bulk/',
+             [{'id': task, 'title': 'Bulk'} for task in tasks]),
+            ('delete', '/api/tasks/bulk/', tasks),
+        ]
+        for method, url, data in requests:
+            with self.subTest(method=method, url=url):
+                with assert_no_repeated_queries():
+                    response = getattr(self.authorized_client, method)(
+                        url, data, format='json')
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                self.assertLess(response.status_code, 300)
+
+    @override_settings(QUERY_LOG=True, QUERY_LOG_SLOW_MS=0)
+    @modify_settings(MIDDLEWARE=QUERY_LOG_MIDDLEWARE)
+    def test_slow_queries(self):
+        """Slow queries are logged with the endpoint and action."""
+        with self.assertLogs('api.querylog', 'WARNING') as logs:
+            self.authorized_client.get('/api/tasks/')
+        self.assertIn('Slow query', logs.output[0])
+        self.assertIn('GET api:tasks-list (list)', logs.output[0])
+        self.assertIn('GET api:tasks-list (list)', querylog.format_report())
+
+    @override_settings(QUERY_LOG=True, QUERY_LOG_REPEATED=1)
+    @modify_settings(MIDDLEWARE=QUERY_LOG_MIDDLEWARE)
+    def test_repeated_queries(self):
+        """Repeated queries are logged at the end of the request."""
+        with self.assertLogs('api.querylog', 'WARNING') as logs:
+            self.authorized_client.get(f'/api/tasks/{self.tasks[0].id}/')
+        self.assertIn(
+            'Repeated queries, an N+1, GET api:tasks-detail (retrieve)',
+            logs.output[-1])
@@ -0,0 +1,99 @@
+import datetime
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.renderers import FastJSONRenderer
+from api.serializers import TaskSerializer, get_task_row_encoder
+from tasks.models import Task, User
+
+
+class FastJSONRendererTests(TestCase):
+    def assertSameBytes(self, data, media_type=None):
+        self.assertEqual(
+            FastJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type))
+
+    def test_same_bytes(self):
+        """The renderer writes the bytes of JSONRenderer."""
+        cases = [
+            OrderedDict([('id', 1), ('title', 'Заголовок "задачи"'),
+                         ('description', None), ('done', True)]),
+            [{'title': 'Line\u2028separator\u2029'}, [], {}],
+            {'errors': [ErrorDetail('Not found.', code='not_found')]},
+            {'lazy': gettext_lazy('Not found.'), 1: 'integer key'},
+            {'date': datetime.date(2024, 2, 19),
+             'created': datetime.datetime(2024, 2, 19, 23, 46, 1, 123456,
+                                          tzinfo=timezone.utc),
+             'price': Decimal('1.50')},
+            {'big': 2 ** 70},
+            None,
+        ]
+        for data in cases:
+            with self.subTest(data=data):
+                self.assertSameBytes(data)
+
+    def test_non_finite(self):
+        """Floats that are not finite fail with STRICT_JSON, as with JSONRenderer."""
+        for value in (float('nan'), float('inf'), [{'ratio': -float('inf')}]):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render({'value': value})
+                with self.assertRaises(ValueError):
+                    FastJSONRenderer().render({'value': value})
+        renderer = FastJSONRenderer()
+        renderer.strict = False
+        self.assertEqual(
+            renderer.render({'value': float('nan'), 'none': None}),
+            b'{"value":NaN,"none":null}')
+
+    def test_indent(self):
+        """Indented output is rendered by JSONRenderer."""
+        self.assertSameBytes({'id': 1}, 'application/json; indent=4')
+
+
+class TaskRowEncoderTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        Task.objects.create(title='Title test task', user_id=cls.user)
+        Task.objects.create(
+            title='Задача', description='Line\nbreak',
+            status=Task.Status.COMPLETED, user_id=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.authorized_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_rows_as_serializer(self):
+        """A row of values() is encoded as TaskSerializer represents the task."""
+        encode = get_task_row_encoder()
+        fields = TaskSerializer.Meta.fields
+        for task, row in zip(Task.objects.all(), Task.objects.values(*fields)):
+            with self.subTest(task=task.pk):
+                self.assertEqual(encode(row), TaskSerializer(task).data)
+        self.assertEqual(
+            get_task_row_encoder(('title',))(row), {'title': row['title']})
+
+    def test_list_bytes(self):
+        """Lists are the bytes TaskSerializer and JSONRenderer would write."""
+        tasks = TaskSerializer(Task.objects.all(), many=True).data
+        for url in ('/api/tasks/', '/api/tasks/my/'):
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertEqual(response.content, JSONRenderer().render(OrderedDict([
+                    ('count', 2), ('next', None), ('previous', None), ('results', tasks),
+                ])))
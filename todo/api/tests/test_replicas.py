@@ -0,0 +1,174 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.utils.functional import SimpleLazyObject
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api import replicas
+from api.replicas import ReplicaMiddleware, ReplicaRouter
+from tasks.models import Task, User
+
+
+@override_settings(
+    DATABASE_REPLICAS=['replica1', 'replica2'], DATABASE_REPLICA_MAX_LAG=5,
+    DATABASE_REPLICA_LAG_CHECK_SECONDS=60)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        replicas.lags.clear()
+        self.lags = {'replica1': 0.0, 'replica2': 0.0}
+        patcher = mock.patch(
+            'api.replicas.measure_lag',
+            side_effect=lambda connection: self.lags[connection.alias])
+        self.measure_lag = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch(
+            'api.replicas.connections',
+            {alias: mock.Mock(alias=alias, in_atomic_block=False)
+             for alias in ('default', 'replica1', 'replica2')})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = ReplicaRouter()
+        self.user = User(id=1, username='auth')
+
+    def get_read_databases(self, method='get', user=None, reads=1,
+                           cookies=None):
+        """Serve a request, return the databases its reads go to."""
+        request = getattr(RequestFactory(), method)('/api/tasks/')
+        request.user = self.user if user is None else user
+        request.COOKIES = {
+            name: cookie.value for name, cookie in (cookies or {}).items()}
+        databases = []
+
+        def view(request):
+            for _ in range(reads):
+                databases.append(self.router.db_for_read(Task))
+            return HttpResponse()
+
+        self.response = ReplicaMiddleware(view)(request)
+        return databases
+
+    def test_safe_requests(self):
+        """The reads of a safe request go to one replica."""
+        databases = self.get_read_databases(reads=5)
+        self.assertIn(databases[0], ('replica1', 'replica2'))
+        self.assertEqual(set(databases), {databases[0]})
+        self.assertEqual(
+            self.get_read_databases(user=AnonymousUser())[0][:7], 'replica')
+
+    def test_writes(self):
+        """Writes and the reads of other requests go to the primary."""
+        self.assertEqual(self.router.db_for_write(Task), 'default')
+        self.assertEqual(self.router.db_for_read(Task), 'default')
+        self.assertEqual(self.get_read_databases('post'), ['default'])
+
+    def test_transaction(self):
+        """Reads in a transaction go to the primary."""
+        replicas.connections['default'].in_atomic_block = True
+        self.assertEqual(self.get_read_databases(), ['default'])
+
+    def test_read_your_writes(self):
+        """A user reads from the primary for a while after writing."""
+        self.get_read_databases('patch')
+        self.assertEqual(self.get_read_databases(), ['default'])
+        other = User(id=2, username='auth2')
+        self.assertNotEqual(self.get_read_databases(user=other), ['default'])
+        cache.delete(replicas.pin_key(self.user.id))
+        self.assertNotEqual(self.get_read_databases(), ['default'])
+
+    def test_pin_cookie(self):
+        """The pin reaches the workers not sharing the cache in a cookie."""
+        self.get_read_databases('patch')
+        cookies = self.response.cookies
+        cache.clear()
+        self.assertEqual(
+            self.get_read_databases(cookies=cookies), ['default'])
+        other = User(id=2, username='auth2')
+        self.assertNotEqual(
+            self.get_read_databases(user=other, cookies=cookies), ['default'])
+        cookies[replicas.PIN_COOKIE].set(replicas.PIN_COOKIE, '1', '1')
+        self.assertNotEqual(
+            self.get_read_databases(cookies=cookies), ['default'])
+
+    def test_unknown_user(self):
+        """The lazy user of a session is loaded from the primary."""
+        user = SimpleLazyObject(lambda: self.user)
+        self.assertEqual(self.get_read_databases(user=user), ['default'])
+
+    def test_lag(self):
+        """Replicas behind the primary serve no reads until they catch up."""
+        self.lags['replica1'] = 10.0
+        for _ in range(5):
+            self.assertEqual(self.get_read_databases(), ['replica2'])
+        self.lags['replica2'] = float('inf')
+        self.assertEqual(self.get_read_databases(), ['replica2'])
+        replicas.lags.clear()
+        self.assertEqual(self.get_read_databases(), ['default'])
+        self.assertEqual(self.measure_lag.call_count, 4)
+
+
+class MeasureLagTests(SimpleTestCase):
+    databases = {'default'}
+
+    def test_postgresql(self):
+        """A replica is behind until it replayed the WAL of the primary."""
+        primary = mock.MagicMock()
+        primary.cursor.return_value.__enter__.return_value.fetchone.return_value = ('0/3000060',)
+        replica = mock.MagicMock(vendor='postgresql')
+        cursor = replica.cursor.return_value.__enter__.return_value
+        with mock.patch('api.replicas.connections', {'default': primary}):
+            for lag, expected in ((0, 0.0), (2.5, 2.5), (None, float('inf'))):
+                cursor.fetchone.return_value = (lag,)
+                self.assertEqual(replicas.measure_lag(replica), expected)
+        cursor.execute.assert_called_with(
+            replicas.POSTGRESQL_LAG_SQL, ['0/3000060'])
+
+    def test_sqlite(self):
+        """SQLite has no replication, its copies are not behind."""
+        connection = connections['default']
+        if connection.vendor == 'sqlite':
+            self.assertEqual(replicas.measure_lag(connection), 0.0)
+
+
+class ReplicaCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        Task.objects.create(title='Title test task', user_id=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.authorized_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def get(self, database):
+        with mock.patch('api.views.get_read_database', return_value=database):
+            return self.authorized_client.get('/api/tasks/')['X-Cache']
+
+    def test_lists_of_replicas(self):
+        """Lists read from a replica are not served to pinned users."""
+        self.assertEqual(self.get('replica1'), 'MISS')
+        self.assertEqual(self.get('replica1'), 'HIT')
+        self.assertEqual(self.get('default'), 'MISS')
+        self.assertEqual(self.get('replica1'), 'HIT')
+
+    @override_settings(DATABASE_REPLICA_MAX_LAG=0.01)
+    def test_lists_of_replicas_expire(self):
+        """Lists read from a replica are kept as long as a replica lags."""
+        self.assertEqual(self.get('replica1'), 'MISS')
+        time.sleep(0.02)
+        self.assertEqual(self.get('replica1'), 'MISS')
+        self.assertEqual(self.get('default'), 'MISS')
+        time.sleep(0.02)
+        self.assertEqual(self.get('default'), 'HIT')
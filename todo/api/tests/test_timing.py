@@ -0,0 +1,149 @@
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import (AsyncClient, SimpleTestCase, TestCase,
+                         TransactionTestCase, modify_settings,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api import metrics
+from tasks.models import Task, User
+
+TIMING_MIDDLEWARE = {'prepend': 'api.timing.TimingMiddleware'}
+
+
+def parse_server_timing(header):
+    """Return the durations and descriptions of a Server-Timing header."""
+    timings = {}
+    for part in header.split(', '):
+        name, *params = part.split(';')
+        timings[name] = dict(param.split('=', 1) for param in params)
+    return timings
+
+
+@override_settings(REQUEST_TIMING=True, REQUEST_TIMING_SAMPLE_RATE=1)
+@modify_settings(MIDDLEWARE=TIMING_MIDDLEWARE)
+class TimingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        cls.task = Task.objects.create(title='Title test task', user_id=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.authorized_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_server_timing(self):
+        """A sampled request sends the time of its phases and its queries."""
+        for url in ('/api/tasks/', f'/api/tasks/{self.task.id}/'):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.authorized_client.get(url)
+                timings = parse_server_timing(response['Server-Timing'])
+                self.assertEqual(
+                    list(timings),
+                    ['auth', 'db', 'serialize', 'render', 'app', 'total'])
+                self.assertEqual(
+                    timings['db']['desc'], f'"{len(queries)} queries"')
+                durations = {
+                    name: float(params['dur']) for name, params in timings.items()}
+                self.assertAlmostEqual(
+                    sum(durations.values()) - durations['total'],
+                    durations['total'], delta=0.05)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        """Requests out of the sample are only counted."""
+        response = self.authorized_client.get('/api/tasks/stats/')
+        self.assertNotIn('Server-Timing', response)
+        metrics = self.client.get('/api/metrics/').content.decode()
+        self.assertRegex(
+            metrics, r'todo_requests_total\{method="GET",status="200",'
+                     r'view="api:tasks-stats"\} \d+')
+        self.assertNotIn('phase="app",view="api:tasks-stats"', metrics)
+
+    def test_metrics(self):
+        """GET /api/metrics/ returns the metrics in the Prometheus format."""
+        self.authorized_client.get('/api/tasks/my/')
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        metrics = response.content.decode()
+        for line in (
+                '# TYPE todo_request_duration_seconds histogram',
+                'todo_request_duration_seconds_bucket{le="+Inf",view="api:tasks-my"}',
+                'todo_request_phase_seconds_sum{phase="db",view="api:tasks-my"}',
+                'todo_request_queries_count{view="api:tasks-my"}',
+                'todo_response_size_bytes_count{view="api:tasks-my"}',
+                'todo_task_list_cache_misses_total '):
+            with self.subTest(line=line):
+                self.assertIn(line, metrics)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        """With METRICS_TOKEN the metrics are served to its bearer only."""
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 401)
+        response = self.client.get(
+            '/api/metrics/', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(REQUEST_TIMING=False)
+    def test_metrics_disabled(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 404)
+
+
+@override_settings(REQUEST_TIMING=True, REQUEST_TIMING_SAMPLE_RATE=1)
+@modify_settings(MIDDLEWARE=TIMING_MIDDLEWARE)
+class AsyncTimingMiddlewareTests(TransactionTestCase):
+    # The async views query the database from threads of their own, which
+    # do not see the data of a test run in a transaction.
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        Task.objects.create(title='Title test task', user_id=self.user)
+        self.token = RefreshToken.for_user(self.user).access_token
+
+    async def test_async_queries(self):
+        """Queries made in the thread pool of the async views are counted."""
+        response = await AsyncClient().get(
+            '/api/async/tasks/', authorization=f'Bearer {self.token}')
+        timings = parse_server_timing(response['Server-Timing'])
+        queries = int(re.match(r'"(\d+) queries"', timings['db']['desc'])[1])
+        self.assertGreater(queries, 0)
+        self.assertIn('render', timings)
+
+
+class MultiprocessMetricsTests(SimpleTestCase):
+    def test_workers(self):
+        """With PROMETHEUS_MULTIPROC_DIR the metrics of every worker are served."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory.name)
+        for _ in range(2):
+            subprocess.run([
+                sys.executable, '-c',
+                'from api import metrics; '
+                'metrics.observe_request("api:api-root", "GET", 200, 0.1)',
+            ], env=env, check=True)
+        with mock.patch.dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory.name):
+            rendered = metrics.render().decode()
+        self.assertIn(
+            'todo_requests_total{method="GET",status="200",'
+            'view="api:api-root"} 2.0', rendered)
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import Client, TestCase
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -17,7 +18,7 @@ class TaskURLTests(TestCase):
         cls.task = Task.objects.create(
             title='Title test task',
             description='Test description',
-            status='New',
+            status=Task.Status.NEW,
             user_id=cls.user
         )
         cls.full_data = {'title': 'Test Task',
@@ -27,6 +28,7 @@ class TaskURLTests(TestCase):
         cls.wrong_data = {'description': 'This is a test task'}
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = APIClient()
         refresh = RefreshToken.for_user(self.user)
@@ -170,3 +172,8 @@ class TaskURLTests(TestCase):
         """The unexisting_page/ page will return status 404."""
         response = self.authorized_client.get('/unexisting_page/')
         self.assertEquals(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_schema_available(self):
+        """The API schema /swagger.json is generated."""
+        response = self.guest_client.get('/swagger.json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
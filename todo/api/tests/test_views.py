@@ -1,8 +1,21 @@
-from django.test import Client, TestCase
+import csv
+import io
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.shortcuts import get_object_or_404
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from tasks.models import Task, User
+from api.views import TaskViewSet
+from tasks.archive import archive_batch
+from tasks.models import Task, TaskChange, User
 
 
 class TaskURLTests(TestCase):
@@ -18,7 +31,7 @@ class TaskURLTests(TestCase):
         cls.task = Task.objects.create(
             title='Title test task',
             description='Test description',
-            status='New',
+            status=Task.Status.NEW,
             user_id=cls.user
         )
         cls.full_data = {'title': 'Test Task',
@@ -28,6 +41,7 @@ class TaskURLTests(TestCase):
         cls.wrong_data = {'description': 'This is a test task'}
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = APIClient()
         refresh = RefreshToken.for_user(self.user)
@@ -43,7 +57,7 @@ class TaskURLTests(TestCase):
         self.assertEqual(len(tasks), 1)
         self.assertEqual(tasks[0].get('title'), TaskURLTests.task.title)
         self.assertEqual(tasks[0].get('description'), TaskURLTests.task.description)
-        self.assertEqual(tasks[0].get('status'), TaskURLTests.task.status)
+        self.assertEqual(tasks[0].get('status'), TaskURLTests.task.get_status_display())
         self.assertEqual(tasks[0].get('user_id'), TaskURLTests.task.user_id.id)
 
     def test_get_task_return_correct_context(self):
@@ -53,7 +67,7 @@ class TaskURLTests(TestCase):
         self.assertEqual(task_db.get('id'), TaskURLTests.task.id)
         self.assertEqual(task_db.get('title'), TaskURLTests.task.title)
         self.assertEqual(task_db.get('description'), TaskURLTests.task.description)
-        self.assertEqual(task_db.get('status'), TaskURLTests.task.status)
+        self.assertEqual(task_db.get('status'), TaskURLTests.task.get_status_display())
         self.assertEqual(task_db.get('user_id'), TaskURLTests.task.user_id.id)
 
     def test_get_my_task_return_correct_context(self):
@@ -119,7 +133,7 @@ class TaskURLTests(TestCase):
         task_db = response.json()
         self.assertEqual(task_db.get('title'), TaskURLTests.part_data.get('title'))
         self.assertEqual(task_db.get('description'), TaskURLTests.task.description)
-        self.assertEqual(task_db.get('status'), TaskURLTests.task.status)
+        self.assertEqual(task_db.get('status'), TaskURLTests.task.get_status_display())
         self.assertEqual(task_db.get('user_id'), TaskURLTests.task.user_id.id)
 
     def test_patch_task_change_in_db(self):
@@ -130,7 +144,7 @@ class TaskURLTests(TestCase):
         changed_task = response.json()
         self.assertEqual(changed_task.get('title'), TaskURLTests.part_data.get('title'))
         self.assertEqual(changed_task.get('description'), TaskURLTests.task.description)
-        self.assertEqual(changed_task.get('status'), TaskURLTests.task.status)
+        self.assertEqual(changed_task.get('status'), TaskURLTests.task.get_status_display())
         self.assertEqual(changed_task.get('user_id'), TaskURLTests.task.user_id.id)
 
     def test_patch_task_change_status_completed(self):
@@ -171,6 +185,22 @@ class TaskURLTests(TestCase):
                 response = self.authorized_client.get(url_pattern)
                 self.assertEqual(len(response.json()['results']), value)
 
+    def test_status_is_stored_as_code(self):
+        """Status label from the request is stored as the status code."""
+        response = self.authorized_client.post(
+            '/api/tasks/', {'title': 'Test Task2', 'status': 'In Progress'})
+        self.assertEqual(response.json().get('status'), 'In Progress')
+        task = Task.objects.get(pk=response.json().get('id'))
+        self.assertEqual(task.status, Task.Status.PROGRESS)
+
+    def test_unknown_status(self):
+        """Unknown status label is rejected by create and filtration."""
+        response = self.authorized_client.post(
+            '/api/tasks/', {'title': 'Test Task2', 'status': 'Done'})
+        self.assertEqual(response.status_code, 400)
+        response = self.authorized_client.get('/api/tasks/?status=Done')
+        self.assertEqual(response.status_code, 400)
+
 
 # Checking the paginator
 class PaginatorViewsTest(TestCase):
@@ -188,6 +218,7 @@ class PaginatorViewsTest(TestCase):
             )
 
     def setUp(self):
+        cache.clear()
         self.authorized_client = APIClient()
         refresh = RefreshToken.for_user(self.user)
         self.authorized_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
@@ -204,3 +235,607 @@ class PaginatorViewsTest(TestCase):
             with self.subTest(value=value):
                 response = self.authorized_client.get(url_pattern)
                 self.assertEqual(len(response.json()['results']), value)
+
+    def test_cursor_paginator(self):
+        """Cursor mode of /api/tasks/ and /api/tasks/my/ walks all tasks without count."""
+        for url in ('/api/tasks/', '/api/tasks/my/'):
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url, {'pagination': 'cursor'})
+                first_page = response.json()
+                self.assertNotIn('count', first_page)
+                self.assertIsNone(first_page['previous'])
+                self.assertEqual(len(first_page['results']), 10)
+                second_page = self.authorized_client.get(first_page['next']).json()
+                self.assertEqual(len(second_page['results']), 3)
+                self.assertIsNone(second_page['next'])
+                titles = [task['title'] for task in first_page['results'] + second_page['results']]
+                self.assertEqual(len(set(titles)), 13)
+
+    def test_cursor_paginator_estimated_count(self):
+        """Cursor mode returns count key only when an estimate is requested."""
+        response = self.authorized_client.get(
+            '/api/tasks/', {'pagination': 'cursor', 'count': 'estimate'})
+        self.assertIn('count', response.json())
+
+
+# Checking the bulk endpoints
+class BulkViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        cls.user2 = User.objects.create_user(
+            username='auth2', first_name='auth2', password='321qazxsw'
+        )
+        cls.task = Task.objects.create(title='Title test task', user_id=cls.user)
+        cls.task2 = Task.objects.create(title='Title test task2', user_id=cls.user2)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.authorized_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_bulk_create(self):
+        """POST request /api/tasks/bulk/ creates all tasks of the list."""
+        data = [{'title': 'Bulk task1'}, {'title': 'Bulk task2', 'status': 'Completed'}]
+        response = self.authorized_client.post('/api/tasks/bulk/', data, format='json')
+        self.assertEqual(response.status_code, 201)
+        tasks = response.json()
+        self.assertEqual([task['title'] for task in tasks], ['Bulk task1', 'Bulk task2'])
+        self.assertEqual(tasks[1]['status'], 'Completed')
+        self.assertTrue(all(task['id'] for task in tasks))
+        self.assertEqual(Task.objects.filter(user_id=self.user).count(), 3)
+
+    def test_bulk_create_item_errors(self):
+        """POST request /api/tasks/bulk/ reports errors per item and creates nothing."""
+        data = [{'title': 'Bulk task1'}, {'description': 'No title'}]
+        response = self.authorized_client.post('/api/tasks/bulk/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn('title', errors[1])
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_bulk_not_list(self):
+        """Request /api/tasks/bulk/ with a body that is not a list returns status 400."""
+        response = self.authorized_client.post(
+            '/api/tasks/bulk/', {'title': 'Bulk task1'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_update(self):
+        """PATCH request /api/tasks/bulk/ updates all tasks of the list."""
+        new_task = Task.objects.create(title='Title test task3', user_id=self.user)
+        data = [
+            {'id': self.task.id, 'status': 'In Progress'},
+            {'id': new_task.id, 'title': 'Changed title'},
+        ]
+        response = self.authorized_client.patch('/api/tasks/bulk/', data, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.task.refresh_from_db()
+        new_task.refresh_from_db()
+        self.assertEqual(self.task.status, Task.Status.PROGRESS)
+        self.assertEqual(new_task.title, 'Changed title')
+
+    def test_bulk_update_non_author(self):
+        """PATCH request /api/tasks/bulk/ with a task of other author changes nothing."""
+        data = [
+            {'id': self.task.id, 'title': 'Changed title'},
+            {'id': self.task2.id, 'title': 'Changed title'},
+            {'id': 0, 'title': 'Changed title'},
+        ]
+        response = self.authorized_client.patch('/api/tasks/bulk/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn('detail', errors[1])
+        self.assertIn('id', errors[2])
+        self.assertFalse(Task.objects.filter(title='Changed title').exists())
+
+    def test_bulk_delete(self):
+        """DELETE request /api/tasks/bulk/ deletes only tasks of the author."""
+        new_task = Task.objects.create(title='Title test task3', user_id=self.user)
+        response = self.authorized_client.delete(
+            '/api/tasks/bulk/', [self.task.id, self.task2.id], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Task.objects.count(), 3)
+        response = self.authorized_client.delete(
+            '/api/tasks/bulk/', [self.task.id, new_task.id], format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(list(Task.objects.all()), [self.task2])
+
+
+# Checking the incremental sync
+class ChangesViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        cls.user2 = User.objects.create_user(
+            username='auth2', first_name='auth2', password='321qazxsw'
+        )
+        cls.task = Task.objects.create(title='Title test task', user_id=cls.user)
+        cls.task2 = Task.objects.create(title='Title test task2', user_id=cls.user)
+        Task.objects.create(title='Title test task3', user_id=cls.user2)
+        # The changes of the setup are committed.
+        TaskChange.objects.update(created=timezone.now() - timedelta(minutes=1))
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.authorized_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_full_sync(self):
+        """GET request /api/tasks/changes/ without token returns all user tasks."""
+        response = self.authorized_client.get('/api/tasks/changes/')
+        data = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {task['id'] for task in data['updated']}, {self.task.id, self.task2.id})
+        self.assertEqual(data['deleted'], [])
+        self.assertTrue(data['token'])
+
+    @override_settings(TASKS_CHANGES_SETTLE_SECONDS=0)
+    def test_changes_since_token(self):
+        """GET request /api/tasks/changes/?since= returns only the later changes."""
+        token = self.authorized_client.get('/api/tasks/changes/').json()['token']
+        response = self.authorized_client.get('/api/tasks/changes/', {'since': token})
+        self.assertEqual(response.json()['updated'], [])
+        self.assertEqual(response.json()['token'], token)
+        self.authorized_client.patch(f'/api/tasks/{self.task.id}/', {'title': 'Changed'})
+        self.authorized_client.delete(f'/api/tasks/{self.task2.id}/')
+        new_task = self.authorized_client.post('/api/tasks/', {'title': 'New'}).json()
+        self.authorized_client.patch(
+            '/api/tasks/bulk/', [{'id': new_task['id'], 'status': 'Completed'}], format='json')
+        data = self.authorized_client.get('/api/tasks/changes/', {'since': token}).json()
+        updated = {task['id']: task for task in data['updated']}
+        self.assertEqual(set(updated), {self.task.id, new_task['id']})
+        self.assertEqual(updated[self.task.id]['title'], 'Changed')
+        self.assertEqual(updated[new_task['id']]['status'], 'Completed')
+        self.assertEqual(data['deleted'], [self.task2.id])
+        self.assertGreater(int(data['token']), int(token))
+        data = self.authorized_client.get('/api/tasks/changes/', {'since': data['token']}).json()
+        self.assertEqual((data['updated'], data['deleted']), ([], []))
+
+    def test_changes_are_per_user(self):
+        """Changes of other user are not returned."""
+        token = self.authorized_client.get('/api/tasks/changes/').json()['token']
+        Task.objects.create(title='Other task', user_id=self.user2)
+        data = self.authorized_client.get('/api/tasks/changes/', {'since': token}).json()
+        self.assertEqual(data['updated'], [])
+
+    def test_token_waits_for_earlier_changes(self):
+        """The token does not pass recent changes, an earlier one may be in progress."""
+        token = self.authorized_client.get('/api/tasks/changes/').json()['token']
+        self.authorized_client.patch(f'/api/tasks/{self.task.id}/', {'title': 'Changed'})
+        data = self.authorized_client.get('/api/tasks/changes/', {'since': token}).json()
+        self.assertEqual([task['id'] for task in data['updated']], [self.task.id])
+        self.assertEqual(data['token'], token)
+        self.assertFalse(data['has_more'])
+        with override_settings(TASKS_CHANGES_SETTLE_SECONDS=0):
+            data = self.authorized_client.get('/api/tasks/changes/', {'since': token}).json()
+        self.assertEqual([task['id'] for task in data['updated']], [self.task.id])
+        self.assertGreater(int(data['token']), int(token))
+
+    def test_full_sync_is_paged(self):
+        """GET request /api/tasks/changes/ without token returns the tasks a page at a time."""
+        ids, token = [], None
+        with mock.patch.object(TaskViewSet, 'changes_max_size', 1):
+            for _ in range(3):
+                params = {} if token is None else {'since': token}
+                data = self.authorized_client.get('/api/tasks/changes/', params).json()
+                ids += [task['id'] for task in data['updated']]
+                token = data['token']
+                if not data['has_more']:
+                    break
+        self.assertEqual(ids, [self.task.id, self.task2.id])
+        self.assertEqual(token, str(TaskChange.objects.filter(user_id=self.user.id).latest('id').id))
+
+    def test_invalid_token(self):
+        """GET request /api/tasks/changes/ with invalid token returns status 400."""
+        for since in ('abc', '-1', '1.', '1.x', '.1'):
+            with self.subTest(since=since):
+                response = self.authorized_client.get('/api/tasks/changes/', {'since': since})
+                self.assertEqual(response.status_code, 400)
+
+
+# Checking the export
+class ExportViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        cls.user2 = User.objects.create_user(
+            username='auth2', first_name='auth2', password='321qazxsw'
+        )
+        cls.task = Task.objects.create(
+            title='Title, "quoted"', description='Line\nbreak', user_id=cls.user)
+        cls.task2 = Task.objects.create(
+            title='Title test task2', status=Task.Status.COMPLETED, user_id=cls.user)
+        Task.objects.create(title='Title test task3', user_id=cls.user2)
+
+    def setUp(self):
+        self.authorized_client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.authorized_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def get_content(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        """GET request /api/tasks/export/ streams user tasks as NDJSON."""
+        response = self.authorized_client.get('/api/tasks/export/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        rows = [json.loads(line) for line in self.get_content(response).splitlines()]
+        expected = self.authorized_client.get('/api/tasks/my/').json()['results']
+        self.assertEqual(rows, expected)
+
+    def test_export_csv(self):
+        """GET request /api/tasks/export/?type=csv streams user tasks as CSV."""
+        response = self.authorized_client.get('/api/tasks/export/', {'type': 'csv'})
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        rows = list(csv.reader(io.StringIO(self.get_content(response))))
+        self.assertEqual(rows[0], ['id', 'title', 'description', 'status', 'user_id'])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[2][1:4], ['Title, "quoted"', 'Line\nbreak', 'New'])
+
+    def test_export_filtered(self):
+        """GET request /api/tasks/export/ is filtered by status."""
+        response = self.authorized_client.get('/api/tasks/export/', {'status': 'Completed'})
+        rows = self.get_content(response).splitlines()
+        self.assertEqual([json.loads(row)['id'] for row in rows], [self.task2.id])
+
+    def test_export_wrong_type(self):
+        """GET request /api/tasks/export/ with unknown type returns status 400."""
+        response = self.authorized_client.get('/api/tasks/export/', {'type': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+
+class SearchViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        cls.user2 = User.objects.create_user(
+            username='auth2', first_name='auth2', password='321qazxsw'
+        )
+        cls.task = Task.objects.create(
+            title='Buy milk', description='Milk and bread', user_id=cls.user)
+        cls.task2 = Task.objects.create(
+            title='Call mother', description='About the milk', user_id=cls.user)
+        cls.task3 = Task.objects.create(
+            title='Buy bread', description='', user_id=cls.user2)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.authorized_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def search(self, url, query):
+        response = self.authorized_client.get(url, {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [task['id'] for task in response.json()['results']]
+
+    def test_search(self):
+        """GET request /api/tasks/?search= finds whole words, short queries as a part."""
+        cases = {
+            'bread': {self.task.id, self.task3.id},
+            'BUY milk': {self.task.id},
+            'mother': {self.task2.id},
+            'mot': {self.task2.id},
+            'moth': set(),
+            'missing': set(),
+        }
+        for query, expected in cases.items():
+            with self.subTest(query=query):
+                self.assertEqual(set(self.search('/api/tasks/', query)), expected)
+
+    def test_search_is_ranked(self):
+        """Tasks matching the query more often come first."""
+        self.assertEqual(
+            self.search('/api/tasks/', 'milk'), [self.task.id, self.task2.id])
+
+    def test_search_my(self):
+        """GET request /api/tasks/my/?search= finds only the user tasks."""
+        self.assertEqual(self.search('/api/tasks/my/', 'bread'), [self.task.id])
+        self.assertEqual(
+            self.search('/api/tasks/my/?status=New', 'bread'), [self.task.id])
+
+    def test_search_follows_changes(self):
+        """Created, changed and deleted tasks are searched as they are now."""
+        task = Task.objects.create(title='Walk the dog', user_id=self.user)
+        self.assertEqual(self.search('/api/tasks/', 'dog'), [task.id])
+        task.title = 'Walk the cat'
+        task.save()
+        self.assertEqual(self.search('/api/tasks/', 'dog'), [])
+        cache.clear()
+        self.assertEqual(self.search('/api/tasks/', 'cat'), [task.id])
+        task.delete()
+        self.assertEqual(self.search('/api/tasks/', 'cat'), [])
+
+    def test_search_ranks_all_matches(self):
+        """A better match comes first however many newer matches there are."""
+        Task.objects.bulk_create([
+            Task(title=f'Task {number}', description='Some milk', user_id=self.user)
+            for number in range(20)
+        ])
+        self.assertEqual(self.search('/api/tasks/', 'milk')[0], self.task.id)
+
+    @override_settings(TASKS_SEARCH_MAX_MATCHES=1)
+    def test_search_ranks_newest_matches(self):
+        """Only the newest matches are ranked and returned."""
+        self.assertEqual(self.search('/api/tasks/', 'milk'), [self.task2.id])
+
+    def test_search_equal_ranks(self):
+        """Equally ranked tasks come newest first."""
+        Task.objects.bulk_create([
+            Task(title='Feed the fish', user_id=self.user) for _ in range(3)
+        ])
+        Task.objects.filter(title='Feed the fish').update(created=timezone.now())
+        ids = Task.objects.filter(title='Feed the fish').values_list('id', flat=True)
+        self.assertEqual(
+            self.search('/api/tasks/', 'fish'), sorted(ids, reverse=True))
+
+    def test_short_search(self):
+        """GET request with a search shorter than 3 characters returns 400."""
+        response = self.authorized_client.get('/api/tasks/', {'search': 'mi'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('search', response.json())
+
+
+class StatsViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        cls.user2 = User.objects.create_user(
+            username='auth2', first_name='auth2', password='321qazxsw'
+        )
+        cls.task = Task.objects.create(title='Title test task', user_id=cls.user)
+        cls.task2 = Task.objects.create(title='Title test task2', user_id=cls.user2)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.authorized_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def get_stats(self):
+        response = self.authorized_client.get('/api/tasks/stats/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def assertCounts(self, new, progress, completed):
+        self.assertEqual(self.get_stats(), {
+            'count': new + progress + completed,
+            'statuses': {'New': new, 'In Progress': progress, 'Completed': completed},
+        })
+
+    def test_stats(self):
+        """GET request /api/tasks/stats/ counts the user tasks by status."""
+        self.assertCounts(1, 0, 0)
+
+    def test_stats_follow_changes(self):
+        """Created, changed, completed and deleted tasks change the counts."""
+        client = self.authorized_client
+        response = client.post('/api/tasks/', {'title': 'Task', 'status': 'In Progress'})
+        task_id = response.json()['id']
+        self.assertCounts(1, 1, 0)
+        client.patch(f'/api/tasks/{task_id}/', {'title': 'Changed'})
+        self.assertCounts(1, 1, 0)
+        client.patch(f'/api/tasks/{task_id}/completed/')
+        self.assertCounts(1, 0, 1)
+        client.put(f'/api/tasks/{task_id}/', {'title': 'Put', 'status': 'New'})
+        self.assertCounts(2, 0, 0)
+        client.delete(f'/api/tasks/{task_id}/')
+        self.assertCounts(1, 0, 0)
+
+    def test_stats_follow_bulk_changes(self):
+        """Tasks written in bulk change the counts."""
+        client = self.authorized_client
+        response = client.post(
+            '/api/tasks/bulk/', [{'title': 'A'}, {'title': 'B', 'status': 'Completed'}],
+            format='json')
+        ids = [task['id'] for task in response.json()]
+        self.assertCounts(2, 0, 1)
+        client.patch(
+            '/api/tasks/bulk/',
+            [{'id': ids[0], 'status': 'In Progress'}, {'id': self.task.id, 'title': 'A'}],
+            format='json')
+        self.assertCounts(1, 1, 1)
+        client.delete('/api/tasks/bulk/', ids, format='json')
+        self.assertCounts(1, 0, 0)
+
+    def test_stats_follow_concurrent_changes(self):
+        """A write counts the task down from the status it overwrites."""
+        url = f'/api/tasks/{self.task.id}/'
+        perform_update = TaskViewSet.perform_update
+
+        def complete_first(view, serializer):
+            # The task was loaded as New, another request completes it.
+            self.authorized_client.patch(f'{url}completed/')
+            perform_update(view, serializer)
+
+        with mock.patch.object(TaskViewSet, 'perform_update', complete_first):
+            response = self.authorized_client.patch(url, {'status': 'In Progress'})
+        self.assertEqual(response.status_code, 200)
+        self.assertCounts(0, 1, 0)
+
+    def test_stats_follow_concurrent_completion(self):
+        """Completing a task counts it down from the status it has now."""
+        url = f'/api/tasks/{self.task.id}/'
+        get_task = get_object_or_404
+
+        def change_first(*args, **kwargs):
+            # The task was loaded as New, another request changes it.
+            task = get_task(*args, **kwargs)
+            self.authorized_client.patch(url, {'status': 'In Progress'})
+            return task
+
+        with mock.patch('api.views.get_object_or_404', change_first):
+            response = self.authorized_client.patch(f'{url}completed/')
+        self.assertEqual(response.status_code, 200)
+        self.assertCounts(0, 0, 1)
+
+    def test_stats_of_other_users(self):
+        """Counts of other users do not change with the user tasks."""
+        Task.objects.create(title='Title test task3', user_id=self.user2)
+        self.task.delete()
+        self.assertCounts(0, 0, 0)
+        self.assertEqual(self.user2.task_stats.new, 2)
+
+
+class SparseFieldsViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        cls.task = Task.objects.create(
+            title='Title test task', description='Long description', user_id=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.authorized_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_fields(self):
+        """GET request with ?fields= returns only these fields, in the usual order."""
+        expected = {'id': self.task.id, 'title': 'Title test task', 'status': 'New'}
+        for url in ('/api/tasks/', '/api/tasks/my/', '/api/tasks/?pagination=cursor'):
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url, {'fields': 'status, title,id'})
+                self.assertEqual(response.status_code, 200)
+                task, = response.json()['results']
+                self.assertEqual(list(task), ['id', 'title', 'status'])
+                self.assertEqual(task, expected)
+        response = self.authorized_client.get(
+            f'/api/tasks/{self.task.id}/', {'fields': 'id,title,status'})
+        self.assertEqual(response.json(), expected)
+
+    def test_fields_are_not_read(self):
+        """Columns of the fields that are not asked for are not read."""
+        for url in ('/api/tasks/', f'/api/tasks/{self.task.id}/'):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    self.authorized_client.get(url, {'fields': 'id,title'})
+                self.assertFalse(any(
+                    'description' in query['sql'] for query in queries))
+
+    def test_fields_etag(self):
+        """The ETag of a task depends on the fields."""
+        url = f'/api/tasks/{self.task.id}/'
+        etag = self.authorized_client.get(url)['ETag']
+        self.assertNotEqual(self.authorized_client.get(url, {'fields': 'id'})['ETag'], etag)
+
+    def test_unknown_fields(self):
+        """GET request with unknown fields returns 400."""
+        for url in ('/api/tasks/', '/api/tasks/my/', f'/api/tasks/{self.task.id}/'):
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url, {'fields': 'id,secret'})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('secret', response.json()['fields'][0])
+
+
+class ArchiveViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321'
+        )
+        cls.user2 = User.objects.create_user(
+            username='auth2', first_name='auth2', password='321qazxsw'
+        )
+        cls.archived = Task.objects.create(
+            title='Archived task', status=Task.Status.COMPLETED, user_id=cls.user)
+        cls.archived2 = Task.objects.create(
+            title='Archived task2', status=Task.Status.COMPLETED, user_id=cls.user2)
+        cls.task = Task.objects.create(title='Title test task', user_id=cls.user)
+        archive_batch(timezone.now(), 10)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.authorized_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def get_ids(self, url, data=None):
+        response = self.authorized_client.get(url, data)
+        self.assertEqual(response.status_code, 200)
+        return [task['id'] for task in response.json()['results']]
+
+    def test_list(self):
+        """Archived tasks are listed only with ?include_archived=1."""
+        self.assertEqual(self.get_ids('/api/tasks/'), [self.task.id])
+        self.assertEqual(
+            self.get_ids('/api/tasks/', {'include_archived': 1}),
+            [self.task.id, self.archived2.id, self.archived.id])
+        self.assertEqual(
+            self.get_ids('/api/tasks/', {'include_archived': 1, 'status': 'Completed'}),
+            [self.archived2.id, self.archived.id])
+        self.assertEqual(
+            self.get_ids('/api/tasks/my/', {'include_archived': 'true'}),
+            [self.task.id, self.archived.id])
+        self.assertEqual(
+            self.get_ids('/api/tasks/my/', {'include_archived': 1, 'search': 'archived'}),
+            [self.archived.id])
+        # Whole words, as the tasks are searched.
+        self.assertEqual(
+            self.get_ids('/api/tasks/my/', {'include_archived': 1, 'search': 'archive'}),
+            [])
+
+    def test_same_fields(self):
+        """Archived tasks are represented as the tasks."""
+        response = self.authorized_client.get(
+            '/api/tasks/', {'include_archived': 1, 'fields': 'id,title,user_id'})
+        self.assertEqual(response.json()['results'][1], {
+            'id': self.archived2.id, 'title': 'Archived task2',
+            'user_id': self.user2.id})
+
+    def test_detail(self):
+        """An archived task is returned only with ?include_archived=1."""
+        url = f'/api/tasks/{self.archived.id}/'
+        self.assertEqual(self.authorized_client.get(url).status_code, 404)
+        response = self.authorized_client.get(url, {'include_archived': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['title'], 'Archived task')
+        response = self.authorized_client.delete(url, {'include_archived': 1})
+        self.assertEqual(response.status_code, 404)
+
+    def test_export(self):
+        """GET request /api/tasks/export/ streams the archived tasks last."""
+        response = self.authorized_client.get(
+            '/api/tasks/export/', {'include_archived': 1})
+        rows = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(row)['id'] for row in rows], [self.task.id, self.archived.id])
+
+    def test_cursor(self):
+        """Archived tasks are not paged by cursor."""
+        response = self.authorized_client.get(
+            '/api/tasks/', {'include_archived': 1, 'pagination': 'cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('include_archived', response.json())
+
+    def test_archiving_changes_lists(self):
+        """Archiving tasks drops the cached lists."""
+        Task.objects.filter(pk=self.task.pk).update(status=Task.Status.COMPLETED)
+        self.assertEqual(self.get_ids('/api/tasks/my/'), [self.task.id])
+        archive_batch(timezone.now(), 10)
+        self.assertEqual(self.get_ids('/api/tasks/my/'), [])
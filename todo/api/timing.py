@@ -0,0 +1,155 @@
+"""
+Timing of the phases of requests, on when REQUEST_TIMING is set.
+
+TimingMiddleware counts every request in api.metrics. A sample of
+REQUEST_TIMING_SAMPLE_RATE of the requests is timed by phase, auth, db,
+serialize, render and app, sent back in the Server-Timing header.
+"""
+import random
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from . import metrics
+
+PHASES = ('auth', 'db', 'serialize', 'render', 'app')
+
+current_timing = ContextVar('current_timing', default=None)
+
+_not_timed = nullcontext()
+
+
+class Phase:
+    """A phase of a request, the time of its queries left out."""
+
+    def __init__(self, timing, name):
+        self.timing = timing
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.db = self.timing.db
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        self.timing.phases[self.name] = (
+            self.timing.phases.get(self.name, 0)
+            + elapsed - (self.timing.db - self.db))
+
+
+class Timing:
+    """The phases and queries of a request."""
+
+    def __init__(self):
+        self.phases = {}
+        self.db = 0
+        self.queries = 0
+
+
+def phase(name):
+    """Return a context manager timing a phase of the current request."""
+    timing = current_timing.get()
+    if timing is None:
+        return _not_timed
+    return Phase(timing, name)
+
+
+def time_query(execute, sql, params, many, context):
+    """An execute wrapper adding a query to the timing of its request."""
+    timing = current_timing.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.db += time.perf_counter() - start
+        timing.queries += 1
+
+
+def install_query_timer(sender=None, connection=None, **kwargs):
+    """Time the queries of a connection, a connection_created receiver."""
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+def get_view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else 'unmatched'
+
+
+def server_timing(timing, total):
+    """Return the Server-Timing header of the phases, in milliseconds."""
+    durations = dict(timing.phases, db=timing.db)
+    durations['app'] = max(total - sum(durations.values()), 0)
+    parts = []
+    for name in PHASES:
+        part = f'{name};dur={durations.get(name, 0) * 1000:.2f}'
+        if name == 'db':
+            part += f';desc="{timing.queries} queries"'
+        parts.append(part)
+    parts.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(parts), durations
+
+
+class TimingMiddleware:
+    """Count and time requests, see the module docstring."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        connection_created.connect(install_query_timer)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        start, timing, token = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                current_timing.reset(token)
+        return self.finish(request, response, start, timing)
+
+    async def __acall__(self, request):
+        start, timing, token = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                current_timing.reset(token)
+        return self.finish(request, response, start, timing)
+
+    def start(self):
+        start = time.perf_counter()
+        if random.random() >= settings.REQUEST_TIMING_SAMPLE_RATE:
+            return start, None, None
+        # Connections of the thread opened before the middleware was
+        # loaded do not know the timer yet.
+        for connection in connections.all():
+            install_query_timer(connection=connection)
+        timing = Timing()
+        return start, timing, current_timing.set(timing)
+
+    def finish(self, request, response, start, timing):
+        total = time.perf_counter() - start
+        view = get_view_name(request)
+        size = None if response.streaming else len(response.content)
+        metrics.observe_request(
+            view, request.method, response.status_code, total, size)
+        if timing is not None:
+            header, durations = server_timing(timing, total)
+            response['Server-Timing'] = header
+            metrics.observe_phases(view, durations, timing.queries)
+        return response
@@ -1,7 +1,10 @@
 from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
-from .views import TaskViewSet
+from . import async_views
+from .batch import BatchView
+from .events import EventTicketView
+from .views import TaskViewSet, prometheus_metrics
 
 app_name = 'api'
 
@@ -9,6 +12,16 @@ router = DefaultRouter()
 router.register(r'tasks', TaskViewSet, basename='tasks')
 
 urlpatterns = [
+    path('async/tasks/', async_views.task_list, name='async-tasks-list'),
+    path('async/tasks/my/', async_views.my_tasks, name='async-tasks-my'),
+    path('async/tasks/<int:pk>/', async_views.task_detail,
+         name='async-tasks-detail'),
+    path('async/tasks/<int:pk>/completed/', async_views.task_completed,
+         name='async-tasks-completed'),
+    path('batch/', BatchView.as_view(), name='batch'),
+    path('events/tickets/', EventTicketView.as_view(),
+         name='event-tickets'),
+    path('metrics/', prometheus_metrics, name='metrics'),
     path('', include(router.urls)),
     re_path(r'^auth/', include('djoser.urls')),
     re_path(r'^auth/', include('djoser.urls.jwt')),
@@ -1,15 +1,209 @@
+import csv
+import json
+from datetime import timedelta
+from itertools import chain
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
+from prometheus_client import CONTENT_TYPE_LATEST
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.generics import get_object_or_404 as get_or_404
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 
-from tasks.models import Task
+from tasks.models import ArchivedTask, Task, TaskChange
+from tasks.signals import bulk_delete, tasks_changed
+from tasks.stats import get_stats
+from . import metrics
+from .authentication import StatelessJWTAuthentication
+from .cache import task_list_cache
+from .conditional import (content_etag, list_etag, make_etag, not_modified,
+                          set_validators)
+from .filters import (TaskFilter, TaskSearchFilter, filter_my_tasks,
+                      filter_tasks)
+from .pagination import TaskCursorPagination
 from .permissions import IsAuthorOrReadOnly
-from .serializers import TaskSerializer
+from .renderers import FastJSONRenderer
+from .replicas import get_read_database
+from .serializers import (TaskSerializer, get_task_fields,
+                          get_task_row_encoder)
+from .timing import phase
+
+
+class Echo:
+    """A file-like object that returns what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def parse_pk(value):
+    """Return value as a task id, or None when it is not one."""
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def settled_before():
+    """Return the time before which logged changes are committed."""
+    return timezone.now() - timedelta(
+        seconds=settings.TASKS_CHANGES_SETTLE_SECONDS)
+
+
+def get_change_token(user_id):
+    """Return the change token of the tasks of the user as of now."""
+    # Changes are logged in their transactions, which may commit out of
+    # order: a token passing a change in progress would lose it.
+    return TaskChange.objects.filter(
+        user_id=user_id, created__lte=settled_before(),
+    ).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def parse_change_token(value):
+    """
+    Return the change id and the last task id of a change token.
+
+    A token of a first sync not done yet is '<change id>.<task id>'.
+    """
+    if value is None:
+        return 0, None
+    token, dot, after = value.partition('.')
+    token, after = parse_pk(token), parse_pk(after) if dot else None
+    if token is None or token < 0 or dot and (after is None or after < 0):
+        raise ValidationError({'since': ['Invalid change token.']})
+    return token, after
+
+
+def include_archived(request):
+    """Whether the client asks for the archived tasks too."""
+    value = request.query_params.get('include_archived', '')
+    return value.lower() in ('1', 'true')
+
+
+def get_archived_task(request, pk, fields):
+    """
+    Return an archived task when the client asks for archived tasks, see
+    tasks.archive, or raise Http404.
+    """
+    if not include_archived(request):
+        raise Http404
+    return get_or_404(ArchivedTask.objects.only(*fields, 'updated'), pk=pk)
+
+
+def cached_list(request, scope, build_response):
+    """Return a list of tasks with its ETag, from the cache when possible."""
+    replica = get_read_database() != DEFAULT_DB_ALIAS
+    cached = task_list_cache.get(scope, request)
+    if cached is not None and cached.get('replica') and not replica:
+        cached = None
+    if cached is not None:
+        etag = cached['etag']
+    else:
+        # A replica may not have the writes of the version yet, its lists
+        # are tagged by their content.
+        version = None if replica else task_list_cache.get_version(scope)
+        etag = None if version is None else list_etag(request, version)
+    response = None if etag is None else not_modified(request, etag)
+    if response is not None:
+        return response
+    if cached is None:
+        response = build_response()
+        if etag is None:
+            etag = content_etag(request, response.data)
+            unchanged = not_modified(request, etag)
+            if unchanged is not None:
+                return unchanged
+        if response.status_code == status.HTTP_200_OK:
+            task_list_cache.set(
+                scope, request,
+                {'etag': etag, 'data': response.data, 'replica': replica},
+                settings.DATABASE_REPLICA_MAX_LAG if replica else None)
+        response['X-Cache'] = 'MISS'
+    else:
+        response = Response(cached['data'], headers={'X-Cache': 'HIT'})
+    return set_validators(response, etag)
+
+
+def paginate_rows(request, tasks, paginator, view=None, fields=None,
+                  archived=None):
+    """Return a page of tasks and archived tasks, read with values()."""
+    fields = fields or TaskSerializer.Meta.fields
+    # The cursor of a page is taken from its ordering fields.
+    ordering = [
+        field.lstrip('-') for field in getattr(paginator, 'ordering', ())]
+    if archived is None:
+        rows = tasks.values(*dict.fromkeys((*fields, *ordering)))
+    elif ordering:
+        # A cursor filters the rows, which a union cannot be.
+        raise ValidationError({'include_archived': [
+            'Archived tasks are paged by number, not by cursor.']})
+    else:
+        columns = dict.fromkeys((*fields, 'created', 'id'))
+        rows = tasks.order_by().values(*columns).union(
+            archived.order_by().values(*columns), all=True,
+        ).order_by('-created', '-id')
+    page = paginator.paginate_queryset(rows, request, view)
+    encode = get_task_row_encoder(fields)
+    with phase('serialize'):
+        results = [encode(row) for row in (rows if page is None else page)]
+    if page is None:
+        return Response(results)
+    return paginator.get_paginated_response(results)
+
+
+def complete_task(request, pk):
+    """Change the status of a task of the user to completed."""
+    task = get_object_or_404(Task, pk=pk)
+    if task.user_id_id != request.user.id:
+        return Response('Forbiden! You are not the owner of this object',
+                        status=status.HTTP_403_FORBIDDEN)
+    if task.status == Task.Status.COMPLETED:
+        return Response('Already done!', status=status.HTTP_409_CONFLICT)
+    loaded = task.status
+    task.status = Task.Status.COMPLETED
+    task.updated = timezone.now()
+    with transaction.atomic():
+        changed = Task.objects.filter(
+            pk=task.pk, user_id=request.user.id, status=loaded,
+        ).update(status=task.status, updated=task.updated)
+        if not changed:
+            # Changed since it was loaded, the task is counted down in
+            # TaskStats from the status it has now.
+            Task.lock_stored_status([task])
+            if task._stored_status not in {
+                    (request.user.id, Task.Status.NEW),
+                    (request.user.id, Task.Status.PROGRESS)}:
+                return Response('Already done!',
+                                status=status.HTTP_409_CONFLICT)
+            Task.objects.filter(pk=task.pk).update(
+                status=task.status, updated=task.updated)
+        # update() sends no post_save signal.
+        tasks_changed.send(sender=Task, tasks=[task], action='update')
+    serializer = TaskSerializer(task, context={'request': request})
+    return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+FIELDS_PARAMETER = openapi.Parameter(
+    'fields', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+    description=(
+        'Comma separated fields of the tasks to return, e.g. id,title,status. '
+        'All fields by default.'))
+ARCHIVED_PARAMETER = openapi.Parameter(
+    'include_archived', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+    enum=['1'],
+    description='Set to 1 to return the archived tasks too.')
 
 
 class TaskViewSet(viewsets.ModelViewSet):
@@ -25,6 +219,26 @@ class TaskViewSet(viewsets.ModelViewSet):
         To access all my tasks:
         GET /tasks/my/
 
+        To count my tasks by status:
+        GET /tasks/stats/
+
+        To search tasks by the words of the title and description:
+        GET /tasks/?search={words}
+        GET /tasks/my/?search={words}
+
+        To page through tasks by cursor instead of page number:
+        GET /tasks/?pagination=cursor
+
+        To get only some fields of the tasks:
+        GET /tasks/?fields=id,title,status
+        GET /tasks/my/?fields=id,title,status
+        GET /tasks/{id}/?fields=id,title,status
+
+        To get the archived tasks too:
+        GET /tasks/?include_archived=1
+        GET /tasks/my/?include_archived=1
+        GET /tasks/{id}/?include_archived=1
+
         To retrieve a specific task:
         GET /tasks/{id}/
 
@@ -37,44 +251,255 @@ class TaskViewSet(viewsets.ModelViewSet):
         To partially update an existing task:
         PATCH /tasks/{id}/
 
+        To download all my tasks as NDJSON or CSV:
+        GET /tasks/export/?type=ndjson
+        GET /tasks/export/?type=csv
+
+        To get the tasks changed since a change token:
+        GET /tasks/changes/?since={token}
+
         To mark a task as completed:
         PATCH /tasks/{id}/completed
 
         To delete an existing task:
         DELETE /tasks/{id}/
+
+        To create, update or delete a list of tasks in one request:
+        POST /tasks/bulk/
+        PATCH /tasks/bulk/
+        DELETE /tasks/bulk/
     """
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
+    authentication_classes = (StatelessJWTAuthentication,)
     permission_classes = (IsAuthorOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
-    filterset_fields = ('status',)
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+    filter_backends = (DjangoFilterBackend, TaskSearchFilter)
+    filterset_class = TaskFilter
+    bulk_max_size = 1000
+    changes_max_size = 1000
+    export_chunk_size = 2000
+    export_fields = ('id', 'title', 'description', 'status', 'user_id')
+
+    @property
+    def paginator(self):
+        """Use keyset pagination when the client asks for it."""
+        if not hasattr(self, '_paginator'):
+            request = self.request
+            if (request is not None
+                    and request.query_params.get('pagination') == 'cursor'):
+                self._paginator = TaskCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_queryset(self):
+        tasks = super().get_queryset()
+        if self.action == 'retrieve':
+            # updated makes the ETag and Last-Modified of the task.
+            tasks = tasks.only(*get_task_fields(self.request), 'updated')
+        return tasks
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            if self.action != 'retrieve':
+                raise
+        task = get_archived_task(
+            self.request, self.kwargs['pk'], get_task_fields(self.request))
+        self.check_object_permissions(self.request, task)
+        return task
+
+    def get_archived(self, filter_archived):
+        """The archived tasks filtered when the client asks for them."""
+        if not include_archived(self.request):
+            return None
+        return filter_archived(
+            self.request, ArchivedTask.objects.all(), self)
+
+    @swagger_auto_schema(
+        manual_parameters=[FIELDS_PARAMETER, ARCHIVED_PARAMETER])
+    def list(self, request, *args, **kwargs):
+        fields = get_task_fields(request)
+        tasks = self.filter_queryset(self.get_queryset())
+        archived = self.get_archived(filter_tasks)
+        return cached_list(
+            request, 'all',
+            lambda: paginate_rows(
+                request, tasks, self.paginator, self, fields, archived))
+
+    @swagger_auto_schema(
+        manual_parameters=[FIELDS_PARAMETER, ARCHIVED_PARAMETER])
+    def retrieve(self, request, *args, **kwargs):
+        fields = get_task_fields(request)
+        task = self.get_object()
+        etag = make_etag(task.pk, task.updated.isoformat(),
+                         request.accepted_renderer.format, ','.join(fields))
+        response = not_modified(request, etag, task.updated)
+        if response is None:
+            serializer = self.get_serializer(task, fields=fields)
+            response = set_validators(
+                Response(serializer.data), etag, task.updated)
+        return response
 
     def perform_create(self, serializer):
-        serializer.save(user_id=self.request.user)
+        serializer.save(user_id_id=self.request.user.id)
 
     def perform_update(self, serializer):
-        serializer.save(user_id=self.request.user)
+        serializer.save(user_id_id=self.request.user.id)
 
     @swagger_auto_schema(
             methods=['get'], operation_summary="My tasks",
-            operation_description="Get a list of all user tasks.")
+            operation_description="Get a list of all user tasks.",
+            manual_parameters=[FIELDS_PARAMETER, ARCHIVED_PARAMETER])
     @action(detail=False,)
     def my(self, request):
         """Get a list of all user tasks."""
-        tasks = Task.objects.filter(user_id=request.user.id)
-        status_contains = request.query_params.get('status')
-        if status_contains:
-            tasks = tasks.filter(status__icontains=status_contains)
-        paginator = PageNumberPagination()
-        page = paginator.paginate_queryset(tasks, request)
-        serializer = self.get_serializer(page, many=True)
-        data = {
-            'count': paginator.page.paginator.count,
-            'next': paginator.get_next_link(),
-            'previous': paginator.get_previous_link(),
-            'results': serializer.data
-        }
-        return Response(data, status=status.HTTP_200_OK)
+        fields = get_task_fields(request)
+        tasks = filter_my_tasks(
+            request, Task.objects.filter(user_id=request.user.id), self)
+        archived = self.get_archived(
+            lambda request, archived, view: filter_my_tasks(
+                request, archived.filter(user_id=request.user.id), view))
+        return cached_list(
+            request, f'user:{request.user.id}',
+            lambda: paginate_rows(
+                request, tasks, self.paginator, self, fields, archived))
+
+    @swagger_auto_schema(
+            methods=['get'], operation_summary="My task statistics",
+            operation_description=(
+                "Get the number of user tasks by status. The counts are kept "
+                "as the tasks change, reading them does not count the tasks."))
+    @action(detail=False,)
+    def stats(self, request):
+        """Get the number of user tasks by status."""
+        counts = get_stats(request.user.id).get_counts()
+        return Response({'count': sum(counts.values()), 'statuses': counts})
+
+    @swagger_auto_schema(
+            methods=['get'], operation_summary="Changed tasks",
+            operation_description=(
+                "Get the user tasks created, changed or deleted since a "
+                "change token. Without a token all user tasks are returned. "
+                "Pass the returned token to the next request."),
+            manual_parameters=[openapi.Parameter(
+                'since', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                description='Change token of the previous sync.')]
+    )
+    @action(detail=False,)
+    def changes(self, request):
+        """Get the user tasks changed since a change token."""
+        since = request.query_params.get('since')
+        token, after = parse_change_token(since)
+        if since is None or after is not None:
+            return self.snapshot(request, token, after)
+        changes = list(
+            TaskChange.objects.filter(user_id=request.user.id, id__gt=token)
+            .order_by('id').values_list('id', 'task_id', 'deleted', 'created')
+            [:self.changes_max_size + 1])
+        has_more = len(changes) > self.changes_max_size
+        changes = changes[:self.changes_max_size]
+        # The token does not pass the recent changes, an earlier change may
+        # still be in progress. They are returned again by the next sync.
+        settled = settled_before()
+        new_token = max(
+            (change_id for change_id, _, _, created in changes
+             if created <= settled), default=token)
+        deleted = {}
+        for _, task_id, is_deleted, _ in changes:
+            deleted[task_id] = is_deleted
+        tasks = Task.objects.filter(
+            user_id=request.user.id,
+            pk__in=[task_id for task_id, gone in deleted.items() if not gone])
+        updated = self.get_serializer(tasks, many=True).data
+        # A task missing here was deleted by a change after this batch.
+        found = {task['id'] for task in updated}
+        return Response({
+            'token': str(new_token),
+            'has_more': has_more and new_token > token,
+            'updated': updated,
+            'deleted': [
+                task_id for task_id in deleted if task_id not in found],
+        })
+
+    def snapshot(self, request, token, after):
+        """Get all user tasks, a page at a time, for a first sync."""
+        if after is None:
+            # Read the token first, so changes made while the tasks are read
+            # are returned again by the next sync instead of being lost.
+            token = get_change_token(request.user.id)
+        tasks = list(
+            Task.objects.filter(user_id=request.user.id, pk__gt=after or 0)
+            .order_by('pk')[:self.changes_max_size + 1])
+        has_more = len(tasks) > self.changes_max_size
+        tasks = tasks[:self.changes_max_size]
+        return Response({
+            'token': f'{token}.{tasks[-1].pk}' if has_more else str(token),
+            'has_more': has_more,
+            'updated': self.get_serializer(tasks, many=True).data,
+            'deleted': [],
+        })
+
+    def export_rows(self, tasks, export_type, archived=None):
+        """
+        Yield the tasks, then the archived ones, as lines of text, a chunk
+        of rows at a time.
+        """
+        labels = dict(Task.Status.choices)
+        if export_type == 'csv':
+            writer = csv.writer(Echo())
+            yield writer.writerow(self.export_fields)
+
+            def encode(row):
+                return writer.writerow(row.values())
+        else:
+            def encode(row):
+                return json.dumps(row, ensure_ascii=False) + '\n'
+        lines = []
+        rows = chain.from_iterable(
+            queryset.values(*self.export_fields).iterator(
+                chunk_size=self.export_chunk_size)
+            for queryset in (tasks, archived) if queryset is not None)
+        for row in rows:
+            row['status'] = labels[row['status']]
+            lines.append(encode(row))
+            if len(lines) == self.export_chunk_size:
+                yield ''.join(lines)
+                lines = []
+        yield ''.join(lines)
+
+    @swagger_auto_schema(
+            methods=['get'], operation_summary="Export my tasks",
+            operation_description=(
+                "Download all user tasks as newline delimited JSON or CSV. "
+                "The file is streamed, so it may be of any size."),
+            manual_parameters=[openapi.Parameter(
+                'type', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                enum=['ndjson', 'csv'], default='ndjson',
+                description='Format of the file.'), ARCHIVED_PARAMETER]
+    )
+    @action(detail=False,)
+    def export(self, request):
+        """Stream all user tasks as NDJSON or CSV."""
+        export_type = request.query_params.get('type', 'ndjson')
+        if export_type not in ('ndjson', 'csv'):
+            raise ValidationError({'type': ['Expected ndjson or csv.']})
+        tasks = self.filter_queryset(
+            Task.objects.filter(user_id=request.user.id))
+        archived = self.get_archived(
+            lambda request, archived, view: filter_tasks(
+                request, archived.filter(user_id=request.user.id), view))
+        content_type = {
+            'ndjson': 'application/x-ndjson', 'csv': 'text/csv'
+        }[export_type]
+        response = StreamingHttpResponse(
+            self.export_rows(tasks, export_type, archived),
+            content_type=f'{content_type}; charset=utf-8')
+        response['Content-Disposition'] = (
+            f'attachment; filename="tasks.{export_type}"')
+        return response
 
     @swagger_auto_schema(
             methods=['patch'], operation_summary="Task complete",
@@ -88,13 +513,153 @@ class TaskViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['patch'])
     def completed(self, request, pk=None):
         """Change the status of a specific user task to completed."""
-        task = get_object_or_404(Task, pk=pk)
-        if task.user_id != request.user:
-            return Response('Forbiden! You are not the owner of this object',
-                            status=status.HTTP_403_FORBIDDEN)
-        if task.status == 'Completed':
-            return Response('Already done!', status=status.HTTP_409_CONFLICT)
-        task.status = 'Completed'
-        task.save()
-        serializer = self.get_serializer(task)
+        return complete_task(request, pk)
+
+    def has_task_permission(self, task):
+        """Check the object permissions of the viewset for a task."""
+        return all(
+            permission.has_object_permission(self.request, self, task)
+            for permission in self.get_permissions()
+        )
+
+    def get_bulk_items(self):
+        """Return the list from the request body or raise an error."""
+        items = self.request.data
+        if not isinstance(items, list):
+            raise ValidationError(
+                {'non_field_errors': ['Expected a list of items.']})
+        if len(items) > self.bulk_max_size:
+            raise ValidationError({'non_field_errors': [
+                f'Ensure this list has no more than {self.bulk_max_size} '
+                f'items.'
+            ]})
+        return items
+
+    def get_bulk_tasks(self, items, ids):
+        """
+        Load the tasks referenced by a bulk request.
+
+        Return the tasks by id and a list of errors, one per item, with an
+        empty dict for the items that can be changed by the user.
+        """
+        tasks = Task.objects.select_related('user_id').in_bulk(
+            pk for pk in ids if pk is not None)
+        errors = []
+        for item, pk in zip(items, ids):
+            task = tasks.get(pk)
+            if pk is None:
+                errors.append({'id': ['A valid integer is required.']})
+            elif task is None:
+                errors.append({'id': ['Not found.']})
+            elif not self.has_task_permission(task):
+                errors.append({'detail': PermissionDenied.default_detail})
+            else:
+                errors.append({})
+        return tasks, errors
+
+    @swagger_auto_schema(
+            methods=['post'], operation_summary="Bulk create tasks",
+            operation_description="Create a list of tasks in one request.",
+            request_body=TaskSerializer(many=True),
+            responses={201: TaskSerializer(many=True)}
+    )
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Create a list of tasks in one transaction."""
+        serializer = self.get_serializer(
+            data=self.get_bulk_items(), many=True)
+        serializer.is_valid(raise_exception=True)
+        tasks = [
+            Task(user_id_id=request.user.id, **attrs)
+            for attrs in serializer.validated_data
+        ]
+        with transaction.atomic():
+            if connection.features.can_return_rows_from_bulk_insert:
+                Task.objects.bulk_create(tasks)
+                tasks_changed.send(sender=Task, tasks=tasks, action='create')
+            else:
+                # Without RETURNING the new ids are unknown after
+                # bulk_create, so save them one by one instead.
+                for task in tasks:
+                    task.save(force_insert=True)
+        serializer = self.get_serializer(tasks, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @bulk.mapping.patch
+    @swagger_auto_schema(
+            operation_summary="Bulk update tasks",
+            operation_description=(
+                "Partially update a list of tasks in one request. "
+                "Every item must contain the id of the task."),
+            request_body=TaskSerializer(many=True),
+            responses={200: TaskSerializer(many=True)}
+    )
+    def bulk_update(self, request):
+        """Partially update a list of tasks in one transaction."""
+        items = self.get_bulk_items()
+        ids = [
+            parse_pk(item.get('id')) if isinstance(item, dict) else None
+            for item in items
+        ]
+        tasks, errors = self.get_bulk_tasks(items, ids)
+        fields = set()
+        for index, (item, pk) in enumerate(zip(items, ids)):
+            if errors[index]:
+                continue
+            serializer = self.get_serializer(
+                tasks[pk], data=item, partial=True)
+            if not serializer.is_valid():
+                errors[index] = serializer.errors
+                continue
+            for attr, value in serializer.validated_data.items():
+                setattr(tasks[pk], attr, value)
+            tasks[pk].updated = timezone.now()
+            fields.update(serializer.validated_data)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        updated = [tasks[pk] for pk in dict.fromkeys(ids)]
+        if fields:
+            with transaction.atomic():
+                Task.lock_stored_status(updated)
+                Task.objects.bulk_update(updated, {*fields, 'updated'})
+                tasks_changed.send(
+                    sender=Task, tasks=updated, action='update')
+        serializer = self.get_serializer(updated, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @bulk.mapping.delete
+    @swagger_auto_schema(
+            operation_summary="Bulk delete tasks",
+            operation_description="Delete a list of tasks in one request.",
+            request_body=openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Schema(type=openapi.TYPE_INTEGER)
+            ),
+            responses={204: ''}
+    )
+    def bulk_destroy(self, request):
+        """Delete a list of tasks in one transaction."""
+        items = self.get_bulk_items()
+        ids = [parse_pk(item) for item in items]
+        tasks, errors = self.get_bulk_tasks(items, ids)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            Task.lock_stored_status(list(tasks.values()))
+            # Recorded once for all the tasks, see tasks.signals.
+            with bulk_delete():
+                Task.objects.filter(pk__in=tasks).delete()
+            tasks_changed.send(
+                sender=Task, tasks=list(tasks.values()), action='delete')
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def prometheus_metrics(request):
+    """The metrics of the requests in the Prometheus text format."""
+    if not settings.REQUEST_TIMING:
+        raise Http404
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(
+            request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    return HttpResponse(metrics.render(), content_type=CONTENT_TYPE_LATEST)
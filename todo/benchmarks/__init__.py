@@ -0,0 +1,82 @@
+"""
+Benchmarks of the todo API.
+
+Run a benchmark as a module from the directory with manage.py, e.g.::
+
+    python -m benchmarks.export --rows 10000 100000 1000000
+
+Benchmarks work on a throwaway test database created from DATABASES, so
+the data of the project is never touched.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+
+def setup():
+    """Configure Django for a standalone benchmark script."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todo.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database(keepdb=False):
+    """Create the test database for the benchmark and drop it after."""
+    from django.db import connection
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(
+            old_name, verbosity=0, keepdb=keepdb)
+
+
+def create_users(count, prefix='bench'):
+    """Create users with an unusable password and return them."""
+    from tasks.models import User
+    users = [
+        User(username=f'{prefix}{number}', first_name=f'{prefix}{number}')
+        for number in range(count)
+    ]
+    for user in users:
+        user.set_unusable_password()
+    User.objects.bulk_create(users, batch_size=1000)
+    return list(User.objects.filter(username__startswith=prefix))
+
+
+def create_tasks(users, count, batch_size=5000):
+    """Create count tasks spread over users, bypassing model signals."""
+    from tasks.models import Task
+    statuses = tuple(Task.Status)
+    batch = []
+    for number in range(count):
+        batch.append(Task(
+            title=f'Benchmark task {number}',
+            description=f'Description of benchmark task {number}',
+            status=statuses[number % len(statuses)],
+            user_id=users[number % len(users)],
+        ))
+        if len(batch) == batch_size:
+            Task.objects.bulk_create(batch)
+            batch = []
+    Task.objects.bulk_create(batch)
+
+
+def authorized_client(user):
+    """Return a test client sending a JWT of the user."""
+    from django.test import Client
+    from rest_framework_simplejwt.tokens import RefreshToken
+    token = RefreshToken.for_user(user).access_token
+    return Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+
+@contextmanager
+def timer():
+    """Measure the wall time of a block, in seconds, as result['seconds']."""
+    result = {}
+    start = time.perf_counter()
+    yield result
+    result['seconds'] = time.perf_counter() - start
@@ -0,0 +1,488 @@
+"""
+Latency, queries and memory of every route of the API.
+
+    python -m benchmarks.api --users 100 --tasks 100000 --requests 200 \\
+        --output results.json
+
+--users users with --tasks tasks spread over them are created, 10 ** 3
+to 10 ** 7 tasks, and every route of api.urls is requested --requests
+times, after --warmup requests, by the first of the users. For every
+route the p50, p95 and p99 latency is reported, and in a second pass of
+--profile requests the queries a request makes and the peak of memory it
+allocates: tracing the memory slows the requests down. Routes that
+change tasks get tasks of their own, each request changes others. The
+account routes that send mail or change the password of the user are
+left out.
+
+The list cache is disabled, so lists are read from the database, unless
+--cache is given. --output writes the results as JSON. --baseline
+compares the p50 of every route with the JSON of an earlier run, and
+exits with status 1 if a route got slower by more than --tolerance.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import tracemalloc
+from datetime import datetime, timezone
+
+from . import (authorized_client, create_tasks, create_users, setup,
+               test_database, timer)
+
+BULK_SIZE = 100
+
+PASSWORD = 'benchmark-password'
+
+ROUTES = {}
+
+
+def route(name, fresh=0):
+    """
+    Register a route of the benchmark.
+
+    The function sends one request from the session. fresh is the number
+    of tasks a request changes for good, given to it by session.fresh().
+    """
+    def register(func):
+        ROUTES[name] = (func, fresh)
+        return func
+    return register
+
+
+class QueryCounter:
+    """An execute wrapper counting the queries of every thread."""
+
+    def __init__(self):
+        self.count = 0
+        self.counting = False
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.counting:
+            with self.lock:
+                self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self, sender, connection, **kwargs):
+        """Count the queries of a connection, a connection_created receiver."""
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+class Session:
+    """The user of the benchmark, its clients and the tasks to request."""
+
+    def __init__(self, user):
+        from django.test import AsyncClient
+        from rest_framework_simplejwt.tokens import RefreshToken
+        from tasks.models import Task
+        self.user = user
+        self.client = authorized_client(user)
+        self.authorization = self.client.defaults['HTTP_AUTHORIZATION']
+        self.async_client = AsyncClient()
+        self.loop = asyncio.new_event_loop()
+        self.refresh = RefreshToken.for_user(user)
+        self.tasks = list(
+            Task.objects.filter(user_id=user).order_by('pk')
+            .values_list('pk', flat=True)[:1000])
+        self.numbers = itertools.count()
+        self.fresh_tasks = iter(())
+
+    def task(self, number):
+        """An existing task of the user, a different one every request."""
+        return self.tasks[number % len(self.tasks)]
+
+    def create_fresh(self, count):
+        """Create the tasks the next requests change for good."""
+        from tasks.models import Task
+        Task.objects.bulk_create([
+            Task(title=f'Fresh task {number}', user_id=self.user)
+            for number in range(count)
+        ])
+        self.fresh_tasks = iter(
+            Task.objects.filter(user_id=self.user).order_by('-pk')
+            .values_list('pk', flat=True)[:count])
+
+    def fresh(self, count=1):
+        return list(itertools.islice(self.fresh_tasks, count))
+
+    def request(self, method, path, data=None):
+        response = getattr(self.client, method)(
+            path, data, content_type='application/json')
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def async_request(self, method, path, data=None):
+        return self.loop.run_until_complete(
+            getattr(self.async_client, method)(
+                path, data, content_type='application/json',
+                authorization=self.authorization))
+
+
+@route('api-root')
+def api_root(session, number):
+    return session.request('get', '/api/')
+
+
+@route('tasks-list')
+def tasks_list(session, number):
+    return session.request('get', '/api/tasks/')
+
+
+@route('tasks-list-page')
+def tasks_list_page(session, number):
+    return session.request('get', '/api/tasks/?page=10')
+
+
+@route('tasks-list-cursor')
+def tasks_list_cursor(session, number):
+    return session.request('get', '/api/tasks/?pagination=cursor')
+
+
+@route('tasks-list-status')
+def tasks_list_status(session, number):
+    return session.request('get', '/api/tasks/?status=In Progress')
+
+
+@route('tasks-list-fields')
+def tasks_list_fields(session, number):
+    return session.request('get', '/api/tasks/?fields=id,title,status')
+
+
+@route('tasks-search')
+def tasks_search(session, number):
+    return session.request('get', f'/api/tasks/?search=task {number}')
+
+
+@route('tasks-my')
+def tasks_my(session, number):
+    return session.request('get', '/api/tasks/my/')
+
+
+@route('tasks-stats')
+def tasks_stats(session, number):
+    return session.request('get', '/api/tasks/stats/')
+
+
+@route('tasks-changes')
+def tasks_changes(session, number):
+    return session.request('get', '/api/tasks/changes/?since=1')
+
+
+@route('tasks-export')
+def tasks_export(session, number):
+    return session.request('get', '/api/tasks/export/')
+
+
+@route('tasks-detail')
+def tasks_detail(session, number):
+    return session.request('get', f'/api/tasks/{session.task(number)}/')
+
+
+@route('tasks-create')
+def tasks_create(session, number):
+    return session.request('post', '/api/tasks/', {
+        'title': f'Created task {number}',
+        'description': f'Description of created task {number}',
+    })
+
+
+@route('tasks-update')
+def tasks_update(session, number):
+    return session.request('put', f'/api/tasks/{session.task(number)}/', {
+        'title': f'Updated task {number}',
+        'description': f'Description of updated task {number}',
+        'status': 'In Progress',
+    })
+
+
+@route('tasks-partial-update')
+def tasks_partial_update(session, number):
+    return session.request('patch', f'/api/tasks/{session.task(number)}/', {
+        'description': f'Description of updated task {number}',
+    })
+
+
+@route('tasks-completed', fresh=1)
+def tasks_completed(session, number):
+    task, = session.fresh()
+    return session.request('patch', f'/api/tasks/{task}/completed/')
+
+
+@route('tasks-delete', fresh=1)
+def tasks_delete(session, number):
+    task, = session.fresh()
+    return session.request('delete', f'/api/tasks/{task}/')
+
+
+@route('tasks-bulk-create')
+def tasks_bulk_create(session, number):
+    return session.request('post', '/api/tasks/bulk/', [
+        {'title': f'Bulk task {number} {item}'} for item in range(BULK_SIZE)
+    ])
+
+
+@route('tasks-bulk-update')
+def tasks_bulk_update(session, number):
+    return session.request('patch', '/api/tasks/bulk/', [
+        {'id': task, 'description': f'Bulk update {number}'}
+        for task in session.tasks[:BULK_SIZE]
+    ])
+
+
+@route('tasks-bulk-delete', fresh=BULK_SIZE)
+def tasks_bulk_delete(session, number):
+    return session.request(
+        'delete', '/api/tasks/bulk/', session.fresh(BULK_SIZE))
+
+
+@route('async-tasks-list')
+def async_tasks_list(session, number):
+    return session.async_request('get', '/api/async/tasks/')
+
+
+@route('async-tasks-my')
+def async_tasks_my(session, number):
+    return session.async_request('get', '/api/async/tasks/my/')
+
+
+@route('async-tasks-detail')
+def async_tasks_detail(session, number):
+    return session.async_request(
+        'get', f'/api/async/tasks/{session.task(number)}/')
+
+
+@route('async-tasks-completed', fresh=1)
+def async_tasks_completed(session, number):
+    task, = session.fresh()
+    return session.async_request(
+        'patch', f'/api/async/tasks/{task}/completed/')
+
+
+@route('auth-users-list')
+def auth_users_list(session, number):
+    return session.request('get', '/api/auth/users/')
+
+
+@route('auth-users-create')
+def auth_users_create(session, number):
+    return session.request('post', '/api/auth/users/', {
+        'username': f'created{number}',
+        'first_name': f'Created {number}',
+        'password': PASSWORD,
+    })
+
+
+@route('auth-users-me')
+def auth_users_me(session, number):
+    return session.request('get', '/api/auth/users/me/')
+
+
+@route('auth-users-detail')
+def auth_users_detail(session, number):
+    return session.request('get', f'/api/auth/users/{session.user.pk}/')
+
+
+@route('auth-jwt-create')
+def auth_jwt_create(session, number):
+    return session.request('post', '/api/auth/jwt/create/', {
+        'username': session.user.username, 'password': PASSWORD,
+    })
+
+
+@route('auth-jwt-refresh')
+def auth_jwt_refresh(session, number):
+    return session.request(
+        'post', '/api/auth/jwt/refresh/', {'refresh': str(session.refresh)})
+
+
+@route('auth-jwt-verify')
+def auth_jwt_verify(session, number):
+    return session.request('post', '/api/auth/jwt/verify/', {
+        'token': str(session.refresh.access_token),
+    })
+
+
+@route('batch')
+def batch(session, number):
+    task = session.task(number)
+    return session.request('post', '/api/batch/', [
+        {'method': 'GET', 'url': f'/api/tasks/{task}/'},
+        {'method': 'PATCH', 'url': f'/api/tasks/{task}/',
+         'body': {'title': f'Batch task {number}'}},
+    ])
+
+
+@route('events-tickets')
+def events_tickets(session, number):
+    return session.request('post', '/api/events/tickets/')
+
+
+@route('metrics')
+def metrics(session, number):
+    from django.test import override_settings
+    with override_settings(REQUEST_TIMING=True, METRICS_TOKEN=''):
+        return session.request('get', '/api/metrics/')
+
+
+def send(name, session):
+    func, _ = ROUTES[name]
+    response = func(session, next(session.numbers))
+    if response.status_code >= 400:
+        raise RuntimeError(
+            f'{name}: {response.status_code} {response.content[:200]!r}')
+
+
+def run_route(name, session, counter, args):
+    """Measure a route, return its results."""
+    _, fresh = ROUTES[name]
+    session.create_fresh(
+        fresh * (args.warmup + args.requests + args.profile))
+    for _ in range(args.warmup):
+        send(name, session)
+    latencies = []
+    for _ in range(args.requests):
+        with timer() as elapsed:
+            send(name, session)
+        latencies.append(elapsed['seconds'])
+    queries = []
+    peaks = []
+    tracemalloc.start()
+    for _ in range(args.profile):
+        counter.count = 0
+        counter.counting = True
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        send(name, session)
+        _, peak = tracemalloc.get_traced_memory()
+        counter.counting = False
+        queries.append(counter.count)
+        peaks.append(peak - current)
+    tracemalloc.stop()
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        'requests': len(latencies),
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'p50_ms': quantiles[49] * 1000,
+        'p95_ms': quantiles[94] * 1000,
+        'p99_ms': quantiles[98] * 1000,
+        'queries': statistics.mean(queries) if queries else None,
+        'peak_kib': max(peaks) / 2 ** 10 if peaks else None,
+    }
+
+
+def get_commit():
+    """The git commit of the benchmarked code, None outside of a checkout."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Print the change of p50 of every route, return the slower routes."""
+    slower = []
+    print(f'\n{"route":>24} {"base p50":>9} {"p50":>9} {"change":>8}')
+    for name, result in results['routes'].items():
+        base = baseline['routes'].get(name)
+        if base is None:
+            continue
+        change = result['p50_ms'] / base['p50_ms'] - 1
+        print(f'{name:>24} {base["p50_ms"]:>9.2f} {result["p50_ms"]:>9.2f} '
+              f'{change:>+8.0%}')
+        if change > tolerance:
+            slower.append(name)
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--tasks', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--profile', type=int, default=5,
+                        help='Requests counting queries and memory.')
+    parser.add_argument('--routes', nargs='+', choices=ROUTES,
+                        default=list(ROUTES))
+    parser.add_argument('--cache', action='store_true',
+                        help='Keep the list cache enabled.')
+    parser.add_argument('--output', help='File to write the results to.')
+    parser.add_argument('--baseline', help='Results of an earlier run.')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Slowdown of p50 allowed by --baseline.')
+    args = parser.parse_args()
+    if args.requests < 2:
+        parser.error('--requests must be at least 2.')
+
+    if not args.cache:
+        os.environ['TASKS_CACHE_TIMEOUT'] = '0'
+    setup()
+    import django
+    from django.conf import settings
+    from django.contrib.auth.hashers import make_password
+    from django.db import connection
+    from django.db.backends.signals import connection_created
+    from tasks.models import User
+    from tasks.stats import count_tasks
+
+    settings.DEBUG = False
+    counter = QueryCounter()
+    connection_created.connect(counter.install)
+    with test_database():
+        counter.install(None, connection)
+        users = create_users(args.users)
+        create_tasks(users, args.tasks)
+        # Tasks created in bulk are not counted by the signals.
+        count_tasks(user.pk for user in users)
+        # Saved without the signals, which would revoke the new tokens of
+        # the user in the second of the change.
+        User.objects.filter(pk=users[0].pk).update(
+            password=make_password(PASSWORD))
+        session = Session(users[0])
+        results = {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'commit': get_commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'users': args.users,
+            'tasks': args.tasks,
+            'cache': args.cache,
+            'routes': {},
+        }
+        print(f'{"route":>24} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} '
+              f'{"queries":>8} {"peak KiB":>9}')
+        for name in args.routes:
+            result = run_route(name, session, counter, args)
+            results['routes'][name] = result
+            print(f'{name:>24} {result["p50_ms"]:>8.2f} '
+                  f'{result["p95_ms"]:>8.2f} {result["p99_ms"]:>8.2f} '
+                  f'{result["queries"] or 0:>8.1f} '
+                  f'{result["peak_kib"] or 0:>9.0f}')
+        session.loop.close()
+    connection_created.disconnect(counter.install)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            slower = compare(results, json.load(baseline), args.tolerance)
+        if slower:
+            print(f'\nSlower by more than {args.tolerance:.0%}: '
+                  f'{", ".join(slower)}')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
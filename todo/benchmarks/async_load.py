@@ -0,0 +1,131 @@
+"""
+Latency of the task list under many concurrent clients, sync vs async.
+
+    python -m benchmarks.async_load --clients 200 --requests 2000 \\
+        --query-delay 0.02
+
+The same list requests are sent through three paths:
+
+- wsgi: GET /api/tasks/ served by a pool of --threads threads, as by a
+  threaded WSGI worker;
+- asgi-sync: GET /api/tasks/ through the ASGI handler, which runs every
+  sync view of Django 3.2 on one shared thread;
+- asgi-async: GET /api/async/tasks/, whose queries run in the pool of
+  ASYNC_DB_THREADS threads (--db-threads).
+
+--query-delay makes every query sleep to play a slow database, so the
+requests are long-tail ones. The list cache is disabled, every request
+queries the database. Latency includes the time a request waits for a
+free thread.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import (authorized_client, create_tasks, create_users, setup,
+               test_database, timer)
+
+
+def slow_queries(delay):
+    """Return an execute wrapper sleeping for delay seconds per query."""
+    def wrapper(execute, sql, params, many, context):
+        time.sleep(delay)
+        return execute(sql, params, many, context)
+    return wrapper
+
+
+async def run_clients(send, clients, requests):
+    """Send requests from concurrent clients, return the latencies."""
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def client():
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            response = await send()
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.status_code
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tasks', type=int, default=10000)
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=8,
+                        help='Threads of the WSGI worker.')
+    parser.add_argument('--db-threads', type=int, default=8,
+                        help='Database threads of the async views.')
+    parser.add_argument('--query-delay', type=float, default=0.01,
+                        help='Seconds added to every query.')
+    parser.add_argument('--paths', nargs='+',
+                        default=['wsgi', 'asgi-sync', 'asgi-async'])
+    args = parser.parse_args()
+
+    os.environ['ASYNC_DB_THREADS'] = str(args.db_threads)
+    os.environ['TASKS_CACHE_TIMEOUT'] = '0'
+    setup()
+    from django.conf import settings
+    from django.db import connection
+    from django.db.backends.signals import connection_created
+    from django.test import AsyncClient
+
+    settings.DEBUG = False
+    wrapper = slow_queries(args.query_delay)
+
+    def slow_connection(sender, connection, **kwargs):
+        connection.execute_wrappers.append(wrapper)
+
+    with test_database():
+        users = create_users(100)
+        create_tasks(users, args.tasks)
+        sync_client = authorized_client(users[0])
+        authorization = sync_client.defaults['HTTP_AUTHORIZATION']
+        connection_created.connect(slow_connection)
+        connection.execute_wrappers.append(wrapper)
+        local = threading.local()
+        pool = ThreadPoolExecutor(max_workers=args.threads)
+
+        def wsgi_get():
+            # A test client per thread, as every thread of a worker has
+            # a request of its own.
+            if not hasattr(local, 'client'):
+                local.client = authorized_client(users[0])
+            return local.client.get('/api/tasks/')
+
+        senders = {
+            'wsgi': lambda: asyncio.get_running_loop().run_in_executor(
+                pool, wsgi_get),
+            'asgi-sync': lambda: AsyncClient().get(
+                '/api/tasks/', authorization=authorization),
+            'asgi-async': lambda: AsyncClient().get(
+                '/api/async/tasks/', authorization=authorization),
+        }
+        print(f'{"path":>10} {"requests/s":>10} {"p50 ms":>8} '
+              f'{"p95 ms":>8} {"p99 ms":>8}')
+        for path in args.paths:
+            with timer() as elapsed:
+                latencies = asyncio.run(run_clients(
+                    senders[path], args.clients, args.requests))
+            quantiles = statistics.quantiles(latencies, n=100)
+            print(f'{path:>10} '
+                  f'{len(latencies) / elapsed["seconds"]:>10.0f} '
+                  f'{quantiles[49] * 1000:>8.1f} '
+                  f'{quantiles[94] * 1000:>8.1f} '
+                  f'{quantiles[98] * 1000:>8.1f}')
+        pool.shutdown()
+        connection_created.disconnect(slow_connection)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Memory use of GET /api/tasks/export/ as the number of tasks grows.
+
+    python -m benchmarks.export --rows 10000 100000 1000000 --type csv
+
+For every size the peak of memory allocated while the export is streamed
+is reported. With a streaming export it stays flat however many rows are
+written; the size of the file grows with them. Max RSS of the process also
+counts the benchmark data, which SQLite keeps in memory for tests.
+"""
+import argparse
+import resource
+import tracemalloc
+
+from . import (authorized_client, create_tasks, create_users, setup,
+               test_database, timer)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+',
+                        default=[1000, 10000, 100000])
+    parser.add_argument('--type', choices=('ndjson', 'csv'),
+                        default='ndjson')
+    args = parser.parse_args()
+
+    setup()
+    from django.conf import settings
+    from tasks.models import Task
+
+    settings.DEBUG = False
+    with test_database():
+        user, = create_users(1)
+        client = authorized_client(user)
+        print(f'{"rows":>10} {"MiB written":>12} {"seconds":>8} '
+              f'{"peak KiB":>9} {"max RSS MiB":>12}')
+        # Warm up, so imports made by the first request are not measured.
+        b''.join(client.get('/api/tasks/export/').streaming_content)
+        for rows in sorted(args.rows):
+            create_tasks([user], rows - Task.objects.count())
+            tracemalloc.start()
+            with timer() as elapsed:
+                response = client.get(
+                    '/api/tasks/export/', {'type': args.type})
+                written = sum(
+                    len(chunk) for chunk in response.streaming_content)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            print(f'{rows:>10} {written / 2 ** 20:>12.1f} '
+                  f'{elapsed["seconds"]:>8.2f} {peak / 2 ** 10:>9.0f} '
+                  f'{max_rss / 2 ** 10:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Latency of GET /api/tasks/?search= on a large table of tasks.
+
+    python -m benchmarks.search --rows 1000000 --repeat 20
+
+Titles and descriptions are made of words of a fixed vocabulary, drawn
+with a Zipf-like distribution, so some words are found in most tasks and
+others in a few. For every query the first page of the ranked list is
+requested --repeat times. The median and 95th percentile are reported for
+the search query alone and for the whole request. The list cache is
+disabled.
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+
+from . import authorized_client, create_users, setup, test_database, timer
+
+SYLLABLES = ('ka', 'lo', 'mi', 'ner', 'to', 'pa', 'ri', 'sun', 'de', 'vo',
+             'bel', 'ar', 'en', 'sto', 'gu', 'fi', 'ra', 'mon', 'te', 'ix')
+
+
+def make_vocabulary(rng, size):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+def create_search_tasks(users, count, vocabulary, rng, batch_size=5000):
+    """Create count tasks with random text, bypassing model signals."""
+    from tasks.models import Task
+    weights = list(itertools.accumulate(
+        1 / rank for rank in range(1, len(vocabulary) + 1)))
+    statuses = tuple(Task.Status)
+    batch = []
+    for number in range(count):
+        words = rng.choices(vocabulary, cum_weights=weights, k=20)
+        batch.append(Task(
+            title=' '.join(words[:rng.randint(2, 6)]).capitalize(),
+            description=' '.join(words[6:rng.randint(8, 20)]),
+            status=statuses[number % len(statuses)],
+            user_id=users[number % len(users)],
+        ))
+        if len(batch) == batch_size:
+            Task.objects.bulk_create(batch)
+            batch = []
+    Task.objects.bulk_create(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--vocabulary', type=int, default=5000)
+    args = parser.parse_args()
+
+    os.environ['TASKS_CACHE_TIMEOUT'] = '0'
+    setup()
+    from django.conf import settings
+    from tasks.models import Task
+    from tasks.search import search_tasks
+
+    settings.DEBUG = False
+    rng = random.Random(0)
+    vocabulary = make_vocabulary(rng, args.vocabulary)
+    with test_database():
+        users = create_users(100)
+        with timer() as elapsed:
+            create_search_tasks(users, args.rows, vocabulary, rng)
+        print(f'{args.rows} tasks created in {elapsed["seconds"]:.0f}s')
+        client = authorized_client(users[0])
+        queries = {
+            'common word': vocabulary[0],
+            'rare word': vocabulary[-1],
+            'two words': f'{vocabulary[0]} {vocabulary[10]}',
+            'short': vocabulary[100][:3],
+        }
+        print(f'{"query":>12} {"matches":>8} {"query p50":>10} '
+              f'{"query p95":>10} {"request p50":>12} {"request p95":>12}'
+              f'  (ms)')
+        for name, query in queries.items():
+            matches = search_tasks(Task.objects.all(), query).count()
+            query_times, request_times = [], []
+            for _ in range(args.repeat):
+                with timer() as elapsed:
+                    list(search_tasks(Task.objects.all(), query)[:10])
+                query_times.append(elapsed['seconds'] * 1000)
+                with timer() as elapsed:
+                    response = client.get('/api/tasks/', {'search': query})
+                assert response.status_code == 200, response.content
+                request_times.append(elapsed['seconds'] * 1000)
+            row = []
+            for times in (query_times, request_times):
+                quantiles = statistics.quantiles(times, n=20)
+                row += [statistics.median(times), quantiles[18]]
+            print(f'{name:>12} {matches:>8} {row[0]:>10.1f} {row[1]:>10.1f} '
+                  f'{row[2]:>12.1f} {row[3]:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Cost per task of reading, serializing and rendering a list of tasks.
+
+    python -m benchmarks.serializers --rows 10 100 1000 --repeat 50
+
+For every page size the median cost per row of each step is reported for
+the model path, Task instances written by TaskSerializer and JSONRenderer,
+and for the row path of the lists, values() rows written by the row
+encoder and FastJSONRenderer. Both paths render the same bytes.
+"""
+import argparse
+import statistics
+
+from . import create_tasks, create_users, setup, test_database, timer
+
+
+def measure(steps, repeat):
+    """Run the steps in order, return the median seconds of each step."""
+    times = [[] for _ in steps]
+    for _ in range(repeat):
+        value = None
+        for step, step_times in zip(steps, times):
+            with timer() as elapsed:
+                value = step(value)
+            step_times.append(elapsed['seconds'])
+    return [statistics.median(step_times) for step_times in times]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+',
+                        default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    setup()
+    from django.conf import settings
+    from rest_framework.renderers import JSONRenderer
+    from api.renderers import FastJSONRenderer
+    from api.serializers import TaskSerializer, get_task_row_encoder
+    from tasks.models import Task
+
+    settings.DEBUG = False
+    fields = TaskSerializer.Meta.fields
+    encode = get_task_row_encoder(fields)
+    json_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+    with test_database():
+        user, = create_users(1)
+        create_tasks([user], max(args.rows))
+        print(f'{"rows":>6} {"path":>6} {"read":>8} {"serialize":>10} '
+              f'{"render":>8} {"total":>8}  (µs per row)')
+        for rows in sorted(args.rows):
+            tasks = Task.objects.all()[:rows]
+            paths = {
+                'model': [
+                    lambda _: list(tasks.all()),
+                    lambda page: TaskSerializer(page, many=True).data,
+                    json_renderer.render,
+                ],
+                'row': [
+                    lambda _: list(tasks.values(*fields)),
+                    lambda page: [encode(row) for row in page],
+                    fast_renderer.render,
+                ],
+            }
+            for name, steps in paths.items():
+                costs = [
+                    seconds / rows * 10 ** 6
+                    for seconds in measure(steps, args.repeat)]
+                print(f'{rows:>6} {name:>6} {costs[0]:>8.2f} '
+                      f'{costs[1]:>10.2f} {costs[2]:>8.2f} '
+                      f'{sum(costs):>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""
+Throughput of the task list as served by runserver and by gunicorn.
+
+    python -m benchmarks.serving --clients 16 --duration 20
+
+Every server of --servers is started in turn on the benchmark database
+and loaded with GET --path by concurrent HTTP clients for --duration
+seconds:
+
+- runserver: manage.py runserver, as the Dockerfile used to serve the
+  project, a new database connection for every request;
+- gunicorn: gunicorn.conf.py with WSGI workers, a new database
+  connection for every request;
+- gunicorn-persistent: the same with connections kept for DB_CONN_MAX_AGE
+  seconds and checked before a request uses them, the served default;
+- uvicorn-persistent: gunicorn.conf.py with uvicorn workers.
+
+The list cache is disabled and DEBUG is off for every server, the
+difference is the server and the connections. The clients run on the
+same machine as the servers and use its cores too. With PostgreSQL the
+connections cost the most: opening one is a process and an authentication
+on the database server. SQLite needs a database file, which the benchmark
+creates and deletes.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+from . import create_tasks, create_users, setup, test_database, timer
+
+MANAGE_DIR = Path(__file__).resolve().parent.parent
+
+SERVERS = {
+    'runserver': (
+        [sys.executable, 'manage.py', 'runserver', '--noreload', '{bind}'],
+        {'DB_CONN_MAX_AGE': '0'}),
+    'gunicorn': (
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+        {'DB_CONN_MAX_AGE': '0'}),
+    'gunicorn-persistent': (
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+        {'DB_CONN_MAX_AGE': '60'}),
+    'uvicorn-persistent': (
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+        {'DB_CONN_MAX_AGE': '60', 'SERVER_INTERFACE': 'asgi'}),
+}
+
+
+def start_server(name, bind, env, log):
+    """Start a server of SERVERS and wait until it answers."""
+    command, server_env = SERVERS[name]
+    with open(log, 'wb') as output:
+        process = subprocess.Popen(
+            [part.format(bind=bind) for part in command],
+            cwd=MANAGE_DIR, env={**env, **server_env},
+            stdout=output, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(
+                f'{name} exited: {Path(log).read_text()}')
+        try:
+            requests.get(f'http://{bind}/', timeout=5)
+            return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'{name} did not start in 30 seconds')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def run_clients(url, headers, clients, duration):
+    """Send requests from concurrent clients, return the latencies."""
+    latencies = []
+    errors = []
+    deadline = time.monotonic() + duration
+
+    def client():
+        # A session keeps its HTTP connection open, as a browser or a
+        # proxy in front of the server does.
+        with requests.Session() as session:
+            session.headers.update(headers)
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = session.get(url)
+                except requests.ConnectionError:
+                    # A recycled worker closes the kept HTTP connections,
+                    # a proxy sends the request again.
+                    response = session.get(url)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise RuntimeError(f'{len(errors)} failed requests: {errors[:5]}')
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tasks', type=int, default=10000)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20,
+                        help='Seconds of load on every server.')
+    parser.add_argument('--path', default='/api/tasks/')
+    parser.add_argument('--bind', default='127.0.0.1:8765')
+    parser.add_argument('--workers', type=int,
+                        help='Workers of gunicorn, by the cores if not set.')
+    parser.add_argument('--servers', nargs='+', choices=SERVERS,
+                        default=list(SERVERS))
+    args = parser.parse_args()
+
+    setup()
+    from django.db import connection
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    with tempfile.TemporaryDirectory() as directory:
+        if connection.vendor == 'sqlite':
+            # The servers are other processes, an in-memory database is
+            # not shared with them.
+            connection.settings_dict['TEST']['NAME'] = str(
+                Path(directory) / 'benchmark.sqlite3')
+        with test_database():
+            users = create_users(100)
+            create_tasks(users, args.tasks)
+            token = RefreshToken.for_user(users[0]).access_token
+            env = {
+                **os.environ,
+                'DB_NAME': connection.settings_dict['NAME'],
+                'DEBUG': 'False',
+                'TASKS_CACHE_TIMEOUT': '0',
+                # Gunicorn refuses several workers on a local memory cache.
+                'CACHE_BACKEND': (
+                    'django.core.cache.backends.filebased.FileBasedCache'),
+                'CACHE_LOCATION': str(Path(directory) / 'cache'),
+                'GUNICORN_BIND': args.bind,
+                'GUNICORN_ACCESS_LOG': '',
+            }
+            if args.workers:
+                env['WEB_CONCURRENCY'] = str(args.workers)
+            # The servers open their own connections to the database.
+            connection.close()
+            print(f'{"server":>20} {"requests/s":>10} {"p50 ms":>8} '
+                  f'{"p95 ms":>8} {"p99 ms":>8}')
+            for name in args.servers:
+                process = start_server(
+                    name, args.bind, env, Path(directory) / f'{name}.log')
+                try:
+                    with timer() as elapsed:
+                        latencies = run_clients(
+                            f'http://{args.bind}{args.path}',
+                            {'Authorization': f'Bearer {token}'},
+                            args.clients, args.duration)
+                finally:
+                    stop_server(process)
+                quantiles = statistics.quantiles(latencies, n=100)
+                print(f'{name:>20} '
+                      f'{len(latencies) / elapsed["seconds"]:>10.0f} '
+                      f'{quantiles[49] * 1000:>8.1f} '
+                      f'{quantiles[94] * 1000:>8.1f} '
+                      f'{quantiles[98] * 1000:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
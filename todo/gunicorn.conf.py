@@ -0,0 +1,81 @@
+"""
+Gunicorn settings of the project, read from the directory with manage.py.
+
+    gunicorn -c gunicorn.conf.py
+
+SERVER_INTERFACE=wsgi (default) serves todo.wsgi with threaded workers.
+SERVER_INTERFACE=asgi serves todo.asgi with uvicorn workers, for the async
+endpoints. Every worker is a process with its own database connections:
+up to WEB_CONCURRENCY * GUNICORN_THREADS of them for WSGI, see PgBouncer in
+docker-compose.yaml when that is more than the database allows.
+"""
+import glob
+import multiprocessing
+import os
+import tempfile
+
+interface = os.getenv('SERVER_INTERFACE', 'wsgi')
+if interface == 'asgi':
+    wsgi_app = 'todo.asgi:application'
+    # Django 3.2 runs the sync views of a uvicorn worker on one thread,
+    # a worker serves one of them at a time like a sync worker.
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'todo.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+# A worker waits for the database most of a request, two per core keep
+# the cores busy.
+workers = int(os.getenv(
+    'WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# The workers share the cached lists, token revocations, replica pins and
+# event tickets through the cache, which a local memory cache does not.
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todo.settings')
+from django.conf import settings  # noqa: E402
+
+if (workers > 1 and settings.CACHES[settings.TASKS_CACHE_ALIAS][
+        'BACKEND'].endswith('.LocMemCache')):
+    raise RuntimeError(
+        'Set CACHE_BACKEND to a cache shared by the workers, e.g. '
+        'memcached, or WEB_CONCURRENCY=1.')
+# The event streams of a worker get the events of the other workers from
+# the broker, which LocalBroker does not.
+if (interface == 'asgi' and workers > 1
+        and settings.EVENTS_BROKER == 'api.events.LocalBroker'):
+    raise RuntimeError(
+        'Set EVENTS_BROKER=api.events.PostgresBroker, or WEB_CONCURRENCY=1.')
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = timeout
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Workers are replaced after a number of requests, so what a worker leaks
+# is given back.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+# The heartbeat of the workers, in memory rather than on the overlay
+# filesystem of a container.
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+# The workers write their metrics to files read by a scrape of any of
+# them, see api.metrics. Set before the workers import prometheus_client.
+metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(tempfile.gettempdir(), 'todo-metrics'))
+
+
+def on_starting(server):
+    """Start the metrics from zero, without the files of an earlier run."""
+    os.makedirs(metrics_dir, exist_ok=True)
+    for name in glob.glob(os.path.join(metrics_dir, '*.db')):
+        os.remove(name)
+
+
+# Requests are logged to stdout, an empty value turns the log off.
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
@@ -1,21 +1,222 @@
+"""
+Admin of the tasks and users, made for tables of millions of rows.
+
+The changelists are paged by position, see KeysetChangeList, and count
+their rows with EstimatedCountPaginator. Tasks are searched with
+tasks.search and drilled down by their indexed creation date.
+"""
+from datetime import datetime, time, timedelta
+
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.exceptions import ValidationError
+from django.db.models import Max, Min, Q, QuerySet
+from django.utils import timezone
+
+from .models import ArchivedTask, Task, User
+from .pagination import EstimatedCountPaginator
+from .search import search_tasks
+
+POSITION_VAR = 'before'
+
+
+def after_position(fields, values):
+    """The rows after the position in the descending order of fields."""
+    after = Q(**{f'{fields[-1]}__lt': values[-1]})
+    for field, value in zip(fields[-2::-1], values[-2::-1]):
+        after = Q(**{f'{field}__lt': value}) | Q(**{field: value}) & after
+    if len(fields) > 1:
+        # A bound on the first field alone lets the index seek to it.
+        after &= Q(**{f'{fields[0]}__lte': values[0]})
+    return after
+
+
+def format_value(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+class KeysetChangeList(ChangeList):
+    """
+    A changelist paged by position, ?before= the last row of the page.
+
+    A list sorted by a column is paged by numbers.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.position = request.GET.get(POSITION_VAR)
+        self.next_position = None
+        super().__init__(request, *args, **kwargs)
+
+    @property
+    def keyset(self):
+        return ORDER_VAR not in self.params
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(POSITION_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # A position is only valid in the list it was taken from.
+        new_params = {POSITION_VAR: None, **(new_params or {})}
+        return super().get_query_string(new_params, remove)
+
+    def get_keyset_fields(self):
+        return [
+            self.lookup_opts.pk if name == 'pk'
+            else self.lookup_opts.get_field(name)
+            for name in (
+                field.lstrip('-') for field in self.model_admin.ordering)
+        ]
+
+    def parse_position(self, fields):
+        values = self.position.split(',')
+        if len(values) != len(fields):
+            raise IncorrectLookupParameters
+        try:
+            return [
+                field.to_python(value) for field, value in zip(fields, values)]
+        except ValidationError as error:
+            raise IncorrectLookupParameters(error)
+
+    def get_results(self, request):
+        if not self.keyset:
+            return super().get_results(request)
+        fields = self.get_keyset_fields()
+        queryset = self.queryset
+        if self.position:
+            queryset = queryset.filter(after_position(
+                [field.attname for field in fields],
+                self.parse_position(fields)))
+        result_list = list(queryset[:self.list_per_page + 1])
+        if len(result_list) > self.list_per_page:
+            del result_list[self.list_per_page:]
+            self.next_position = ','.join(
+                format_value(getattr(result_list[-1], field.attname))
+                for field in fields)
+        paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page)
+        self.result_count = paginator.count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = result_list
+        self.can_show_all = False
+        self.multi_page = False
+        self.paginator = paginator
 
-from .models import Task, User
+    def get_first_url(self):
+        return self.get_query_string()
 
+    def get_next_url(self):
+        return self.get_query_string({POSITION_VAR: self.next_position})
 
-class TaskAdmin(admin.ModelAdmin):
+
+class DateRangeQuerySet(QuerySet):
+    """
+    A queryset listing the dates of the admin date hierarchy between the
+    first and the last date, two index lookups, where datetimes() reads
+    the date of every row. Dates without rows are listed too.
+    """
+
+    def aggregate(self, *args, **kwargs):
+        # SQLite reads MIN() or MAX() from an index only when it is alone
+        # in its query, so the bounds of the dates are read one by one.
+        if args or not all(
+                isinstance(value, (Min, Max)) for value in kwargs.values()):
+            return super().aggregate(*args, **kwargs)
+        result = {}
+        for name, value in kwargs.items():
+            result.update(super().aggregate(**{name: value}))
+        return result
+
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None,
+                  is_dst=None):
+        if kind not in ('year', 'month', 'day'):
+            return super().datetimes(field_name, kind, order, tzinfo, is_dst)
+        bounds = self.aggregate(first=Min(field_name), last=Max(field_name))
+        if bounds['first'] is None:
+            return []
+        first, last = (
+            timezone.localtime(bounds[name], tzinfo)
+            if timezone.is_aware(bounds[name]) else bounds[name]
+            for name in ('first', 'last'))
+        date = first.date().replace(
+            month=1 if kind == 'year' else first.month,
+            day=first.day if kind == 'day' else 1)
+        dates = []
+        while date <= last.date():
+            value = datetime.combine(date, time())
+            if first.tzinfo is not None:
+                value = timezone.make_aware(value, first.tzinfo)
+            dates.append(value)
+            if kind == 'year':
+                date = date.replace(year=date.year + 1)
+            elif kind == 'month':
+                date = (date + timedelta(days=31)).replace(day=1)
+            else:
+                date += timedelta(days=1)
+        return dates if order == 'ASC' else dates[::-1]
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """An admin paged by position, see KeysetChangeList."""
+
+    change_list_template = 'admin/keyset_change_list.html'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+
+class TaskAdmin(LargeTableAdmin):
     list_display = (
         'pk', 'title', 'description', 'status', 'created', 'user_id')
-    search_fields = ('title',)
-    list_filter = ('created',)
+    list_select_related = ('user_id',)
+    list_filter = ('status',)
+    date_hierarchy = 'created'
+    ordering = ('-created', '-pk')
+    # Searched by get_search_results, the fields show the search box.
+    search_fields = ('title', 'description')
+    raw_id_fields = ('user_id',)
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return DateRangeQuerySet(queryset.model, queryset.query, queryset.db)
+
+    def get_search_results(self, request, queryset, search_term):
+        return search_tasks(queryset, search_term), False
+
+
+class ArchivedTaskAdmin(LargeTableAdmin):
+    """Archived tasks are read only, see tasks.archive."""
+
+    list_display = (
+        'pk', 'title', 'status', 'created', 'archived', 'user_id')
+    list_select_related = ('user_id',)
+    ordering = ('-created', '-pk')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(LargeTableAdmin):
     list_display = (
         'pk', 'username', 'first_name', 'last_name', 'is_staff')
-    search_fields = ('username',)
+    # Usernames are searched by prefix, served by user_username_prefix_idx.
+    search_fields = ('^username',)
     list_filter = ('is_staff',)
+    ordering = ('-pk',)
 
 
 admin.site.register(Task, TaskAdmin)
+admin.site.register(ArchivedTask, ArchivedTaskAdmin)
 admin.site.register(User, UserAdmin)
@@ -0,0 +1,57 @@
+"""
+Archive of the completed tasks, out of the table the API reads.
+
+archive_tasks() moves the Completed tasks last changed before a cutoff to
+ArchivedTask, a batch per transaction, skipping the tasks locked by a
+request where the database can.
+
+Archived tasks keep their id. They are still counted in TaskStats and
+logged as deleted in TaskChange, as they leave the lists. The lists return
+them with ?include_archived=1, see api.views.
+"""
+from django.db import connections, transaction
+
+from .models import ArchivedTask, Task
+from .signals import bulk_delete, tasks_archived
+
+ARCHIVED_FIELDS = (
+    'id', 'title', 'description', 'status', 'created', 'updated',
+    'user_id_id')
+
+
+def archivable_tasks(before):
+    """The completed tasks last changed before the cutoff, oldest first."""
+    return Task.objects.filter(
+        status=Task.Status.COMPLETED, updated__lt=before,
+    ).order_by('updated', 'pk')
+
+
+def archive_batch(before, batch_size):
+    """Move up to batch_size tasks to the archive, return them."""
+    db = Task.objects.db
+    with transaction.atomic(using=db):
+        tasks = archivable_tasks(before)
+        if connections[db].features.has_select_for_update_skip_locked:
+            tasks = tasks.select_for_update(skip_locked=True, of=('self',))
+        tasks = [Task(**row) for row in tasks.values(*ARCHIVED_FIELDS)[
+            :batch_size]]
+        if tasks:
+            ArchivedTask.objects.bulk_create(
+                ArchivedTask(**{field: getattr(task, field)
+                                for field in ARCHIVED_FIELDS})
+                for task in tasks)
+            # The moved tasks stay in TaskStats, see tasks_archived.
+            moved = Task.objects.filter(pk__in=[task.pk for task in tasks])
+            with bulk_delete():
+                moved.delete()
+            tasks_archived.send(sender=Task, tasks=tasks)
+    return tasks
+
+
+def archive_tasks(before, batch_size=1000):
+    """Move the tasks to the archive, yield every moved batch."""
+    while True:
+        tasks = archive_batch(before, batch_size)
+        if not tasks:
+            return
+        yield tasks
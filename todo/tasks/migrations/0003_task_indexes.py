@@ -0,0 +1,44 @@
+# Generated by Django 3.2 on 2026-10-18 17:00
+
+from django.db import migrations, models
+
+
+def create_status_trigram_index(apps, schema_editor):
+    # status__icontains compiles to UPPER(status::text) LIKE '%...%', which
+    # only a trigram index can serve. pg_trgm is PostgreSQL specific.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS task_status_trgm_idx ON tasks_task '
+        'USING gin ((UPPER("status"::text)) gin_trgm_ops)')
+
+
+def drop_status_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS task_status_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_auto_20240219_2346'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['-created'], name='task_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user_id', '-created'], name='task_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', '-created'], name='task_status_created_idx'),
+        ),
+        migrations.RunPython(
+            create_status_trigram_index, drop_status_trigram_index),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+def drop_status_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS task_status_trgm_idx')
+
+
+def create_status_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS task_status_trgm_idx ON tasks_task '
+        'USING gin ((UPPER("status"::text)) gin_trgm_ops)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_status_created_idx',
+        ),
+        migrations.RunPython(
+            drop_status_trigram_index, create_status_trigram_index),
+        migrations.AddField(
+            model_name='task',
+            name='status_code',
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.2 on 2026-10-18 17:20
+
+from django.db import migrations, transaction
+
+BATCH_SIZE = 10000
+
+STATUS_CODES = {'New': 1, 'In Progress': 2, 'Completed': 3}
+
+
+def batches(Task, db_alias):
+    """Yield querysets of consecutive primary key ranges of tasks."""
+    last_pk = 0
+    while True:
+        pks = list(
+            Task.objects.using(db_alias).filter(pk__gt=last_pk)
+            .order_by('pk').values_list('pk', flat=True)[:BATCH_SIZE])
+        if not pks:
+            return
+        yield Task.objects.using(db_alias).filter(
+            pk__gte=pks[0], pk__lte=pks[-1])
+        last_pk = pks[-1]
+
+
+def status_to_code(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    db_alias = schema_editor.connection.alias
+    for batch in batches(Task, db_alias):
+        with transaction.atomic(using=db_alias):
+            for label, code in STATUS_CODES.items():
+                batch.filter(status__iexact=label).update(status_code=code)
+
+
+def code_to_status(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    db_alias = schema_editor.connection.alias
+    for batch in batches(Task, db_alias):
+        with transaction.atomic(using=db_alias):
+            for label, code in STATUS_CODES.items():
+                batch.filter(status_code=code).update(status=label)
+
+
+class Migration(migrations.Migration):
+    # Every batch is committed on its own, so the conversion of a big table
+    # does not hold one long transaction and can be rerun after a failure.
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0004_task_status_code'),
+    ]
+
+    operations = [
+        migrations.RunPython(status_to_code, code_to_status),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_task_status_code_data'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='task',
+            name='status',
+        ),
+        migrations.RenameField(
+            model_name='task',
+            old_name='status_code',
+            new_name='status',
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'New'), (2, 'In Progress'), (3, 'Completed')], default=1, verbose_name='Status'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', '-created'], name='task_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2 on 2026-10-18 18:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_status_smallint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Update date'),
+            preserve_default=False,
+        ),
+    ]
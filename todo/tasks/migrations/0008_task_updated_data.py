@@ -0,0 +1,36 @@
+# Generated by Django 3.2 on 2026-10-18 18:10
+
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 10000
+
+
+def set_updated_to_created(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    db_alias = schema_editor.connection.alias
+    last_pk = 0
+    while True:
+        pks = list(
+            Task.objects.using(db_alias).filter(pk__gt=last_pk)
+            .order_by('pk').values_list('pk', flat=True)[:BATCH_SIZE])
+        if not pks:
+            return
+        with transaction.atomic(using=db_alias):
+            Task.objects.using(db_alias).filter(
+                pk__gte=pks[0], pk__lte=pks[-1]
+            ).update(updated=models.F('created'))
+        last_pk = pks[-1]
+
+
+class Migration(migrations.Migration):
+    # One transaction per batch, as in 0005_task_status_code_data.
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0007_task_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            set_updated_to_created, migrations.RunPython.noop),
+    ]
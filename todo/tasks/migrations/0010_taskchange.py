@@ -0,0 +1,31 @@
+# Generated by Django 3.2 on 2026-10-18 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_task_updated_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField(verbose_name='Task')),
+                ('user_id', models.BigIntegerField(verbose_name='Author')),
+                ('deleted', models.BooleanField(default=False, verbose_name='Deleted')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Creation date')),
+            ],
+            options={
+                'verbose_name': 'Task change',
+                'verbose_name_plural': 'Task changes',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='taskchange',
+            index=models.Index(fields=['user_id', 'id'], name='task_change_user_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 3.2 on 2026-10-18 18:10
+
+from django.db import migrations
+
+# SQLite remakes a table to alter it, which drops its triggers. A later
+# migration changing tasks_task on SQLite has to create them again.
+SQLITE_FTS = [
+    'CREATE VIRTUAL TABLE tasks_task_fts USING fts5('
+    'title, description, content=tasks_task, content_rowid=id)',
+    'CREATE TRIGGER tasks_task_fts_insert AFTER INSERT ON tasks_task BEGIN '
+    'INSERT INTO tasks_task_fts (rowid, title, description) '
+    'VALUES (new.id, new.title, new.description); END',
+    'CREATE TRIGGER tasks_task_fts_delete AFTER DELETE ON tasks_task BEGIN '
+    'INSERT INTO tasks_task_fts (tasks_task_fts, rowid, title, description) '
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    'CREATE TRIGGER tasks_task_fts_update '
+    'AFTER UPDATE OF title, description ON tasks_task BEGIN '
+    'INSERT INTO tasks_task_fts (tasks_task_fts, rowid, title, description) '
+    "VALUES ('delete', old.id, old.title, old.description); "
+    'INSERT INTO tasks_task_fts (rowid, title, description) '
+    'VALUES (new.id, new.title, new.description); END',
+    "INSERT INTO tasks_task_fts (tasks_task_fts) VALUES ('rebuild')",
+]
+
+SQLITE_FTS_DROP = [
+    'DROP TRIGGER IF EXISTS tasks_task_fts_insert',
+    'DROP TRIGGER IF EXISTS tasks_task_fts_delete',
+    'DROP TRIGGER IF EXISTS tasks_task_fts_update',
+    'DROP TABLE IF EXISTS tasks_task_fts',
+]
+
+
+def sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+def create_search_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        # Without FTS5 search falls back to a substring match.
+        if sqlite_has_fts5(connection):
+            for sql in SQLITE_FTS:
+                schema_editor.execute(sql)
+        return
+    if connection.vendor != 'postgresql':
+        return
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+    # The expression must be the one tasks.search.search_vector() queries.
+    schema_editor.add_index(apps.get_model('tasks', 'Task'), GinIndex(
+        SearchVector('title', 'description', config='simple'),
+        name='task_search_idx'))
+    # Short queries are matched with icontains, which compiles to
+    # UPPER(column::text) LIKE '%...%'.
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in ('title', 'description'):
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS task_{column}_trgm_idx ON tasks_task '
+            f'USING gin ((UPPER("{column}"::text)) gin_trgm_ops)')
+
+
+def drop_search_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        for sql in SQLITE_FTS_DROP:
+            schema_editor.execute(sql)
+        return
+    if connection.vendor != 'postgresql':
+        return
+    for name in ('task_search_idx', 'task_title_trgm_idx',
+                 'task_description_trgm_idx'):
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_taskchange'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
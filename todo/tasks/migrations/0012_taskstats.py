@@ -0,0 +1,45 @@
+# Generated by Django 3.2 on 2026-10-18 19:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+STATUS_FIELDS = {1: 'new', 2: 'in_progress', 3: 'completed'}
+
+
+def count_tasks(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    TaskStats = apps.get_model('tasks', 'TaskStats')
+    db_alias = schema_editor.connection.alias
+    stats = {}
+    rows = (
+        Task.objects.using(db_alias).order_by()
+        .values_list('user_id', 'status').annotate(count=models.Count('pk')))
+    for user_id, status, count in rows:
+        item = stats.setdefault(user_id, TaskStats(user_id=user_id))
+        setattr(item, STATUS_FIELDS[status], count)
+    TaskStats.objects.using(db_alias).bulk_create(
+        stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0011_task_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_stats', serialize=False, to='tasks.user', verbose_name='User')),
+                ('new', models.IntegerField(default=0, verbose_name='New')),
+                ('in_progress', models.IntegerField(default=0, verbose_name='In Progress')),
+                ('completed', models.IntegerField(default=0, verbose_name='Completed')),
+            ],
+            options={
+                'verbose_name': 'Task statistics',
+                'verbose_name_plural': 'Task statistics',
+            },
+        ),
+        migrations.RunPython(count_tasks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.2 on 2026-10-18 18:32
+
+from django.db import migrations, models
+
+# The admin searches usernames by prefix, with istartswith.
+USERNAME_PREFIX_INDEX = {
+    # UPPER("username"::text) LIKE UPPER(%s)
+    'postgresql': (
+        'CREATE INDEX IF NOT EXISTS user_username_prefix_idx ON tasks_user '
+        '((UPPER("username"::text)) text_pattern_ops)'),
+    # LIKE is case-insensitive, served by a NOCASE index.
+    'sqlite': (
+        'CREATE INDEX IF NOT EXISTS user_username_prefix_idx ON tasks_user '
+        '(username COLLATE NOCASE)'),
+}
+
+
+def create_username_prefix_index(apps, schema_editor):
+    sql = USERNAME_PREFIX_INDEX.get(schema_editor.connection.vendor)
+    if sql:
+        schema_editor.execute(sql)
+
+
+def drop_username_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor in USERNAME_PREFIX_INDEX:
+        schema_editor.execute('DROP INDEX IF EXISTS user_username_prefix_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0012_taskstats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(is_staff=True), fields=['-id'], name='user_staff_idx'),
+        ),
+        migrations.RunPython(
+            create_username_prefix_index, drop_username_prefix_index),
+    ]
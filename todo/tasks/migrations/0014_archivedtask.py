@@ -0,0 +1,37 @@
+# Generated by Django 3.2 on 2026-10-18 18:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0013_user_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200, verbose_name='Title')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Description')),
+                ('status', models.PositiveSmallIntegerField(choices=[(1, 'New'), (2, 'In Progress'), (3, 'Completed')], verbose_name='Status')),
+                ('created', models.DateTimeField(verbose_name='Creation date')),
+                ('updated', models.DateTimeField(verbose_name='Update date')),
+                ('archived', models.DateTimeField(auto_now_add=True, verbose_name='Archive date')),
+                ('user_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to=settings.AUTH_USER_MODEL, verbose_name='Author')),
+            ],
+            options={
+                'verbose_name': 'Archived task',
+                'verbose_name_plural': 'Archived tasks',
+                'ordering': ('-created',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['user_id', '-created'], name='archived_task_user_idx'),
+        ),
+    ]
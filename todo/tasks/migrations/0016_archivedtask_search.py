@@ -0,0 +1,78 @@
+# Generated by Django 3.2 on 2026-10-18 19:20
+
+from django.db import migrations
+
+# The archived tasks are searched as the tasks are, see 0011_task_search.
+SQLITE_FTS = [
+    'CREATE VIRTUAL TABLE tasks_archivedtask_fts USING fts5('
+    'title, description, content=tasks_archivedtask, content_rowid=id)',
+    'CREATE TRIGGER tasks_archivedtask_fts_insert '
+    'AFTER INSERT ON tasks_archivedtask BEGIN '
+    'INSERT INTO tasks_archivedtask_fts (rowid, title, description) '
+    'VALUES (new.id, new.title, new.description); END',
+    'CREATE TRIGGER tasks_archivedtask_fts_delete '
+    'AFTER DELETE ON tasks_archivedtask BEGIN '
+    'INSERT INTO tasks_archivedtask_fts '
+    '(tasks_archivedtask_fts, rowid, title, description) '
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    'CREATE TRIGGER tasks_archivedtask_fts_update '
+    'AFTER UPDATE OF title, description ON tasks_archivedtask BEGIN '
+    'INSERT INTO tasks_archivedtask_fts '
+    '(tasks_archivedtask_fts, rowid, title, description) '
+    "VALUES ('delete', old.id, old.title, old.description); "
+    'INSERT INTO tasks_archivedtask_fts (rowid, title, description) '
+    'VALUES (new.id, new.title, new.description); END',
+    "INSERT INTO tasks_archivedtask_fts (tasks_archivedtask_fts) "
+    "VALUES ('rebuild')",
+]
+
+SQLITE_FTS_DROP = [
+    'DROP TRIGGER IF EXISTS tasks_archivedtask_fts_insert',
+    'DROP TRIGGER IF EXISTS tasks_archivedtask_fts_delete',
+    'DROP TRIGGER IF EXISTS tasks_archivedtask_fts_update',
+    'DROP TABLE IF EXISTS tasks_archivedtask_fts',
+]
+
+
+def sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+def create_search_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        if sqlite_has_fts5(connection):
+            for sql in SQLITE_FTS:
+                schema_editor.execute(sql)
+        return
+    if connection.vendor != 'postgresql':
+        return
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+    schema_editor.add_index(apps.get_model('tasks', 'ArchivedTask'), GinIndex(
+        SearchVector('title', 'description', config='simple'),
+        name='archived_task_search_idx'))
+
+
+def drop_search_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        for sql in SQLITE_FTS_DROP:
+            schema_editor.execute(sql)
+        return
+    if connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS archived_task_search_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0015_user_tokens_valid_after'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2 on 2026-10-18 21:05
+
+from django.db import migrations
+
+# Short queries are matched as a prefix of SHORT_QUERY_LENGTH characters,
+# see tasks.search. FTS5 reads them from an index of these prefixes
+# instead of merging the entries of every word starting with them. The
+# triggers of 0011_task_search and 0016_archivedtask_search are on the
+# tasks tables and keep filling the new FTS5 tables.
+SQLITE_FTS_TABLES = {
+    'tasks_task_fts': 'tasks_task',
+    'tasks_archivedtask_fts': 'tasks_archivedtask',
+}
+
+
+def create_fts_tables(schema_editor, options=''):
+    tables = schema_editor.connection.introspection.table_names()
+    for fts, content in SQLITE_FTS_TABLES.items():
+        if fts not in tables:
+            continue
+        schema_editor.execute(f'DROP TABLE {fts}')
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {fts} USING fts5(title, description, '
+            f'content={content}, content_rowid=id{options})')
+        schema_editor.execute(
+            f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def add_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        create_fts_tables(schema_editor, options=", prefix='3'")
+
+
+def remove_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        create_fts_tables(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0016_archivedtask_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_prefix_index, remove_prefix_index),
+    ]
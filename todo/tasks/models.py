@@ -1,5 +1,5 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, router, transaction
 
 
 class User(AbstractUser):
@@ -11,10 +11,19 @@ class User(AbstractUser):
     )
     username = models.CharField('Username', max_length=100, unique=True)
     password = models.CharField('Password', max_length=150)
+    # Tokens issued until then are refused, see api.authentication.
+    tokens_valid_after = models.DateTimeField(
+        'Tokens valid after', null=True, blank=True, editable=False)
 
     REQUIRED_FIELDS = ['first_name',]
 
     class Meta:
+        indexes = (
+            # The few staff users, newest first, for the admin filter.
+            models.Index(
+                fields=('-id',), condition=models.Q(is_staff=True),
+                name='user_staff_idx'),
+        )
         verbose_name = 'User'
         verbose_name_plural = 'Users'
 
@@ -25,25 +34,183 @@ class User(AbstractUser):
 class Task(models.Model):
     """Task storage model."""
 
-    NEW = 'New'
-    PROGRESS = 'In Progress'
-    COMPLETED = 'Completed'
-    STATUS_CHOICES = (
-        (NEW, 'New'), (PROGRESS, 'In Progress'), (COMPLETED, 'Completed')
-    )
+    class Status(models.IntegerChoices):
+        NEW = 1, 'New'
+        PROGRESS = 2, 'In Progress'
+        COMPLETED = 3, 'Completed'
+
+        @classmethod
+        def from_label(cls, label):
+            """Return the status with the given label."""
+            for status in cls:
+                if status.label == label:
+                    return status
+            raise ValueError(f'{label!r} is not a valid Task status')
+
     title = models.CharField('Title', max_length=200)
     description = models.TextField('Description', null=True, blank=True)
-    status = models.CharField(
-        'Status', max_length=20, choices=STATUS_CHOICES, default=NEW)
+    status = models.PositiveSmallIntegerField(
+        'Status', choices=Status.choices, default=Status.NEW)
     created = models.DateTimeField('Creation date', auto_now_add=True)
+    updated = models.DateTimeField('Update date', auto_now=True)
     user_id = models.ForeignKey(
         User, verbose_name='Author', on_delete=models.CASCADE,
         related_name='tasks')
 
     class Meta:
         ordering = ('-created',)
+        indexes = (
+            models.Index(fields=('-created',), name='task_created_idx'),
+            models.Index(
+                fields=('user_id', '-created'), name='task_user_created_idx'),
+            models.Index(
+                fields=('status', '-created'), name='task_status_created_idx'),
+            models.Index(fields=('-updated',), name='task_updated_idx'),
+            models.Index(
+                fields=('user_id', '-updated'), name='task_user_updated_idx'),
+        )
         verbose_name = 'Task'
         verbose_name_plural = 'Tasks'
 
     def __str__(self):
         return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        task = super().from_db(db, field_names, values)
+        # The stored owner and status, which a save or delete counts down
+        # in TaskStats. None when the status was not loaded.
+        task._stored_status = (
+            (task.user_id_id, task.status)
+            if 'status' in task.__dict__ and 'user_id_id' in task.__dict__
+            else None)
+        return task
+
+    @classmethod
+    def lock_stored_status(cls, tasks, using=None):
+        """Lock the rows of the tasks and read their owner and status."""
+        stored = {
+            pk: (user_id, status)
+            for pk, user_id, status in cls.objects.db_manager(using)
+            .select_for_update().filter(pk__in=[task.pk for task in tasks])
+            .values_list('pk', 'user_id', 'status')
+        }
+        for task in tasks:
+            task._stored_status = stored.get(task.pk)
+
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        if self._state.adding or update_fields is not None and not {
+                'status', 'user_id'} & set(update_fields):
+            return super().save(force_insert, force_update, using,
+                                update_fields)
+        # TaskStats counts the task down from the status the save
+        # overwrites, which a concurrent write may have changed since the
+        # task was loaded.
+        using = using or router.db_for_write(Task, instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            self.lock_stored_status([self], using)
+            super().save(force_insert, force_update, using, update_fields)
+
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(Task, instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            self.lock_stored_status([self], using)
+            return super().delete(using, keep_parents)
+
+
+class ArchivedTask(models.Model):
+    """
+    A completed task moved out of the tasks by the archive_tasks command.
+
+    It keeps the id and the fields of the task, so the lists read both
+    with ?include_archived=1, see tasks.archive. It is still counted in
+    TaskStats.
+    """
+
+    id = models.BigIntegerField('ID', primary_key=True)
+    title = models.CharField('Title', max_length=200)
+    description = models.TextField('Description', null=True, blank=True)
+    status = models.PositiveSmallIntegerField(
+        'Status', choices=Task.Status.choices)
+    created = models.DateTimeField('Creation date')
+    updated = models.DateTimeField('Update date')
+    user_id = models.ForeignKey(
+        User, verbose_name='Author', on_delete=models.CASCADE,
+        related_name='archived_tasks')
+    archived = models.DateTimeField('Archive date', auto_now_add=True)
+
+    class Meta:
+        ordering = ('-created',)
+        indexes = (
+            models.Index(
+                fields=('user_id', '-created'),
+                name='archived_task_user_idx'),
+        )
+        verbose_name = 'Archived task'
+        verbose_name_plural = 'Archived tasks'
+
+    def __str__(self):
+        return self.title
+
+
+class TaskChange(models.Model):
+    """
+    Log of created, changed and deleted tasks.
+
+    The id of a record is the change token of the incremental sync. Task and
+    user are kept as plain ids, so the records of deleted tasks stay as
+    tombstones and writing them never waits on a row that is being deleted.
+    """
+
+    task_id = models.BigIntegerField('Task')
+    user_id = models.BigIntegerField('Author')
+    deleted = models.BooleanField('Deleted', default=False)
+    created = models.DateTimeField('Creation date', auto_now_add=True)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('user_id', 'id'), name='task_change_user_idx'),
+        )
+        verbose_name = 'Task change'
+        verbose_name_plural = 'Task changes'
+
+    def __str__(self):
+        return f'{self.task_id} {"deleted" if self.deleted else "changed"}'
+
+
+class TaskStats(models.Model):
+    """
+    Number of tasks of a user by status.
+
+    The counts follow the tasks through tasks.signals, so reading them does
+    not count the tasks. The rebuild_task_stats command counts them again.
+    """
+
+    STATUS_FIELDS = {
+        Task.Status.NEW: 'new',
+        Task.Status.PROGRESS: 'in_progress',
+        Task.Status.COMPLETED: 'completed',
+    }
+
+    user = models.OneToOneField(
+        User, verbose_name='User', on_delete=models.CASCADE,
+        primary_key=True, related_name='task_stats')
+    new = models.IntegerField('New', default=0)
+    in_progress = models.IntegerField('In Progress', default=0)
+    completed = models.IntegerField('Completed', default=0)
+
+    class Meta:
+        verbose_name = 'Task statistics'
+        verbose_name_plural = 'Task statistics'
+
+    def __str__(self):
+        return str(self.user_id)
+
+    def get_counts(self):
+        """Return the counts by status label."""
+        return {
+            status.label: getattr(self, field)
+            for status, field in self.STATUS_FIELDS.items()
+        }
@@ -0,0 +1,54 @@
+"""
+Counts of querysets too large to count, for the admin and the API.
+"""
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimate_count(queryset):
+    """
+    Return the planner's row estimate for a queryset.
+
+    The estimate is taken from PostgreSQL statistics via EXPLAIN, so no rows
+    are scanned. Other backends have no cheap estimate and get None.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']['Plan Rows']
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    A paginator counting at most count_limit rows.
+
+    When the planner estimates more rows, its estimate is the count and
+    estimated is set. Without an estimate, counting stops at count_limit
+    and truncated is set.
+    """
+
+    count_limit = 10000
+
+    estimated = False
+    truncated = False
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is not None and estimate > self.count_limit:
+            self.estimated = True
+            return estimate
+        count = self.object_list.order_by()[:self.count_limit + 1].count()
+        if count > self.count_limit:
+            self.truncated = True
+            return self.count_limit
+        return count
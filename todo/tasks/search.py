@@ -0,0 +1,135 @@
+"""
+Ranked full-text search over the title and description of tasks.
+
+The words of a query are matched as whole words, queries of up to
+SHORT_QUERY_LENGTH characters as a part of a word. PostgreSQL ranks by
+ts_rank or trigram similarity, SQLite by the FTS5 rank, see migrations
+0011_task_search and 0016_archivedtask_search. Other databases fall back
+to an unranked substring match.
+
+Ranking needs the text of every match, so only the newest
+TASKS_SEARCH_MAX_MATCHES matches are ranked: a word found in most tasks
+costs about as much as a rare one, but an older better match past the
+newest ones is not returned.
+"""
+import re
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import Q
+
+SHORT_QUERY_LENGTH = 3
+
+# Whether an FTS5 table exists, by the database alias and the table.
+_sqlite_fts = {}
+
+
+def get_words(query):
+    return re.findall(r'\w+', query)
+
+
+def search_tasks(queryset, query):
+    """
+    Return the tasks of queryset matching the query, best matches first.
+
+    The tasks are annotated with rank, higher is better, equal ranks
+    newest first.
+    """
+    query = query.strip()
+    if not query:
+        return queryset
+    words = get_words(query)
+    if not words:
+        return queryset.none()
+    short = len(query) <= SHORT_QUERY_LENGTH
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        if short:
+            return trigram_search(queryset, query)
+        return postgresql_search(queryset, words)
+    if vendor == 'sqlite' and sqlite_has_fts(
+            queryset.db, get_fts_table(queryset.model)):
+        return sqlite_search(queryset, words, prefix=short)
+    return queryset.filter(
+        Q(title__icontains=query) | Q(description__icontains=query))
+
+
+def newest_matches(matches):
+    """Primary keys of the matches to rank."""
+    return matches.order_by('-pk').values('pk')[
+        :settings.TASKS_SEARCH_MAX_MATCHES]
+
+
+def search_vector():
+    """The tsvector of a task, as the task_search_idx index computes it."""
+    from django.contrib.postgres.search import SearchVector
+    return SearchVector('title', 'description', config='simple')
+
+
+def postgresql_search(queryset, words):
+    from django.contrib.postgres.search import SearchQuery, SearchRank
+    search_query = SearchQuery(' '.join(words), config='simple')
+    vector = search_vector()
+    matches = queryset.annotate(search=vector).filter(search=search_query)
+    return queryset.filter(pk__in=newest_matches(matches)).annotate(
+        rank=SearchRank(vector, search_query),
+    ).order_by('-rank', '-created', '-pk')
+
+
+def trigram_search(queryset, query):
+    from django.contrib.postgres.search import TrigramSimilarity
+    # icontains compiles to UPPER(column::text) LIKE, which the trigram
+    # indexes on UPPER(title) and UPPER(description) serve.
+    matches = queryset.filter(
+        Q(title__icontains=query) | Q(description__icontains=query))
+    return queryset.filter(pk__in=newest_matches(matches)).annotate(
+        rank=TrigramSimilarity('title', query),
+    ).order_by('-rank', '-created', '-pk')
+
+
+def get_fts_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def sqlite_has_fts(alias, table):
+    """Whether the FTS5 table exists, it needs SQLite with FTS5."""
+    key = (alias, table)
+    if key not in _sqlite_fts:
+        _sqlite_fts[key] = (
+            table in connections[alias].introspection.table_names())
+    return _sqlite_fts[key]
+
+
+def sqlite_search(queryset, words, prefix=False):
+    # Quoted words are matched literally, * makes them prefixes.
+    fts_query = ' '.join(
+        f'"{word}"*' if prefix else f'"{word}"' for word in words)
+    table = queryset.model._meta.db_table
+    fts = get_fts_table(queryset.model)
+
+    def match(tasks, where=(), params=(), **kwargs):
+        # The matches are read from the FTS5 index once and the tasks
+        # looked up by them. + 0 keeps SQLite from doing the reverse, the
+        # full-text query for every task of an indexed filter.
+        return tasks.extra(
+            tables=[fts],
+            where=[f'{fts} MATCH %s', f'"{table}"."id" = {fts}.rowid + 0',
+                   *where],
+            params=[fts_query, *params], **kwargs)
+
+    # FTS5 reads the matches newest first and stops at the limit.
+    newest = match(queryset, order_by=[f'-{fts}.rowid']).values('pk')[
+        :settings.TASKS_SEARCH_MAX_MATCHES]
+    try:
+        sql, params = newest.query.sql_with_params()
+    except EmptyResultSet:
+        return queryset.none()
+    # FTS5 serves a range of rowids from its index, not a list of them.
+    return match(
+        queryset,
+        where=[f'{fts}.rowid >= (SELECT MIN("id") FROM ({sql}))'],
+        params=params,
+        # bm25 rank of FTS5 is lower for better matches.
+        select={'rank': f'-{fts}.rank'},
+    ).order_by('-rank', '-created', '-pk')
@@ -0,0 +1,85 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .models import Task, TaskChange
+from .stats import apply_changes, count_changes
+
+# Sent with sender=Task after tasks are written in bulk, which bypasses the
+# post_save and post_delete signals. Arguments: tasks, a list of the Task
+# instances, and action, one of 'create', 'update' or 'delete'.
+tasks_changed = Signal()
+
+# Sent with sender=Task after tasks are moved to the archive, see
+# tasks.archive. Arguments: tasks, a list of the moved Task instances.
+tasks_archived = Signal()
+
+_bulk_delete = ContextVar('bulk_delete', default=False)
+
+
+@contextmanager
+def bulk_delete():
+    """Delete tasks without post_delete bookkeeping, sent in bulk after."""
+    token = _bulk_delete.set(True)
+    try:
+        yield
+    finally:
+        _bulk_delete.reset(token)
+
+
+def is_bulk_delete():
+    """Whether the post_delete of a task is recorded in bulk instead."""
+    return _bulk_delete.get()
+
+
+@receiver(post_save, sender=Task)
+def log_task_save(sender, instance, **kwargs):
+    TaskChange.objects.create(
+        task_id=instance.pk, user_id=instance.user_id_id)
+
+
+@receiver(post_delete, sender=Task)
+def log_task_delete(sender, instance, **kwargs):
+    if is_bulk_delete():
+        return
+    TaskChange.objects.create(
+        task_id=instance.pk, user_id=instance.user_id_id, deleted=True)
+
+
+@receiver(tasks_changed, sender=Task)
+def log_tasks_change(sender, tasks, action, **kwargs):
+    TaskChange.objects.bulk_create(
+        TaskChange(task_id=task.pk, user_id=task.user_id_id,
+                   deleted=action == 'delete')
+        for task in tasks
+    )
+
+
+@receiver(tasks_archived, sender=Task)
+def log_tasks_archive(sender, tasks, **kwargs):
+    """Archived tasks leave the lists, clients in sync delete them."""
+    log_tasks_change(sender, tasks, 'delete')
+
+
+@receiver(post_save, sender=Task)
+def count_task_save(sender, instance, created, update_fields, **kwargs):
+    """Move the task to its status in the counts of TaskStats."""
+    if update_fields is not None and not {'status', 'user_id'} & set(
+            update_fields):
+        return
+    action = 'create' if created else 'update'
+    apply_changes(*count_changes([instance], action))
+
+
+@receiver(post_delete, sender=Task)
+def count_task_delete(sender, instance, **kwargs):
+    if is_bulk_delete():
+        return
+    apply_changes(*count_changes([instance], 'delete'))
+
+
+@receiver(tasks_changed, sender=Task)
+def count_tasks_change(sender, tasks, action, **kwargs):
+    apply_changes(*count_changes(tasks, action))
@@ -0,0 +1,106 @@
+"""
+Counts of the tasks of every user by status, kept in TaskStats.
+
+Every write of tasks changes the counts of their owners, see
+tasks.signals. A change that cannot be counted counts the tasks of the
+user again. Archived tasks are counted too.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import ArchivedTask, Task, TaskStats
+
+
+def count_changes(tasks, action):
+    """
+    Return how the written tasks change the counts.
+
+    action is 'create', 'update' or 'delete'. Return the changes by user
+    and status, and the users whose tasks have to be counted again.
+    """
+    changes = defaultdict(Counter)
+    recount = set()
+    for task in tasks:
+        current = (task.user_id_id, task.status)
+        stored = getattr(task, '_stored_status', None)
+        if action == 'create':
+            changes[task.user_id_id][task.status] += 1
+        elif action == 'delete':
+            user_id, status = stored or current
+            changes[user_id][status] -= 1
+        elif stored is None:
+            recount.add(task.user_id_id)
+        elif stored != current:
+            changes[stored[0]][stored[1]] -= 1
+            changes[task.user_id_id][task.status] += 1
+        task._stored_status = None if action == 'delete' else current
+    return changes, recount
+
+
+def apply_changes(changes, recount=()):
+    """Add the changes to the counts, count the tasks of recount again."""
+    recount = set(recount)
+    for user_id, statuses in changes.items():
+        values = {
+            TaskStats.STATUS_FIELDS[status]:
+                F(TaskStats.STATUS_FIELDS[status]) + delta
+            for status, delta in statuses.items() if delta
+        }
+        if not values or user_id in recount:
+            continue
+        updated = TaskStats.objects.filter(user_id=user_id).update(**values)
+        # Without counts there is nothing to count down, and the user may
+        # be being deleted with the tasks.
+        if not updated and any(delta > 0 for delta in statuses.values()):
+            recount.add(user_id)
+    if recount:
+        count_tasks(recount)
+
+
+def get_counts(user_ids):
+    """Count the tasks of the users, return the TaskStats fields by user."""
+    counts = {
+        user_id: dict.fromkeys(TaskStats.STATUS_FIELDS.values(), 0)
+        for user_id in user_ids
+    }
+    # Archived tasks are still tasks of the user, see tasks.archive.
+    for model in (Task, ArchivedTask):
+        rows = (
+            model.objects.filter(user_id__in=counts).order_by()
+            .values_list('user_id', 'status').annotate(count=Count('pk')))
+        for user_id, status, count in rows:
+            counts[user_id][TaskStats.STATUS_FIELDS[status]] += count
+    return counts
+
+
+def count_tasks(user_ids):
+    """Count the tasks of the users again and save the counts."""
+    user_ids = set(user_ids)
+    with transaction.atomic():
+        # Rows a concurrent count inserted first are left to the update.
+        TaskStats.objects.bulk_create(
+            [TaskStats(user_id=user_id) for user_id in user_ids],
+            ignore_conflicts=True)
+        # Changes of the counts wait for the new ones. Counted after the
+        # lock, the tasks of changes made before it are in the new counts.
+        list(TaskStats.objects.select_for_update()
+             .filter(user_id__in=user_ids).values_list('pk'))
+        TaskStats.objects.bulk_update([
+            TaskStats(user_id=user_id, **values)
+            for user_id, values in get_counts(user_ids).items()
+        ], TaskStats.STATUS_FIELDS.values())
+
+
+def get_stats(user_id):
+    """
+    Return the TaskStats of a user.
+
+    A user without counts has not written tasks since they were counted,
+    their counts are computed and not saved.
+    """
+    stats = TaskStats.objects.filter(user_id=user_id).first()
+    if stats is None:
+        stats = TaskStats(user_id=user_id, **get_counts([user_id])[user_id])
+    return stats
@@ -0,0 +1,127 @@
+from datetime import datetime
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.querylog import assert_no_repeated_queries
+from tasks.admin import TaskAdmin
+from tasks.archive import archive_batch
+from tasks.models import ArchivedTask, Task, User
+from tasks.pagination import EstimatedCountPaginator
+
+TASKS_URL = '/admin/tasks/task/'
+USERS_URL = '/admin/tasks/user/'
+
+
+class AdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', first_name='admin', password='qazxsw321')
+        cls.user = User.objects.create_user(
+            username='auth', first_name='auth', password='qazxsw321')
+        Task.objects.bulk_create(
+            Task(title=f'Title test task {number}', user_id=cls.user)
+            for number in range(TaskAdmin.list_per_page + 5)
+        )
+        cls.tasks = list(Task.objects.order_by('-created', '-pk'))
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_pages(self):
+        """Tasks are paged by position, newest first, in any number."""
+        with assert_no_repeated_queries():
+            response = self.client.get(TASKS_URL)
+        first = response.context['cl']
+        self.assertEqual(first.result_list, self.tasks[:100])
+        self.assertEqual(first.result_count, len(self.tasks))
+        self.assertContains(response, 'Next page')
+        response = self.client.get(TASKS_URL + first.get_next_url())
+        second = response.context['cl']
+        self.assertEqual(second.result_list, self.tasks[100:])
+        self.assertIsNone(second.next_position)
+        self.assertContains(response, 'First page')
+
+    def test_same_created(self):
+        """Tasks created at the same time are each shown once."""
+        Task.objects.update(created=timezone.now())
+        tasks = list(Task.objects.order_by('-pk'))
+        cl = self.client.get(TASKS_URL).context['cl']
+        response = self.client.get(TASKS_URL + cl.get_next_url())
+        self.assertEqual(
+            cl.result_list + response.context['cl'].result_list, tasks)
+
+    def test_invalid_position(self):
+        response = self.client.get(TASKS_URL, {'before': 'yesterday,1'})
+        self.assertRedirects(
+            response, TASKS_URL + '?e=1', fetch_redirect_response=False)
+
+    def test_sorted_by_column(self):
+        """A list sorted by a column is paged by numbers."""
+        response = self.client.get(TASKS_URL, {'o': '2'})
+        cl = response.context['cl']
+        self.assertTrue(cl.multi_page)
+        self.assertEqual(len(cl.result_list), 100)
+
+    def test_date_hierarchy(self):
+        """Dates are listed from the first and last date, not every row."""
+        Task.objects.filter(pk=self.tasks[-1].pk).update(
+            created=datetime(2021, 5, 3, tzinfo=timezone.utc))
+        Task.objects.filter(pk=self.tasks[0].pk).update(
+            created=datetime(2023, 2, 1, tzinfo=timezone.utc))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(TASKS_URL)
+        for query in queries:
+            self.assertNotIn('DISTINCT', query['sql'])
+            self.assertFalse('MIN(' in query['sql'] and 'MAX(' in query['sql'])
+        for year in ('2021', '2022', '2023'):
+            self.assertContains(response, f'created__year={year}')
+        response = self.client.get(
+            TASKS_URL, {'created__year': 2021, 'created__month': 5})
+        self.assertEqual(
+            response.context['cl'].result_list, [self.tasks[-1]])
+        self.assertContains(response, 'created__day=3')
+
+    def test_search(self):
+        """Tasks are searched with tasks.search."""
+        task = self.tasks[7]
+        Task.objects.filter(pk=task.pk).update(title='Unique needle')
+        response = self.client.get(TASKS_URL, {'q': 'needle'})
+        self.assertEqual(response.context['cl'].result_list, [task])
+
+    def test_users(self):
+        """Users are searched by the prefix of their username."""
+        response = self.client.get(USERS_URL, {'q': 'AU'})
+        self.assertEqual(response.context['cl'].result_list, [self.user])
+        response = self.client.get(USERS_URL, {'is_staff__exact': 1})
+        self.assertEqual(response.context['cl'].result_list, [self.admin])
+
+    def test_archived_tasks(self):
+        """Archived tasks are listed and cannot be changed or deleted."""
+        Task.objects.update(status=Task.Status.COMPLETED)
+        archive_batch(timezone.now(), 3)
+        response = self.client.get('/admin/tasks/archivedtask/')
+        self.assertEqual(len(response.context['cl'].result_list), 3)
+        self.assertNotContains(response, '/admin/tasks/archivedtask/add/')
+        archived = ArchivedTask.objects.first()
+        response = self.client.get(f'/admin/tasks/archivedtask/{archived.pk}/delete/')
+        self.assertEqual(response.status_code, 403)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def test_truncated(self):
+        """Without an estimate counting stops at count_limit."""
+        user = User.objects.create_user(username='auth', first_name='auth')
+        Task.objects.bulk_create(
+            Task(title='Title test task', user_id=user) for _ in range(3))
+        paginator = EstimatedCountPaginator(Task.objects.all(), 1)
+        paginator.count_limit = 2
+        self.assertEqual(paginator.count, 2)
+        self.assertTrue(paginator.truncated)
+        paginator = EstimatedCountPaginator(Task.objects.all(), 1)
+        self.assertEqual(paginator.count, 3)
+        self.assertFalse(paginator.truncated)
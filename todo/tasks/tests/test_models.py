@@ -12,7 +12,7 @@ class TaskModelTest(TestCase):
         cls.task = Task.objects.create(
             title='Title test task',
             description='Test description',
-            status='New',
+            status=Task.Status.NEW,
             user_id=cls.user
         )
 
@@ -41,3 +41,12 @@ class TaskModelTest(TestCase):
         for model, expected_value in field_str.items():
             with self.subTest(model=model):
                 self.assertEqual(expected_value, str(model))
+
+    def test_status_from_label(self):
+        """Task status is found by its label."""
+        for task_status in Task.Status:
+            with self.subTest(label=task_status.label):
+                self.assertEqual(
+                    Task.Status.from_label(task_status.label), task_status)
+        with self.assertRaises(ValueError):
+            Task.Status.from_label('Unknown')
@@ -9,8 +9,56 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todo.settings')
 
-application = get_asgi_application()
+
+class StreamingASGIHandler(ASGIHandler):
+    """ASGIHandler iterating streaming responses out of the event loop."""
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        # The content of a sync view queries the database, so it is read on
+        # the thread of the view, a part at a time.
+        headers = [
+            (name.encode('ascii'), value.encode('latin1'))
+            for name, value in response.items()]
+        headers.extend(
+            (b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+            for cookie in response.cookies.values())
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': headers,
+        })
+        parts = iter(response)
+        next_part = sync_to_async(next, thread_sensitive=True)
+        while True:
+            part = await next_part(parts, None)
+            if part is None:
+                break
+            for chunk, _ in self.chunk_bytes(part):
+                await send({
+                    'type': 'http.response.body', 'body': chunk,
+                    'more_body': True,
+                })
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+
+django.setup(set_prefix=False)
+django_application = StreamingASGIHandler()
+
+# Imported once Django is set up.
+from api.events import EVENTS_PATH, stream_events  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """Stream the events of the tasks, serve everything else with Django."""
+    if scope['type'] == 'http' and scope['path'] == EVENTS_PATH:
+        return await stream_events(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -10,7 +10,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.getenv('SECRET_KEY')
 
-DEBUG = True
+DEBUG = os.getenv('DEBUG', 'True') == 'True'
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -71,10 +71,131 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT')
+        'PORT': os.getenv('DB_PORT'),
+        # Seconds a connection is kept open for the next requests of its
+        # thread, 0 closes it after every request.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        # Whether a kept connection is checked before a request uses it,
+        # see api.connections.
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        # Server-side cursors do not survive PgBouncer in transaction mode.
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv(
+            'DB_DISABLE_SERVER_SIDE_CURSORS', 'False') == 'True',
     }
 }
 
+# Seconds a kept connection may be idle before a request checks it.
+DATABASE_HEALTH_CHECK_IDLE = float(
+    os.getenv('DB_CONN_HEALTH_CHECK_IDLE', 10))
+
+# Read replicas of the database serving the reads of safe requests, see
+# api.replicas. DB_REPLICAS lists them comma separated, as host or
+# host:port of PostgreSQL, or as files of SQLite to try it locally.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+        filter(None, os.getenv('DB_REPLICAS', '').split(',')), start=1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        # Tests read the data they write from the test database.
+        'TEST': {'MIRROR': 'default'},
+    }
+    if 'sqlite3' in DATABASES[alias]['ENGINE']:
+        DATABASES[alias]['NAME'] = replica.strip()
+    else:
+        host, _, port = replica.strip().partition(':')
+        DATABASES[alias]['HOST'] = host
+        DATABASES[alias]['PORT'] = port or DATABASES[alias]['PORT']
+    DATABASE_REPLICAS.append(alias)
+# Replicas more seconds behind the primary serve no reads, and a user reads
+# from the primary for DATABASE_REPLICA_PIN_SECONDS after writing.
+DATABASE_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', 5))
+DATABASE_REPLICA_PIN_SECONDS = float(
+    os.getenv('DB_REPLICA_PIN_SECONDS', 10))
+DATABASE_REPLICA_LAG_CHECK_SECONDS = float(
+    os.getenv('DB_REPLICA_LAG_CHECK_SECONDS', 1))
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+    MIDDLEWARE.append('api.replicas.ReplicaMiddleware')
+
+# The cache is shared by the processes serving the project: a local memory
+# cache serves a single process only, see gunicorn.conf.py.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+if CACHES['default']['BACKEND'].endswith('.LocMemCache'):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10000)),
+    }
+
+TASKS_CACHE_ALIAS = 'default'
+
+# Lifetime of cached task lists in seconds, 0 disables the cache.
+TASKS_CACHE_TIMEOUT = int(os.getenv('TASKS_CACHE_TIMEOUT', 60))
+
+# Search ranks only the newest matches, see tasks.search.
+TASKS_SEARCH_MAX_MATCHES = int(os.getenv('TASKS_SEARCH_MAX_MATCHES', 1000))
+
+# Seconds after which a logged task change is taken as committed: the
+# change token of /api/tasks/changes/ does not pass newer changes. Longer
+# than a transaction writing tasks may take.
+TASKS_CHANGES_SETTLE_SECONDS = int(
+    os.getenv('TASKS_CHANGES_SETTLE_SECONDS', 30))
+
+# Full users kept in the memory of a process by the JWT authentication,
+# and for how many seconds users and revoked tokens are cached, see
+# api.authentication.
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', 1000))
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 60))
+
+# Threads running the queries of the async views, see api.async_views.
+ASYNC_DB_THREADS = int(os.getenv('ASYNC_DB_THREADS', 8))
+
+# Streams of the task changes at /api/events/, see api.events. The broker
+# fans out the events: LocalBroker to the streams of its own process only,
+# PostgresBroker to every process.
+EVENTS_BROKER = os.getenv('EVENTS_BROKER', (
+    'api.events.PostgresBroker'
+    if 'postgresql' in (DATABASES['default']['ENGINE'] or '')
+    else 'api.events.LocalBroker'))
+# Seconds a ticket of POST /api/events/tickets/ may open a stream.
+EVENTS_TICKET_SECONDS = int(os.getenv('EVENTS_TICKET_SECONDS', 30))
+EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', 100))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv('EVENTS_HEARTBEAT_SECONDS', 15))
+
+# Metrics of the requests at /api/metrics/, and the share of the requests
+# timed phase by phase in the Server-Timing header, see api.timing.
+REQUEST_TIMING = os.getenv('REQUEST_TIMING', 'False') == 'True'
+REQUEST_TIMING_SAMPLE_RATE = float(
+    os.getenv('REQUEST_TIMING_SAMPLE_RATE', 0.01))
+if REQUEST_TIMING:
+    MIDDLEWARE.insert(0, 'api.timing.TimingMiddleware')
+
+# Bearer token a scrape of /api/metrics/ has to send, none when empty.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Log of the queries slower than QUERY_LOG_SLOW_MS milliseconds, and of
+# the queries a request makes QUERY_LOG_REPEATED times or more, an N+1,
+# for development and staging, see api.querylog.
+QUERY_LOG = os.getenv('QUERY_LOG', 'False') == 'True'
+QUERY_LOG_SLOW_MS = float(os.getenv('QUERY_LOG_SLOW_MS', 100))
+QUERY_LOG_REPEATED = int(os.getenv('QUERY_LOG_REPEATED', 5))
+if QUERY_LOG:
+    MIDDLEWARE.insert(0, 'api.querylog.QueryLogMiddleware')
+    LOGGING = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'handlers': {'console': {'class': 'logging.StreamHandler'}},
+        'loggers': {
+            'api.querylog': {'handlers': ['console'], 'level': 'INFO'},
+        },
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -105,6 +226,8 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+STATIC_ROOT = BASE_DIR / 'static'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
@@ -112,7 +235,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
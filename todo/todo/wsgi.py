@@ -1,7 +1,13 @@
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
+from whitenoise import WhiteNoise
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todo.settings')
 
-application = get_wsgi_application()
+# The files of the admin and Swagger are served from STATIC_ROOT, filled
+# by collectstatic. Under ASGI they are not served.
+application = WhiteNoise(
+    get_wsgi_application(),
+    root=settings.STATIC_ROOT, prefix=settings.STATIC_URL)